@@ -3,14 +3,21 @@ from pathlib import Path
 from datetime import datetime, timedelta
 import json
 import os
+import sys
 
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from modules.core.trace_catalog import load_memory
+from modules.core.trace_store import TraceStore
+from modules.google_sync.push_sync import push_traces
+from modules.google_sync.service_provider import get_service_provider
 
 # === Configuration ===
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 BASE_PATH = Path("data/conversation/raw")
 GOOGLE_CALENDAR_ID = "primary"
+TRACE_DB_PATH = Path(os.getenv("TRACE_DB_PATH", "data/conversation/trace_store.db"))
+
+store = TraceStore(TRACE_DB_PATH)
 
 mcp = FastMCP("GoogleCalendarMCP")
 
@@ -22,8 +29,8 @@ def authenticate_google():
     if not token_path.exists():
         raise RuntimeError("Google Calendar not authenticated. Run `auth_google_calendar.py` first.")
 
-    creds = Credentials.from_authorized_user_file(token_path, SCOPES)
-    return build("calendar", "v3", credentials=creds)
+    # Credentials and client are cached across tool calls and refreshed in the background
+    return get_service_provider(token_path, creds_path, SCOPES, interactive=False).service()
 
 # === ICS Utility ===
 def generate_uid(title: str, date_str: str) -> str:
@@ -67,69 +74,37 @@ def convert_trace_to_ics(trace: dict) -> str:
 @mcp.tool()
 def sync_traces_to_google(traces: list[dict]) -> str:
     service = authenticate_google()
-    synced = 0
-
-    for trace in traces:
-        try:
-            start_dt = datetime.fromisoformat(trace["timestamp"].replace("Z", "+00:00"))
-            end_dt = start_dt + timedelta(minutes=15)
-
-            payload = {
-                "summary": trace["content"][:40],
-                "description": trace.get("content", ""),
-                "start": {"dateTime": start_dt.isoformat(), "timeZone": "UTC"},
-                "end": {"dateTime": end_dt.isoformat(), "timeZone": "UTC"},
-                "location": trace.get("location", ""),
-            }
-
-            service.events().insert(calendarId=GOOGLE_CALENDAR_ID, body=payload).execute()
-            synced += 1
-        except Exception as e:
-            print(f"[!] Failed to sync event: {e}")
+    report = push_traces(service, traces, calendar_id=GOOGLE_CALENDAR_ID)
+    for event_id, error in sorted(report.failed.items()):
+        print(f"[!] Failed to sync event {event_id}: {error}")
 
-    return f"Synced {synced} events to Google Calendar"
+    return (f"Synced {len(report.inserted) + len(report.patched)} events to Google Calendar "
+            f"({len(report.inserted)} new, {len(report.patched)} updated, {len(report.unchanged)} unchanged)")
 
 @mcp.tool()
 def load_memory_file(file_path: str) -> list[dict]:
     path = Path(file_path)
     if not path.exists():
         raise FileNotFoundError(f"File not found: {file_path}")
-    with open(path) as f:
-        data = json.load(f)
-    return data.get("memory", [])
+    return load_memory(path)
 
 # === Resources ===
 @mcp.resource("calendar://pending_goals")
 def pending_goals() -> list[dict]:
-    traces = []
-    for json_file in BASE_PATH.glob("*.json"):
-        with open(json_file) as f:
-            data = json.load(f)
-        for trace in data.get("memory", []):
-            if trace.get("type") == "goal" and trace.get("completion_status") == "pending":
-                traces.append(trace)
-    return traces
+    store.sync_directory(BASE_PATH)
+    return store.by_type_status("goal", "pending")
 
 @mcp.resource("calendar://week_summary/{iso_week}")
 def week_summary(iso_week: str) -> dict:
     year, week = iso_week.split("-W")
-    traces = []
-    for json_file in BASE_PATH.glob("*.json"):
-        with open(json_file) as f:
-            data = json.load(f)
-        for trace in data.get("memory", []):
-            if "timestamp" in trace:
-                dt = datetime.fromisoformat(trace["timestamp"].replace("Z", "+00:00"))
-                if dt.isocalendar().year == int(year) and dt.isocalendar().week == int(week):
-                    traces.append(trace)
+    store.sync_directory(BASE_PATH)
+    traces = store.in_iso_week(int(year), int(week))
     return {"iso_week": iso_week, "count": len(traces), "traces": traces}
 
 @mcp.resource("calendar://trace_by_id/{trace_id}")
 def trace_by_id(trace_id: str) -> dict:
-    for json_file in BASE_PATH.glob("*.json"):
-        with open(json_file) as f:
-            data = json.load(f)
-        for trace in data.get("memory", []):
-            if trace.get("id") == trace_id:
-                return trace
-    raise ValueError(f"No trace found with id: {trace_id}")
\ No newline at end of file
+    store.sync_directory(BASE_PATH)
+    trace = store.get(trace_id)
+    if trace is None:
+        raise ValueError(f"No trace found with id: {trace_id}")
+    return trace
\ No newline at end of file
@@ -2,15 +2,22 @@ from mcp.server.fastmcp import FastMCP
 from pathlib import Path
 from datetime import datetime, timedelta
 import json
+import os
+import sys
 
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from modules.core.trace_catalog import load_memory
+from modules.core.trace_store import TraceStore
+from modules.google_sync.push_sync import push_traces
+from modules.google_sync.service_provider import get_service_provider
 
 # === Configuration ===
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 BASE_PATH = Path("data/conversation/raw")
 GOOGLE_CALENDAR_ID = "primary"
+TRACE_DB_PATH = Path(os.getenv("TRACE_DB_PATH", "data/conversation/trace_store.db"))
+
+store = TraceStore(TRACE_DB_PATH)
 
 mcp = FastMCP("MemoryCalendarMCP")
 
@@ -23,11 +30,8 @@ def authenticate_google():
     if not token_path.exists():
         raise RuntimeError("Token not found. Run auth_setup.py first.")
 
-    creds = Credentials.from_authorized_user_file(token_path, SCOPES)
-    return build("calendar", "v3", credentials=creds)
-
-
-    return build("calendar", "v3", credentials=creds)
+    # Credentials and client are cached across tool calls and refreshed in the background
+    return get_service_provider(token_path, creds_path, SCOPES, interactive=False).service()
 
 # === ICS Utility ===
 
@@ -75,33 +79,12 @@ def convert_trace_to_ics(trace: dict) -> str:
 def sync_traces_to_google(traces: list[dict]) -> str:
     """Sync a list of memory traces to Google Calendar."""
     service = authenticate_google()
-    synced = 0
-
-    for trace in traces:
-        try:
-            start_dt = datetime.fromisoformat(trace["timestamp"].replace("Z", "+00:00"))
-            end_dt = start_dt + timedelta(minutes=15)
-
-            payload = {
-                "summary": trace["content"][:40],
-                "description": trace.get("content", ""),
-                "start": {
-                    "dateTime": start_dt.isoformat(),
-                    "timeZone": "UTC"
-                },
-                "end": {
-                    "dateTime": end_dt.isoformat(),
-                    "timeZone": "UTC"
-                },
-                "location": trace.get("location", ""),
-            }
-
-            service.events().insert(calendarId=GOOGLE_CALENDAR_ID, body=payload).execute()
-            synced += 1
-        except Exception as e:
-            print(f"[!] Failed to sync event: {e}")
-    
-    return f"Synced {synced} events to Google Calendar"
+    report = push_traces(service, traces, calendar_id=GOOGLE_CALENDAR_ID)
+    for event_id, error in sorted(report.failed.items()):
+        print(f"[!] Failed to sync event {event_id}: {error}")
+
+    return (f"Synced {len(report.inserted) + len(report.patched)} events to Google Calendar "
+            f"({len(report.inserted)} new, {len(report.patched)} updated, {len(report.unchanged)} unchanged)")
 
 @mcp.tool()
 def load_memory_file(file_path: str) -> list[dict]:
@@ -109,37 +92,22 @@ def load_memory_file(file_path: str) -> list[dict]:
     path = Path(file_path)
     if not path.exists():
         raise FileNotFoundError(f"File not found: {file_path}")
-    with open(path) as f:
-        data = json.load(f)
-    return data.get("memory", [])
+    return load_memory(path)
 
 # === MCP Resources ===
 
 @mcp.resource("calendar://pending_goals")
 def pending_goals() -> list[dict]:
     """Return all memory traces with type 'goal' and status 'pending'."""
-    traces = []
-    for json_file in BASE_PATH.glob("*.json"):
-        with open(json_file) as f:
-            data = json.load(f)
-        for trace in data.get("memory", []):
-            if trace.get("type") == "goal" and trace.get("completion_status") == "pending":
-                traces.append(trace)
-    return traces
+    store.sync_directory(BASE_PATH)
+    return store.by_type_status("goal", "pending")
 
 @mcp.resource("calendar://week_summary/{iso_week}")
 def week_summary(iso_week: str) -> dict:
     """Summarize all memory traces from the given ISO week (format: YYYY-Www)."""
     year, week = iso_week.split("-W")
-    traces = []
-    for json_file in BASE_PATH.glob("*.json"):
-        with open(json_file) as f:
-            data = json.load(f)
-        for trace in data.get("memory", []):
-            if "timestamp" in trace:
-                dt = datetime.fromisoformat(trace["timestamp"].replace("Z", "+00:00"))
-                if dt.isocalendar().year == int(year) and dt.isocalendar().week == int(week):
-                    traces.append(trace)
+    store.sync_directory(BASE_PATH)
+    traces = store.in_iso_week(int(year), int(week))
     return {
         "iso_week": iso_week,
         "count": len(traces),
@@ -149,10 +117,8 @@ def week_summary(iso_week: str) -> dict:
 @mcp.resource("calendar://trace_by_id/{trace_id}")
 def trace_by_id(trace_id: str) -> dict:
     """Return a single trace with a matching trace_id."""
-    for json_file in BASE_PATH.glob("*.json"):
-        with open(json_file) as f:
-            data = json.load(f)
-        for trace in data.get("memory", []):
-            if trace.get("id") == trace_id:
-                return trace
-    raise ValueError(f"No trace found with id: {trace_id}")
+    store.sync_directory(BASE_PATH)
+    trace = store.get(trace_id)
+    if trace is None:
+        raise ValueError(f"No trace found with id: {trace_id}")
+    return trace
@@ -0,0 +1,64 @@
+# modules/calendar_io/benchmark_ics_parser.py
+# Compare ics.Calendar against the native ICSEvent parser on synthetic calendars
+#
+# PYTHONPATH=. python modules/calendar_io/benchmark_ics_parser.py --events 10000 100000
+
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from modules.calendar_io.ics_events import load_calendar_events
+
+
+def write_synthetic_calendar(path: Path, n_events: int) -> None:
+    start = datetime(2025, 1, 6, 8, 0, tzinfo=timezone.utc)
+    with open(path, "w", newline="") as f:
+        f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Chronologue//Benchmark//EN\r\n")
+        for i in range(n_events):
+            begin = start + timedelta(minutes=37 * i)
+            end = begin + timedelta(minutes=15 + (i % 6) * 15)
+            tzid = ";TZID=America/New_York" if i % 3 == 0 else ""
+            fmt = "%Y%m%dT%H%M%S" if tzid else "%Y%m%dT%H%M%SZ"
+            f.write(
+                "BEGIN:VEVENT\r\n"
+                f"UID:bench-{i}@chronologue\r\n"
+                f"SUMMARY:Lab meeting {i}\\, bench {i % 12}\r\n"
+                f"DESCRIPTION:Synthetic event {i} for parser benchmarking\\nwith a second line\r\n"
+                f"DTSTART{tzid}:{begin.strftime(fmt)}\r\n"
+                f"DTEND{tzid}:{end.strftime(fmt)}\r\n"
+                "END:VEVENT\r\n"
+            )
+        f.write("END:VCALENDAR\r\n")
+
+
+def time_call(fn, *args) -> float:
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def parse_with_ics(path: Path) -> int:
+    from ics import Calendar
+    with open(path, "r") as f:
+        calendar = Calendar(f.read())
+    return len([(e.uid, e.name, e.description, e.begin.datetime, e.end.datetime) for e in calendar.events])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ics.Calendar vs the native ICS event parser")
+    parser.add_argument("--events", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--skip-ics", action="store_true", help="Only time the native parser")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.events:
+            path = Path(tmp) / f"bench_{n}.ics"
+            write_synthetic_calendar(path, n)
+            native = time_call(load_calendar_events, path)
+            line = f"→ {n:>7} events: native {native:.2f}s"
+            if not args.skip_ics:
+                library = time_call(parse_with_ics, path)
+                line += f", ics {library:.2f}s ({library / native:.1f}x faster)"
+            print(line)
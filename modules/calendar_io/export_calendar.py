@@ -1,11 +1,12 @@
 import os
 import json
 from datetime import datetime, timedelta
+from itertools import islice
 from pathlib import Path
-from schema import validate_memory_trace
-from openai import OpenAI  
-
-client = OpenAI()
+from typing import Dict, Iterable, List, Optional, Union
+from modules.calendar_io.ics_writer import ICSWriter, Property, render_component
+from modules.calendar_io.summary_titles import generate_summary_title, generate_summary_titles
+from modules.core.trace_validator import valid_mask
 
 
 def generate_uid(title: str, date_str: str) -> str:
@@ -48,19 +49,11 @@ def resolve_duration_minutes(trace: dict, default: int = 30, strict: bool = Fals
 
 
 
-def generate_summary_title(content: str, max_chars: int = 40) -> str:
-    try:
-        response = client.responses.create(
-            model="gpt-4.1",
-            input=f"Summarize this event in under {max_chars} characters:\n{content}"
-        )
-        return response.output_text.strip()
-    except Exception as e:
-        print(f"[!] OpenAI summarization failed: {e}")
-        return content[:max_chars] + "..." if len(content) > max_chars else content
-
-
-def generate_ics_string(trace: dict) -> str:
+def trace_to_event(trace: dict, summary: Optional[str] = None) -> List[Property]:
+    """
+    VEVENT properties for one trace (TEXT values unescaped; the writer escapes them).
+    `summary` is used when the trace has no title; otherwise one is generated.
+    """
     start_iso = trace["timestamp"]
     start_dt = datetime.fromisoformat(start_iso.replace("Z", "+00:00"))
     duration = resolve_duration_minutes(trace)
@@ -69,68 +62,75 @@ def generate_ics_string(trace: dict) -> str:
     start = start_dt.strftime("%Y%m%dT%H%M%SZ")
     end = end_dt.strftime("%Y%m%dT%H%M%SZ")
 
-    summary = trace.get("title") or generate_summary_title(trace["content"])
+    summary = trace.get("title") or summary or generate_summary_title(trace["content"])
 
     chat_url = trace.get("chat_url", "https://chat.openai.com/share/example-link")
     full_description = f"{trace['content']}\nChat log: {chat_url}"
 
-    summary = summary.replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;")
-    full_description = full_description.replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;")
-
     dtstamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
     uid = trace.get("linked_event_uid") or generate_uid(trace["task_id"], start[:8])
     location = trace.get("location", "")
 
-    return f"""
-BEGIN:VEVENT
-UID:{uid}
-DTSTAMP:{dtstamp}
-DTSTART:{start}
-DTEND:{end}
-SUMMARY:{summary}
-DESCRIPTION:{full_description}
-LOCATION:{location}
-STATUS:CONFIRMED
-END:VEVENT"""
-
+    return [
+        ("UID", uid),
+        ("DTSTAMP", dtstamp),
+        ("DTSTART", start),
+        ("DTEND", end),
+        ("SUMMARY", summary),
+        ("DESCRIPTION", full_description),
+        ("LOCATION", location),
+        ("STATUS", "CONFIRMED"),
+    ]
 
-def write_consolidated_ics(events: list[str], output_path: Path):
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    calendar_header = "BEGIN:VCALENDAR\rVERSION:2.0\rPRODID:-//CalendarMemorySystem//EN\r"
-    calendar_footer = "\rEND:VCALENDAR"
-    events_block = "".join(events)
-    calendar_block = calendar_header + events_block + calendar_footer
 
-    with open(output_path, "w", newline='\r\n') as f:
-        f.write(calendar_block)
-    print(f"→ Saved consolidated calendar: {output_path.name}")
+def generate_ics_string(trace: dict) -> str:
+    """One VEVENT block with CRLF line endings, folded and escaped."""
+    return render_component("VEVENT", trace_to_event(trace)).decode("utf-8")
 
 
-def convert_json_folder_to_ics(input_dir: Path, output_dir: Path):
-    json_files = sorted(input_dir.glob("*.json"))
-    if not json_files:
-        print(f"[!] No JSON files found in {input_dir}")
-        return
+def write_consolidated_ics(events: Iterable[str], output_path: Path):
+    """Stream pre-rendered VEVENT blocks (e.g. from generate_ics_string) into one calendar."""
+    with ICSWriter(output_path) as writer:
+        for event in events:
+            writer.write_raw(event)
+    print(f"→ Saved consolidated calendar: {output_path.name}")
 
-    for json_file in json_files:
-        with open(json_file) as f:
-            data = json.load(f)
 
-        traces = data.get("memory", [])
-        vevents = []
-        for trace in traces:
-            if validate_memory_trace(trace):
+def export_traces_to_ics(traces: Iterable[Dict], output_path: Union[str, Path], batch_size: int = 4096) -> int:
+    """
+    Validate and write `traces` (any iterable, e.g. a generator over a large log) to one
+    .ics file, holding one batch of traces in memory at a time. Titles missing from a
+    batch are generated together (see summary_titles). Returns events written.
+    """
+    traces = iter(traces)
+    skipped = 0
+    with ICSWriter(output_path) as writer:
+        while True:
+            batch = list(islice(traces, batch_size))
+            if not batch:
+                break
+            valid = [trace for trace, ok in zip(batch, valid_mask(batch)) if ok]
+            skipped += len(batch) - len(valid)
+            summaries: List[Optional[str]] = [None] * len(valid)
+            untitled = [i for i, trace in enumerate(valid) if not trace.get("title")]
+            for i, title in zip(untitled, generate_summary_titles([valid[i]["content"] for i in untitled])):
+                summaries[i] = title
+            for trace, summary in zip(valid, summaries):
                 try:
-                    vevents.append(generate_ics_string(trace))
+                    writer.write_event(trace_to_event(trace, summary))
                 except KeyError as e:
                     print(f"[!] Skipping trace {trace.get('id')} due to missing key: {e}")
+    if skipped:
+        print(f"[!] Skipped {skipped} invalid trace(s)")
+    print(f"→ Saved {writer.count} event(s) to {Path(output_path).name}")
+    return writer.count
+
 
-        if vevents:
-            output_filename = json_file.stem + ".ics"
-            output_path = output_dir / output_filename
-            write_consolidated_ics(vevents, output_path)
-        else:
-            print(f"[!] No valid memory traces found in {json_file.name}")
+def convert_json_folder_to_ics(input_dir: Path, output_dir: Path, workers: Optional[int] = None,
+                               checkpoint_path: Optional[Path] = None) -> Dict[str, object]:
+    """One .ics per JSON file, across a process pool; unchanged inputs are skipped on reruns."""
+    from modules.calendar_io.parallel_export import convert_json_folder
+    return convert_json_folder(input_dir, output_dir, workers, checkpoint_path)
 
 
 def test_ics_format():
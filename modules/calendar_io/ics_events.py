@@ -0,0 +1,110 @@
+# modules/calendar_io/ics_events.py
+# Lightweight VEVENT parser: projects uid/name/description/begin/end into plain records
+#
+# Drop-in for the fields the tempo-token code used to read from `ics.Calendar`, with the
+# same semantics (floating times are UTC, TZID times keep their local offset, all-day
+# events span one day, a missing DTEND falls back to DURATION or DTSTART) but without
+# building the library's object graph.
+
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import BinaryIO, Collection, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, TextIO, Union
+
+from modules.calendar_io.ics_timezones import TimezoneResolver
+from modules.calendar_io.ics_tokenizer import ICSProperty, iter_component_trees, parse_duration, unescape_text
+from modules.calendar_io.recurrence import Recurrence, recurrence_from_properties
+
+
+class ICSEvent(NamedTuple):
+    uid: Optional[str]
+    name: Optional[str]
+    description: Optional[str]
+    begin: datetime
+    end: datetime
+    all_day: bool = False
+    recurrence: Optional[Recurrence] = None
+    recurrence_id: Optional[datetime] = None     # set on a modified instance of a series
+
+    def occurrences(self, start: datetime, end: datetime,
+                    exclude: Collection[datetime] = ()) -> Iterator["ICSEvent"]:
+        """
+        This event moved to each of its occurrences starting in [start, end], skipping
+        the instants in `exclude` (see overridden_instants).
+        """
+        if self.recurrence is None:
+            if start <= self.begin <= end:
+                yield self
+            return
+        duration = self.end - self.begin
+        for occurrence in self.recurrence.between(start, end, exclude):
+            yield self._replace(begin=occurrence, end=occurrence + duration)
+
+
+def event_from_properties(properties: List[ICSProperty],
+                          resolver: Optional[TimezoneResolver] = None) -> Optional[ICSEvent]:
+    """Project one VEVENT's properties; returns None for events without a DTSTART."""
+    resolver = resolver or TimezoneResolver()
+    fields: Dict[str, ICSProperty] = {}
+    for prop in properties:
+        fields.setdefault(prop.name, prop)
+    if "DTSTART" not in fields:
+        return None
+
+    begin, all_day = resolver.resolve(fields["DTSTART"].value, fields["DTSTART"].params)
+    if "DTEND" in fields:
+        end, _ = resolver.resolve(fields["DTEND"].value, fields["DTEND"].params)
+    elif "DURATION" in fields:
+        end = begin + parse_duration(fields["DURATION"].value)
+    else:
+        end = begin + timedelta(days=1) if all_day else begin
+
+    def text(name: str) -> Optional[str]:
+        return unescape_text(fields[name].value) if name in fields else None
+
+    recurrence_id = None
+    if "RECURRENCE-ID" in fields:
+        recurrence_id, _ = resolver.resolve(fields["RECURRENCE-ID"].value, fields["RECURRENCE-ID"].params)
+
+    return ICSEvent(
+        uid=fields["UID"].value if "UID" in fields else None,
+        name=text("SUMMARY"),
+        description=text("DESCRIPTION"),
+        begin=begin,
+        end=end,
+        all_day=all_day,
+        recurrence=recurrence_from_properties(properties, resolver),
+        recurrence_id=recurrence_id,
+    )
+
+
+def overridden_instants(events: Iterable[ICSEvent]) -> Dict[str, Set[datetime]]:
+    """UID -> instants of that series replaced by modified-instance (RECURRENCE-ID) events."""
+    overridden: Dict[str, Set[datetime]] = {}
+    for event in events:
+        if event.recurrence_id is not None and event.uid is not None:
+            overridden.setdefault(event.uid, set()).add(event.recurrence_id)
+    return overridden
+
+
+def iter_calendar_events(source: Union[str, Path, BinaryIO, TextIO]) -> Iterator[ICSEvent]:
+    """Stream ICSEvent records from an .ics path or open file handle, in file order."""
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            yield from iter_calendar_events(f)
+        return
+    resolver = TimezoneResolver()
+    for component in iter_component_trees(source, ["VEVENT", "VTIMEZONE"]):
+        if component.name == "VTIMEZONE":
+            resolver.add_vtimezone(component)
+            continue
+        try:
+            event = event_from_properties(component.properties, resolver)
+        except (ValueError, IndexError) as e:
+            print(f"[!] Skipping malformed VEVENT: {e}")
+            continue
+        if event is not None:
+            yield event
+
+
+def load_calendar_events(source: Union[str, Path, BinaryIO, TextIO]) -> List[ICSEvent]:
+    return list(iter_calendar_events(source))
@@ -0,0 +1,323 @@
+# modules/calendar_io/ics_timezones.py
+# TZID resolution for ICS date-times: embedded VTIMEZONE blocks or IANA zones, compiled into
+# per-year UTC transition tables that are cached and shared across files
+#
+# Local times follow RFC 5545: a time skipped by a forward transition uses the offset from
+# before the gap, and a repeated time resolves to its first occurrence.
+
+import bisect
+import json
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+UTC = timezone.utc
+WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+MAX_MEMOIZED = 100_000
+
+
+class Transition(NamedTuple):
+    at: datetime            # UTC instant (naive)
+    before: timedelta
+    after: timedelta
+
+
+@lru_cache(maxsize=None)
+def fixed_offset(offset: timedelta) -> tzinfo:
+    return UTC if not offset else timezone(offset)
+
+
+class TransitionTable:
+    """
+    Offset transitions for one zone, compiled lazily one year at a time by
+    `compile_year(year) -> (offset at the start of the year, transitions in the year)`.
+    Local -> offset lookups are memoised. `definition` is the serialised VTIMEZONE a
+    table was compiled from (None for IANA zones), so stored traces can rebuild it.
+    """
+
+    def __init__(self, name: str, compile_year: Callable[[int], Tuple[timedelta, List[Transition]]],
+                 definition: Optional[List[Dict]] = None):
+        self.name = name
+        self.definition = definition
+        self._compile_year = compile_year
+        self._years: Dict[int, Tuple[timedelta, List[Transition]]] = {}
+        self._offsets: Dict[datetime, timedelta] = {}
+        self._windows: Dict[int, Tuple[timedelta, List[Transition], List[datetime]]] = {}
+
+    def year(self, year: int) -> Tuple[timedelta, List[Transition]]:
+        if year not in self._years:
+            self._years[year] = self._compile_year(year)
+        return self._years[year]
+
+    def _window(self, year: int) -> Tuple[timedelta, List[Transition], List[datetime]]:
+        """Transitions from year-1 to year+1 and their wall times, for lookups in `year`."""
+        if year not in self._windows:
+            transitions = [t for y in (year - 1, year, year + 1) for t in self.year(y)[1]]
+            walls = [t.at + t.before for t in transitions]
+            self._windows[year] = (self.year(year - 1)[0], transitions, walls)
+        return self._windows[year]
+
+    def offset_for_local(self, local: datetime) -> timedelta:
+        """UTC offset in effect at a naive local wall time."""
+        cached = self._offsets.get(local)
+        if cached is not None:
+            return cached
+
+        offset, transitions, walls = self._window(local.year)
+        i = bisect.bisect_right(walls, local) - 1
+        if i >= 0:
+            transition = transitions[i]
+            gap = transition.after > transition.before and local < transition.at + transition.after
+            offset = transition.before if gap else transition.after
+
+        if len(self._offsets) >= MAX_MEMOIZED:
+            self._offsets.clear()
+        self._offsets[local] = offset
+        return offset
+
+    def localize(self, local: datetime) -> datetime:
+        """Attach the zone's fixed offset for this wall time."""
+        return local.replace(tzinfo=fixed_offset(self.offset_for_local(local)))
+
+    def to_utc(self, local: datetime) -> datetime:
+        return (local - self.offset_for_local(local)).replace(tzinfo=UTC)
+
+
+# --- IANA zones ---
+
+def _utc_offset(zone: tzinfo, instant: datetime) -> timedelta:
+    return instant.replace(tzinfo=UTC).astimezone(zone).utcoffset()
+
+
+def _compile_iana_year(zone: tzinfo, year: int) -> Tuple[timedelta, List[Transition]]:
+    """Probe the zone daily, then bisect to the minute wherever the offset changes."""
+    day = datetime(year, 1, 1)
+    start_offset = previous = _utc_offset(zone, day)
+    transitions = []
+    while day.year == year:
+        following = day + timedelta(days=1)
+        offset = _utc_offset(zone, following)
+        if offset != previous:
+            lo, hi = 0, 24 * 60
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if _utc_offset(zone, day + timedelta(minutes=mid)) == previous:
+                    lo = mid
+                else:
+                    hi = mid
+            at = day + timedelta(minutes=hi)
+            transitions.append(Transition(at, previous, offset))
+            previous = offset
+        day = following
+    return start_offset, transitions
+
+
+@lru_cache(maxsize=None)
+def iana_table(tzid: str) -> Optional[TransitionTable]:
+    """Shared table for an IANA zone name, or None if the name is unknown."""
+    try:
+        zone = ZoneInfo(tzid)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+    return TransitionTable(tzid, lambda year: _compile_iana_year(zone, year))
+
+
+# --- VTIMEZONE definitions ---
+
+def parse_utc_offset(value: str) -> timedelta:
+    """`-0500` / `+053000` -> timedelta."""
+    value = value.strip()
+    sign = -1 if value.startswith("-") else 1
+    digits = value.lstrip("+-")
+    hours, minutes = int(digits[0:2]), int(digits[2:4])
+    seconds = int(digits[4:6]) if len(digits) >= 6 else 0
+    return sign * timedelta(hours=hours, minutes=minutes, seconds=seconds)
+
+
+def parse_local(value: str) -> datetime:
+    value = value.strip().rstrip("Z")
+    if len(value) == 8:
+        return datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+    return datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]),
+                    int(value[9:11]), int(value[11:13]), int(value[13:15]))
+
+
+def nth_weekday(year: int, month: int, weekday: int, n: int) -> Optional[date]:
+    """n-th (1-based; negative counts from the end) weekday of a month."""
+    if n > 0:
+        first = date(year, month, 1)
+        day = first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    else:
+        last = (date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1))
+        day = last - timedelta(days=(last.weekday() - weekday) % 7 + 7 * (-n - 1))
+    return day if day.month == month else None
+
+
+class Observance(NamedTuple):
+    start: datetime                 # local wall time, in offset_from
+    offset_from: timedelta
+    offset_to: timedelta
+    rule: Dict[str, str]
+    rdates: List[datetime]
+
+    def onsets(self, year: int) -> List[datetime]:
+        """Local onset wall times falling in `year`."""
+        found = [d for d in self.rdates if d.year == year]
+        if self.start.year == year:
+            found.append(self.start)
+        if self.rule.get("FREQ") != "YEARLY" or year <= self.start.year:
+            return found
+        until = parse_local(self.rule["UNTIL"]) if "UNTIL" in self.rule else None
+        month = int(self.rule.get("BYMONTH", self.start.month))
+        onset_day = None
+        if "BYDAY" in self.rule:
+            byday = self.rule["BYDAY"].split(",")[0]
+            weekday = WEEKDAYS[byday[-2:]]
+            if byday[:-2]:
+                onset_day = nth_weekday(year, month, weekday, int(byday[:-2]))
+            elif "BYMONTHDAY" in self.rule:
+                days = [int(d) for d in self.rule["BYMONTHDAY"].split(",")]
+                onset_day = next((date(year, month, d) for d in days if date(year, month, d).weekday() == weekday), None)
+        elif "BYMONTHDAY" in self.rule:
+            onset_day = date(year, month, int(self.rule["BYMONTHDAY"].split(",")[0]))
+        else:
+            onset_day = date(year, month, self.start.day)
+        if onset_day is not None:
+            onset = datetime.combine(onset_day, self.start.time())
+            if until is None or onset - self.offset_from <= until:
+                found.append(onset)
+        return found
+
+    def to_dict(self) -> Dict:
+        return {
+            "start": self.start.isoformat(),
+            "offset_from": int(self.offset_from.total_seconds()),
+            "offset_to": int(self.offset_to.total_seconds()),
+            "rule": dict(sorted(self.rule.items())),
+            "rdates": [d.isoformat() for d in self.rdates],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Observance":
+        return cls(
+            start=datetime.fromisoformat(data["start"]),
+            offset_from=timedelta(seconds=data["offset_from"]),
+            offset_to=timedelta(seconds=data["offset_to"]),
+            rule=dict(data.get("rule", {})),
+            rdates=[datetime.fromisoformat(d) for d in data.get("rdates", [])],
+        )
+
+
+def _observance(component) -> Observance:
+    """STANDARD/DAYLIGHT ICSComponent -> Observance."""
+    props = {}
+    rdates: List[datetime] = []
+    for prop in component.properties:
+        if prop.name == "RDATE":
+            rdates.extend(parse_local(v) for v in prop.value.split(","))
+        else:
+            props.setdefault(prop.name, prop)
+    rule = {}
+    if "RRULE" in props:
+        rule = dict(part.split("=", 1) for part in props["RRULE"].value.split(";") if "=" in part)
+    return Observance(
+        start=parse_local(props["DTSTART"].value),
+        offset_from=parse_utc_offset(props["TZOFFSETFROM"].value),
+        offset_to=parse_utc_offset(props["TZOFFSETTO"].value),
+        rule={k.upper(): v for k, v in rule.items()},
+        rdates=rdates,
+    )
+
+
+def _compile_vtimezone_year(observances: List[Observance], year: int) -> Tuple[timedelta, List[Transition]]:
+    def utc_onsets(y: int) -> List[Transition]:
+        return sorted(
+            Transition(local - o.offset_from, o.offset_from, o.offset_to)
+            for o in observances for local in o.onsets(y)
+        )
+
+    # Offset at the start of the year: the last onset before it (rules are yearly,
+    # one-off observances may be older), else the earliest observance's TZOFFSETFROM
+    start_of_year = datetime(year, 1, 1)
+    earlier = [t for t in utc_onsets(year - 1) + utc_onsets(year) if t.at < start_of_year]
+    if not earlier:
+        earlier = sorted(
+            Transition(o.start - o.offset_from, o.offset_from, o.offset_to)
+            for o in observances if o.start - o.offset_from < start_of_year
+        )
+    if earlier:
+        start_offset = earlier[-1].after
+    else:
+        start_offset = min(observances, key=lambda o: o.start).offset_from
+    transitions = [t for t in utc_onsets(year) if t.at.year == year and t.at >= start_of_year]
+    return start_offset, transitions
+
+
+_vtimezone_tables: Dict[Tuple[str, str], TransitionTable] = {}
+
+
+def definition_table(tzid: str, definition: List[Dict]) -> TransitionTable:
+    """
+    Table for a serialised VTIMEZONE (Observance.to_dict() list). Identical definitions,
+    from other files or from stored traces, reuse the same compiled table.
+    """
+    fingerprint = (tzid, json.dumps(definition, sort_keys=True))
+    table = _vtimezone_tables.get(fingerprint)
+    if table is None:
+        observances = [Observance.from_dict(d) for d in definition]
+        table = TransitionTable(tzid, lambda year: _compile_vtimezone_year(observances, year), definition)
+        _vtimezone_tables[fingerprint] = table
+    return table
+
+
+def vtimezone_table(component) -> Tuple[str, TransitionTable]:
+    """(TZID, table) for a VTIMEZONE ICSComponent."""
+    tzid = next(p.value.strip() for p in component.properties if p.name == "TZID")
+    definition = [_observance(child).to_dict() for child in component.children
+                  if child.name in ("STANDARD", "DAYLIGHT")]
+    return tzid, definition_table(tzid, definition)
+
+
+# --- Resolution ---
+
+class TimezoneResolver:
+    """
+    Resolves DTSTART/DTEND-style values for one calendar. TZIDs defined by a VTIMEZONE
+    in the calendar take precedence over IANA names; unknown TZIDs fall back to UTC.
+    Floating times are treated as UTC and DATE values as midnight UTC.
+    """
+
+    def __init__(self):
+        self.defined: Dict[str, TransitionTable] = {}
+        self._warned = set()
+
+    def add_vtimezone(self, component) -> None:
+        try:
+            tzid, table = vtimezone_table(component)
+        except (StopIteration, KeyError, ValueError, IndexError) as e:
+            print(f"[!] Ignoring malformed VTIMEZONE: {e}")
+            return
+        self.defined[tzid] = table
+
+    def table(self, tzid: str) -> Optional[TransitionTable]:
+        table = self.defined.get(tzid) or iana_table(tzid)
+        if table is None and tzid not in self._warned:
+            self._warned.add(tzid)
+            print(f"[!] Unknown TZID {tzid!r}, treating as UTC")
+        return table
+
+    def resolve(self, value: str, params: Dict[str, str]) -> Tuple[datetime, bool]:
+        """(aware datetime carrying the local UTC offset, is_all_day)."""
+        value = value.strip()
+        if params.get("VALUE") == "DATE" or len(value) == 8:
+            return parse_local(value).replace(tzinfo=UTC), True
+        local = parse_local(value)
+        if value.endswith("Z") or "TZID" not in params:
+            return local.replace(tzinfo=UTC), False
+        table = self.table(params["TZID"].strip())
+        return (table.localize(local) if table else local.replace(tzinfo=UTC)), False
+
+    def to_utc(self, value: str, params: Dict[str, str]) -> Tuple[datetime, bool]:
+        resolved, all_day = self.resolve(value, params)
+        return resolved.astimezone(UTC), all_day
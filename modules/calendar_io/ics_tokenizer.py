@@ -0,0 +1,279 @@
+# modules/calendar_io/ics_tokenizer.py
+# Streaming RFC 5545 tokenizer: unfolds content lines, parses parameters, decodes TEXT escapes
+#
+# Files are read line by line, so memory use is bounded by the largest single VEVENT,
+# not by the size of the calendar export.
+
+import re
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple, Union
+
+from modules.calendar_io.ics_timezones import TimezoneResolver
+from modules.calendar_io.recurrence import expand_traces, recurrence_from_properties
+
+# Properties whose values are TEXT and therefore carry backslash escapes
+TEXT_PROPERTIES = {"SUMMARY", "DESCRIPTION", "LOCATION", "COMMENT", "CATEGORIES", "RESOURCES", "CONTACT"}
+
+DURATION_PATTERN = re.compile(
+    r"^(?P<sign>[+-])?P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?"
+    r"(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+)
+
+# VEVENT property -> memory trace field
+TRACE_FIELDS = {
+    "SUMMARY": "title",
+    "DESCRIPTION": "content",
+    "UID": "id",
+    "LOCATION": "location",
+}
+
+
+class ICSProperty(NamedTuple):
+    name: str
+    params: Dict[str, str]
+    value: str
+
+
+# --- Tokenizing ---
+
+def unfold_lines(lines: Iterable[Union[str, bytes]]) -> Iterator[str]:
+    """
+    Join folded continuation lines (those starting with a space or tab) onto the
+    previous line. Byte lines are joined before decoding, so a fold that splits a
+    multi-byte UTF-8 character is reassembled correctly.
+    """
+    pending = None
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.rstrip(b"\r\n")
+            if line[:1] in (b" ", b"\t") and pending is not None:
+                pending += line[1:]
+                continue
+        else:
+            line = line.rstrip("\r\n")
+            if line[:1] in (" ", "\t") and pending is not None:
+                pending += line[1:]
+                continue
+        if pending:
+            yield pending.decode("utf-8", errors="replace") if isinstance(pending, bytes) else pending
+        pending = line
+    if pending:
+        yield pending.decode("utf-8", errors="replace") if isinstance(pending, bytes) else pending
+
+
+def parse_property(line: str) -> ICSProperty:
+    """
+    Split `NAME;PARAM=a;PARAM2="b:c":value` into name, parameters and raw value.
+    Colons and semicolons inside quoted parameter values are respected. Multi-valued
+    parameters keep their comma-separated form (with quotes removed).
+    """
+    params: Dict[str, str] = {}
+    i, n = 0, len(line)
+    while i < n and line[i] not in ";:":
+        i += 1
+    name = line[:i].strip().upper()
+
+    while i < n and line[i] == ";":
+        i += 1
+        start = i
+        while i < n and line[i] not in "=;:":
+            i += 1
+        key = line[start:i].strip().upper()
+        values = []
+        if i < n and line[i] == "=":
+            i += 1
+            while True:
+                if i < n and line[i] == '"':
+                    end = line.find('"', i + 1)
+                    end = n if end == -1 else end
+                    values.append(line[i + 1:end])
+                    i = end + 1
+                else:
+                    start = i
+                    while i < n and line[i] not in ",;:":
+                        i += 1
+                    values.append(line[start:i])
+                if i < n and line[i] == ",":
+                    i += 1
+                    continue
+                break
+        params[key] = ",".join(values)
+
+    value = line[i + 1:] if i < n and line[i] == ":" else ""
+    return ICSProperty(name, params, value)
+
+
+def unescape_text(value: str) -> str:
+    """Decode TEXT escapes: \\n or \\N (newline), \\, \\; and \\\\."""
+    if "\\" not in value:
+        return value
+    out = []
+    i, n = 0, len(value)
+    while i < n:
+        char = value[i]
+        if char == "\\" and i + 1 < n:
+            nxt = value[i + 1]
+            out.append("\n" if nxt in "nN" else nxt)
+            i += 2
+        else:
+            out.append(char)
+            i += 1
+    return "".join(out)
+
+
+class ICSComponent(NamedTuple):
+    name: str
+    properties: List[ICSProperty]
+    children: List["ICSComponent"]
+
+
+def parse_duration(value: str) -> timedelta:
+    """RFC 5545 DURATION value (e.g. `PT1H30M`, `-P1D`) -> timedelta."""
+    match = DURATION_PATTERN.match(value.strip())
+    if not match:
+        raise ValueError(f"Invalid DURATION: {value}")
+    parts = {k: int(v) for k, v in match.groupdict().items() if v and k != "sign"}
+    duration = timedelta(**parts)
+    return -duration if match.group("sign") == "-" else duration
+
+
+def iter_component_trees(lines: Iterable[Union[str, bytes]], names: Iterable[str]) -> Iterator[ICSComponent]:
+    """
+    Yield each outermost component whose name is in `names` (e.g. VEVENT, VTIMEZONE)
+    together with its nested components, one at a time.
+    """
+    names = set(names)
+    stack: List[ICSComponent] = []
+    for line in unfold_lines(lines):
+        prop = parse_property(line)
+        if prop.name == "BEGIN":
+            name = prop.value.strip().upper()
+            if stack or name in names:
+                stack.append(ICSComponent(name, [], []))
+        elif prop.name == "END":
+            if stack:
+                done = stack.pop()
+                if stack:
+                    stack[-1].children.append(done)
+                else:
+                    yield done
+        elif stack:
+            stack[-1].properties.append(prop)
+
+
+def iter_components(lines: Iterable[Union[str, bytes]], component: str = "VEVENT") -> Iterator[List[ICSProperty]]:
+    """
+    Yield the properties of each `component` block, one block at a time. Properties
+    of nested components (e.g. a VALARM inside a VEVENT) are not included.
+    """
+    for tree in iter_component_trees(lines, [component]):
+        yield tree.properties
+
+
+# --- Event -> trace ---
+
+def format_utc(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).replace(tzinfo=None).isoformat() + "Z"
+
+
+def parse_ics_datetime(dt_str: str, params: Optional[Dict[str, str]] = None,
+                       resolver: Optional[TimezoneResolver] = None) -> str:
+    """DATE / DATE-TIME value (UTC, floating, TZID or VALUE=DATE) -> ISO 8601 UTC string."""
+    resolver = resolver or TimezoneResolver()
+    return format_utc(resolver.to_utc(dt_str, params or {})[0])
+
+
+def event_to_trace(properties: Iterable[ICSProperty], resolver: Optional[TimezoneResolver] = None) -> Dict:
+    """
+    Build a calendar_event memory trace from one VEVENT's properties. Times are
+    converted to UTC; `resolver` supplies the calendar's VTIMEZONE definitions.
+    Recurring events keep their rules under `recurrence` (see recurrence.expand_trace).
+    Modified instances (RECURRENCE-ID) get the id `UID#<UTC instant>`, like expanded occurrences.
+    """
+    resolver = resolver or TimezoneResolver()
+    properties = list(properties)
+    raw = {}
+    start = end = duration = recurrence_id = None
+    all_day = False
+    for prop in properties:
+        if prop.name in TRACE_FIELDS:
+            value = unescape_text(prop.value) if prop.name in TEXT_PROPERTIES else prop.value
+            raw[TRACE_FIELDS[prop.name]] = value.strip()
+        elif prop.name in ("DTSTART", "DTEND"):
+            try:
+                parsed, is_date = resolver.to_utc(prop.value, prop.params)
+            except (ValueError, IndexError):
+                print(f"[!] Unsupported {prop.name} value: {prop.value}")
+                continue
+            if prop.name == "DTSTART":
+                start, all_day = parsed, is_date
+            else:
+                end = parsed
+        elif prop.name == "DURATION":
+            duration = prop.value
+        elif prop.name == "RECURRENCE-ID":
+            try:
+                recurrence_id = resolver.to_utc(prop.value, prop.params)[0]
+            except (ValueError, IndexError):
+                print(f"[!] Unsupported RECURRENCE-ID value: {prop.value}")
+
+    if start is not None:
+        raw["timestamp"] = format_utc(start)
+        if end is None and duration is not None:
+            try:
+                end = start + parse_duration(duration)
+            except ValueError as e:
+                print(f"[!] {e}")
+        elif end is None and all_day:
+            end = start + timedelta(days=1)
+    if end is not None:
+        raw["end"] = format_utc(end)
+    # A modified instance shares its series' UID; give it the id its occurrence would get
+    if recurrence_id is not None:
+        raw["recurrence_id"] = format_utc(recurrence_id)
+        if "id" in raw:
+            raw["id"] = f"{raw['id']}#{recurrence_id.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}"
+    if start is not None and end is not None:
+        raw["duration_minutes"] = int((end - start).total_seconds() // 60)
+
+    try:
+        recurrence = recurrence_from_properties(properties, resolver)
+    except (ValueError, IndexError) as e:
+        print(f"[!] Ignoring unsupported recurrence: {e}")
+        recurrence = None
+    if recurrence is not None:
+        raw["recurrence"] = recurrence.to_dict()
+
+    raw["type"] = "calendar_event"
+    return raw
+
+
+def iter_ics_events(source: Union[str, Path, BinaryIO, TextIO, Iterable[Union[str, bytes]]],
+                    window: Optional[Tuple[datetime, datetime]] = None) -> Iterator[Dict]:
+    """
+    Stream memory traces from an .ics path, open file handle or iterable of lines, one
+    VEVENT at a time. VTIMEZONE blocks seen along the way are used for later events.
+    With a (start, end) `window`, recurring events are replaced by their occurrences
+    in that window, minus instances moved by RECURRENCE-ID overrides; they come after
+    the other events, since an override may follow its series in the file. Without a
+    window they are yielded once, carrying their `recurrence`.
+    """
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            yield from iter_ics_events(f, window)
+        return
+    resolver = TimezoneResolver()
+    traces = _iter_traces(source, resolver)
+    if window is None:
+        yield from traces
+    else:
+        yield from expand_traces(traces, window, resolver)
+
+
+def _iter_traces(lines: Iterable[Union[str, bytes]], resolver: TimezoneResolver) -> Iterator[Dict]:
+    for component in iter_component_trees(lines, ["VEVENT", "VTIMEZONE"]):
+        if component.name == "VTIMEZONE":
+            resolver.add_vtimezone(component)
+            continue
+        yield event_to_trace(component.properties, resolver)
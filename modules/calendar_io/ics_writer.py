@@ -0,0 +1,151 @@
+# modules/calendar_io/ics_writer.py
+# Streaming RFC 5545 writer: CRLF line endings, 75-octet folding and TEXT escaping
+#
+# The VCALENDAR header goes out when the writer opens, each VEVENT as soon as it is
+# written and the footer on close, so exporting a generator of traces needs memory
+# for one event at a time. Targets can be a path, a binary or text stream, or a socket.
+
+import io
+import socket
+import textwrap
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, Optional, TextIO, Tuple, Union
+
+from modules.calendar_io.ics_tokenizer import TEXT_PROPERTIES
+
+CRLF = b"\r\n"
+MAX_LINE_OCTETS = 75
+DEFAULT_PRODID = "-//CalendarMemorySystem//EN"
+
+Property = Tuple[str, str]      # (name, value); TEXT values unescaped
+
+
+def escape_text(value: str) -> str:
+    """Encode a TEXT value: backslash, semicolon, comma and newlines."""
+    value = value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+    return value.replace("\r\n", "\\n").replace("\r", "\\n").replace("\n", "\\n")
+
+
+def quote_param(value: str) -> str:
+    return f'"{value}"' if any(c in value for c in ":;,") else value
+
+
+def fold_line(line: str) -> bytes:
+    """
+    One content line as UTF-8 with CRLF, folded so no physical line exceeds 75 octets
+    (continuation lines start with a space). Multi-byte characters are never split.
+    """
+    data = line.encode("utf-8")
+    if len(data) <= MAX_LINE_OCTETS:
+        return data + CRLF
+    parts = []
+    start, limit = 0, MAX_LINE_OCTETS
+    while len(data) - start > limit:
+        end = start + limit
+        while (data[end] & 0xC0) == 0x80:   # UTF-8 continuation byte
+            end -= 1
+        parts.append(data[start:end])
+        start, limit = end, MAX_LINE_OCTETS - 1
+    parts.append(data[start:])
+    return b"\r\n ".join(parts) + CRLF
+
+
+def content_line(name: str, value: str, params: Optional[Dict[str, str]] = None) -> bytes:
+    """Escaped (for TEXT properties) and folded `NAME;PARAM=...:value` line."""
+    if name in TEXT_PROPERTIES:
+        value = escape_text(value)
+    else:
+        value = value.replace("\r", "").replace("\n", "")
+    head = name + "".join(f";{key}={quote_param(v)}" for key, v in (params or {}).items())
+    return fold_line(f"{head}:{value}")
+
+
+def render_component(name: str, properties: Iterable[Property]) -> bytes:
+    lines = [fold_line(f"BEGIN:{name}")]
+    lines.extend(content_line(key, value) for key, value in properties)
+    lines.append(fold_line(f"END:{name}"))
+    return b"".join(lines)
+
+
+class ICSWriter:
+    """
+    Writes one VCALENDAR incrementally:
+
+        with ICSWriter(path) as writer:
+            for properties in events:
+                writer.write_event(properties)
+
+    A target path is written to `<path>.tmp` and renamed into place on a clean close;
+    if the block raises, the temporary file is removed and streams get no footer.
+    """
+
+    def __init__(self, target: Union[str, Path, BinaryIO, TextIO, socket.socket],
+                 prodid: str = DEFAULT_PRODID, properties: Iterable[Property] = ()):
+        self.count = 0
+        self._path = None
+        self._owned = None
+        if isinstance(target, (str, Path)):
+            self._path = Path(target)
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._tmp = self._path.with_name(self._path.name + ".tmp")
+            self._owned = open(self._tmp, "wb")
+            target = self._owned
+        elif isinstance(target, socket.socket):
+            self._owned = target.makefile("wb")
+            target = self._owned
+        self._text = isinstance(target, io.TextIOBase)
+        self._stream = target
+        header = [fold_line("BEGIN:VCALENDAR"), fold_line("VERSION:2.0"), fold_line(f"PRODID:{prodid}")]
+        header.extend(content_line(key, value) for key, value in properties)
+        self._write(b"".join(header))
+
+    def _write(self, data: bytes) -> None:
+        self._stream.write(data.decode("utf-8") if self._text else data)
+
+    def write_event(self, properties: Iterable[Property], name: str = "VEVENT") -> None:
+        self._write(render_component(name, properties))
+        self.count += 1
+
+    def write_rendered(self, block: bytes) -> None:
+        """Write a component already produced by render_component."""
+        self._write(block)
+        self.count += 1
+
+    def write_raw(self, block: str) -> None:
+        """Write a pre-rendered component, normalising indentation, line endings and folding."""
+        lines = [line for line in textwrap.dedent(block).strip().splitlines() if line.strip()]
+        if not lines:
+            return
+        self._write(b"".join(line.encode("utf-8") + CRLF if line[0] in " \t" else fold_line(line)
+                             for line in lines))
+        self.count += 1
+
+    def close(self, discard: bool = False) -> None:
+        if self._stream is None:
+            return
+        if not discard:
+            self._write(fold_line("END:VCALENDAR"))
+        self._stream.flush()
+        if self._owned is not None:
+            self._owned.close()
+        if self._path is not None:
+            if discard:
+                self._tmp.unlink()
+            else:
+                self._tmp.replace(self._path)
+        self._stream = None
+
+    def __enter__(self) -> "ICSWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close(discard=exc_type is not None)
+
+
+def write_calendar(target: Union[str, Path, BinaryIO, TextIO, socket.socket],
+                   events: Iterable[List[Property]], prodid: str = DEFAULT_PRODID) -> int:
+    """Stream `events` (property lists) into one calendar; returns the number written."""
+    with ICSWriter(target, prodid) as writer:
+        for properties in events:
+            writer.write_event(properties)
+    return writer.count
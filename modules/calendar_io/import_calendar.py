@@ -1,69 +1,192 @@
 from datetime import datetime
-from typing import List, Dict
-import re
+from itertools import islice
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 import json
 from pathlib import Path
-from chronologue_modules.schema import validate_memory_trace  # Adjust as needed
+from modules.core.trace_validator import valid_mask, validate_traces
+from modules.calendar_io.import_manifest import CalendarDelta, ImportManifest
+from modules.calendar_io.ics_tokenizer import event_to_trace, iter_ics_events, parse_property, unfold_lines
+from modules.calendar_io.parallel_import import DEFAULT_CHUNK_BYTES, import_ics_files
+from modules.core.trace_log import COMPACT_RATIO, TraceLog
 
-def parse_ics_datetime(dt_str: str) -> str:
-    return datetime.strptime(dt_str.strip(), "%Y%m%dT%H%M%SZ").isoformat() + "Z"
+VALIDATION_BATCH = 4096
 
 def parse_ics_event(ics_text: str) -> Dict:
-    raw = {}
-
-    for line in ics_text.splitlines():
-        if line.startswith("SUMMARY:"):
-            raw["title"] = line[len("SUMMARY:"):].strip()
-        elif line.startswith("DESCRIPTION:"):
-            raw["content"] = line[len("DESCRIPTION:"):].strip()
-        elif line.startswith("DTSTART:"):
-            raw["timestamp"] = parse_ics_datetime(line[len("DTSTART:"):])
-        elif line.startswith("DTEND:"):
-            raw["end"] = parse_ics_datetime(line[len("DTEND:"):])
-        elif line.startswith("UID:"):
-            raw["id"] = line[len("UID:"):].strip()
-        elif line.startswith("LOCATION:"):
-            raw["location"] = line[len("LOCATION:"):].strip()
-
-    if "timestamp" in raw and "end" in raw:
-        try:
-            start = datetime.fromisoformat(raw["timestamp"].replace("Z", "+00:00"))
-            end = datetime.fromisoformat(raw["end"].replace("Z", "+00:00"))
-            raw["duration_minutes"] = int((end - start).total_seconds() // 60)
-        except Exception as e:
-            print(f"[!] Failed to infer duration: {e}")
-
-    raw["type"] = "calendar_event"
-    return {k: v for k, v in raw.items() if v is not None}
-
-def import_ics(filepath: str) -> List[Dict]:
+    """Parse the body of one VEVENT (folded lines, parameters and escapes allowed)."""
+    return event_to_trace(parse_property(line) for line in unfold_lines(ics_text.splitlines()))
+
+def iter_import_ics(filepath: str, window: Optional[Tuple[datetime, datetime]] = None) -> Iterator[Dict]:
+    """
+    Stream valid traces from an .ics file without reading it into memory. With a
+    (start, end) `window`, recurring events are expanded into their occurrences.
+    """
     print(f"→ Reading iCalendar file: {filepath}")
-    with open(filepath, "r") as f:
-        content = f.read()
-
-    events = []
-    for match in re.finditer(r"BEGIN:VEVENT(.*?)END:VEVENT", content, re.DOTALL):
-        event_block = match.group(1)
-        trace = parse_ics_event(event_block)
-        if validate_memory_trace(trace):
-            events.append(trace)
-            print(f"→ Parsed: {trace.get('title', 'Untitled')}")
-        else:
-            print(f"[!] Invalid event skipped: {trace.get('id', 'unknown')}")
-    return events
-
-def save_events_to_json(events: List[Dict], output_path: str) -> None:
+    events = iter_ics_events(filepath, window)
+    parsed = invalid = 0
+    while True:
+        batch = list(islice(events, VALIDATION_BATCH))
+        if not batch:
+            break
+        report = validate_traces(batch)
+        parsed += len(batch)
+        invalid += report.invalid_count
+        yield from report.valid_traces(batch)
+    print(f"→ Parsed {parsed} event(s) from {filepath}")
+    if invalid:
+        print(f"[!] Skipped {invalid} invalid event(s)")
+
+def import_ics(filepath: str, window: Optional[Tuple[datetime, datetime]] = None) -> List[Dict]:
+    return list(iter_import_ics(filepath, window))
+
+def save_events_to_json(events: Iterable[Dict], output_path: str) -> None:
+    """Write {"memory": [...]} incrementally, so `events` may be a generator."""
+    count = 0
     with open(output_path, 'w') as f:
-        json.dump({"memory": events}, f, indent=4)
-    print(f"→ Saved {len(events)} event(s) to {output_path}")
+        f.write('{\n    "memory": [')
+        for event in events:
+            body = json.dumps(event, indent=4).replace("\n", "\n        ")
+            f.write(("," if count else "") + "\n        " + body)
+            count += 1
+        f.write("\n    ]\n}" if count else "]\n}")
+    print(f"→ Saved {count} event(s) to {output_path}")
+
+def save_events_to_log(events: Iterable[Dict], log_path: str) -> None:
+    """Append events to a JSONL trace log; re-imported UIDs supersede their old version."""
+    log = TraceLog(log_path)
+    skipped = 0
+
+    def with_id():
+        nonlocal skipped
+        for event in events:
+            if "id" in event:
+                yield event
+            else:
+                skipped += 1
+
+    appended = len(log.extend(with_id()))
+    if skipped:
+        print(f"[!] Skipping {skipped} event(s) without a UID")
+    print(f"→ Appended {appended} event(s) to {log_path}")
+    # Re-imports supersede rather than overwrite, so reclaim the old versions now and then
+    if log.compact(min_superseded_ratio=COMPACT_RATIO):
+        print(f"→ Compacted {log_path} to {len(log)} trace(s)")
+
+def save_events(events: Iterable[Dict], output_dir: Path, stem: str, output_format: str = "json") -> None:
+    if output_format == "jsonl":
+        save_events_to_log(events, output_dir / (stem + ".jsonl"))
+    else:
+        save_events_to_json(events, output_dir / (stem + ".json"))
+
+def import_ics_from_directory(input_dir: Path, output_dir: Path, output_format: str = "json",
+                              workers: Optional[int] = 1, chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+                              window: Optional[Tuple[datetime, datetime]] = None) -> Dict[str, Dict]:
+    """
+    Import every .ics file in `input_dir`. With `workers` other than 1 (None = one per
+    core) files are parsed on a process pool, large files split at VEVENT boundaries.
+    Files are written in sorted order; a file that fails is reported and skipped.
+    `window` expands recurring events as in iter_import_ics.
+    Returns {"imported": {name: count}, "failed": {name: error}}.
+    """
+    report = {"imported": {}, "failed": {}}
+    ics_files = sorted(Path(input_dir).glob("*.ics"))
+
+    if workers == 1:
+        for ics_file in ics_files:
+            try:
+                events = import_ics(str(ics_file), window)
+            except Exception as e:
+                print(f"[!] Failed to import {ics_file.name}: {e}")
+                report["failed"][ics_file.name] = f"{type(e).__name__}: {e}"
+                continue
+            save_events(events, output_dir, ics_file.stem, output_format)
+            report["imported"][ics_file.name] = len(events)
+        return report
+
+    for result in import_ics_files(ics_files, workers, chunk_bytes, validate_batch=valid_mask, window=window):
+        if result.error:
+            print(f"[!] Failed to import {result.path.name}: {result.error}")
+            report["failed"][result.path.name] = result.error
+            continue
+        if result.invalid:
+            print(f"[!] {result.path.name}: skipped {result.invalid} invalid event(s)")
+        save_events(result.traces, output_dir, result.path.stem, output_format)
+        report["imported"][result.path.name] = len(result.traces)
+    print(f"[✓] Imported {len(report['imported'])} file(s), {len(report['failed'])} failed")
+    return report
+
+def apply_delta(delta: CalendarDelta, removed_ids: List[str], output_dir: Path, output_format: str = "json") -> int:
+    """
+    Write one file's delta: changed traces are appended to (jsonl) or merged into (json)
+    the existing output and removed ids are dropped. Returns the number of traces written.
+    """
+    stem = Path(delta.name).stem
+    traces = validate_traces(delta.traces).valid_traces(delta.traces)
+    if len(traces) < len(delta.traces):
+        print(f"[!] {delta.name}: skipped {len(delta.traces) - len(traces)} invalid event(s)")
+
+    if output_format == "jsonl":
+        log = TraceLog(output_dir / (stem + ".jsonl"))
+        log.remove(removed_ids)
+        written = len(log.extend(trace for trace in traces if "id" in trace))
+        log.compact(min_superseded_ratio=COMPACT_RATIO)
+        return written
+
+    output_path = output_dir / (stem + ".json")
+    existing = []
+    if output_path.exists():
+        with open(output_path, "r") as f:
+            existing = json.load(f).get("memory", [])
+    replaced = {trace["id"] for trace in traces if "id" in trace} | set(removed_ids)
+    kept = [trace for trace in existing if trace.get("id") not in replaced]
+    save_events_to_json(kept + traces, output_path)
+    return len(traces)
+
+def import_ics_incremental(input_dir: Path, output_dir: Path, output_format: str = "jsonl",
+                           manifest_path: Optional[Path] = None) -> Dict[str, Dict]:
+    """
+    Re-import `input_dir`, converting and writing only what changed since the last run.
+    Files with an unchanged checksum are skipped, and within changed files so are
+    VEVENTs whose content hash (DTSTAMP excluded) is unchanged or whose SEQUENCE went
+    backwards. The manifest defaults to `<output_dir>/import_manifest.json`.
+    Recurring events are stored once with their rules (no window expansion).
+    Returns {"added"|"changed"|"removed"|"stale": {name: [keys]}, "unchanged": [names], "failed": {name: error}}.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = ImportManifest(manifest_path or output_dir / "import_manifest.json")
+    report = {"added": {}, "changed": {}, "removed": {}, "stale": {}, "unchanged": [], "failed": {}}
+    ics_files = sorted(Path(input_dir).glob("*.ics"))
+    present = {path.name for path in ics_files}
+
+    def scans():
+        for ics_file in ics_files:
+            try:
+                yield manifest.scan(ics_file)
+            except Exception as e:
+                print(f"[!] Failed to import {ics_file.name}: {e}")
+                report["failed"][ics_file.name] = f"{type(e).__name__}: {e}"
+        for name in sorted(set(manifest.files) - present):
+            yield manifest.missing(name)
 
-def import_ics_from_directory(input_dir: Path, output_dir: Path) -> None:
-    for ics_file in input_dir.glob("*.ics"):
-        events = import_ics(str(ics_file))
-        output_path = output_dir / (ics_file.stem + ".json")
-        save_events_to_json(events, output_path)
+    for delta in scans():
+        if delta.unchanged_file:
+            report["unchanged"].append(delta.name)
+            manifest.commit(delta)
+            continue
+        written = apply_delta(delta, manifest.removed_ids(delta), output_dir, output_format)
+        manifest.commit(delta)
+        manifest.save()
+        for kind in ("added", "changed", "removed", "stale"):
+            keys = getattr(delta, kind)
+            if keys:
+                report[kind][delta.name] = keys
+        print(f"→ {delta.name}: {len(delta.added)} added, {len(delta.changed)} changed, "
+              f"{len(delta.removed)} removed, {written} written")
+    manifest.save()
+    print(f"[✓] {len(report['unchanged'])} file(s) unchanged, {len(report['failed'])} failed")
+    return report
 
 if __name__ == "__main__":
     input_dir = Path("/Users/derekrosenzweig/Documents/GitHub/chronologue/data/calendar/raw")
     output_dir = Path("/Users/derekrosenzweig/Documents/GitHub/chronologue/data/calendar/processed")
-    import_ics_from_directory(input_dir, output_dir)
+    import_ics_from_directory(input_dir, output_dir, workers=None)
@@ -0,0 +1,169 @@
+# modules/calendar_io/import_manifest.py
+# Manifest for incremental ICS re-imports: file checksums plus per-UID content hashes
+#
+# A file whose size, mtime or SHA-256 is unchanged is not parsed at all. In a changed
+# file, VEVENTs are hashed before they are converted, so only added or changed events
+# are turned into traces (and validated, and written) again.
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Union
+
+from modules.calendar_io.ics_timezones import TimezoneResolver
+from modules.calendar_io.ics_tokenizer import ICSComponent, event_to_trace, iter_component_trees
+
+# Properties that change on every export without the event itself changing
+VOLATILE_PROPERTIES = {"DTSTAMP"}
+
+
+def file_sha256(path: Union[str, Path]) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _feed(digest, component: ICSComponent) -> None:
+    digest.update(f"BEGIN:{component.name}\n".encode("utf-8"))
+    for prop in component.properties:
+        if prop.name in VOLATILE_PROPERTIES:
+            continue
+        params = ";".join(f"{k}={v}" for k, v in sorted(prop.params.items()))
+        digest.update(f"{prop.name};{params}:{prop.value}\n".encode("utf-8"))
+    for child in component.children:
+        _feed(digest, child)
+    digest.update(f"END:{component.name}\n".encode("utf-8"))
+
+
+def event_hash(component: ICSComponent, context: str = "") -> str:
+    """
+    Content hash of a VEVENT (including nested VALARMs), ignoring DTSTAMP. `context`
+    is mixed in so that events re-hash when the VTIMEZONEs they depend on change.
+    """
+    digest = hashlib.sha256(context.encode("utf-8"))
+    _feed(digest, component)
+    return digest.hexdigest()
+
+
+def event_key(component: ICSComponent, digest: str) -> str:
+    """UID, plus RECURRENCE-ID for modified instances; content hash for events without a UID."""
+    values = {p.name: p.value.strip() for p in component.properties if p.name in ("UID", "RECURRENCE-ID")}
+    if "UID" not in values:
+        return f"sha256:{digest}"
+    if "RECURRENCE-ID" in values:
+        return f"{values['UID']}#{values['RECURRENCE-ID']}"
+    return values["UID"]
+
+
+def _sequence(component: ICSComponent) -> int:
+    for prop in component.properties:
+        if prop.name == "SEQUENCE":
+            try:
+                return int(prop.value)
+            except ValueError:
+                return 0
+    return 0
+
+
+def _last_modified(component: ICSComponent) -> Optional[str]:
+    return next((p.value.strip() for p in component.properties if p.name == "LAST-MODIFIED"), None)
+
+
+class CalendarDelta(NamedTuple):
+    name: str
+    unchanged_file: bool
+    added: List[str]
+    changed: List[str]
+    removed: List[str]
+    stale: List[str]          # content differs but SEQUENCE went backwards: kept as is
+    traces: List[Dict]        # traces for added and changed events only
+    checksum: Dict
+    events: Dict[str, Dict]   # manifest entries for the file after this import
+
+
+class ImportManifest:
+    """
+    JSON manifest, one entry per imported file:
+    `{"files": {name: {"size", "mtime_ns", "sha256", "events": {key: {"hash", "sequence", "last_modified", "id"}}}}}`
+    Event keys are the UID, or `UID#RECURRENCE-ID` for modified instances.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.files: Dict[str, Dict] = {}
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                self.files = json.load(f).get("files", {})
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"files": self.files}, f)
+        os.replace(tmp, self.path)
+
+    def scan(self, path: Union[str, Path]) -> CalendarDelta:
+        """Compare one .ics file against its manifest entry without changing the manifest."""
+        path = Path(path)
+        previous = self.files.get(path.name, {})
+        old_events = previous.get("events", {})
+        stat = path.stat()
+        checksum = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+        if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+            return CalendarDelta(path.name, True, [], [], [], [], [], {**checksum, "sha256": previous["sha256"]}, old_events)
+        checksum["sha256"] = file_sha256(path)
+        if previous.get("sha256") == checksum["sha256"]:
+            return CalendarDelta(path.name, True, [], [], [], [], [], checksum, old_events)
+
+        added, changed, stale, traces = [], [], [], []
+        events: Dict[str, Dict] = {}
+        resolver = TimezoneResolver()
+        timezones = hashlib.sha256()
+        with open(path, "rb") as f:
+            for component in iter_component_trees(f, ["VEVENT", "VTIMEZONE"]):
+                if component.name == "VTIMEZONE":
+                    resolver.add_vtimezone(component)
+                    _feed(timezones, component)
+                    continue
+                digest = event_hash(component, timezones.hexdigest())
+                key = event_key(component, digest)
+                entry = {"hash": digest, "sequence": _sequence(component), "last_modified": _last_modified(component)}
+                old = old_events.get(key)
+                if old is not None and old["hash"] == digest:
+                    events[key] = old
+                    continue
+                if old is not None and entry["sequence"] < old.get("sequence", 0):
+                    stale.append(key)
+                    events[key] = old
+                    continue
+                trace = event_to_trace(component.properties, resolver)
+                entry["id"] = trace.get("id")
+                (changed if old is not None else added).append(key)
+                events[key] = entry
+                traces.append(trace)
+
+        removed = [key for key in old_events if key not in events]
+        return CalendarDelta(path.name, False, added, changed, removed, stale, traces, checksum, events)
+
+    def missing(self, name: str) -> CalendarDelta:
+        """Delta for a manifest file that no longer exists: every event it held is removed."""
+        old_events = self.files.get(name, {}).get("events", {})
+        return CalendarDelta(name, False, [], [], list(old_events), [], [], {}, {})
+
+    def removed_ids(self, delta: CalendarDelta) -> List[str]:
+        """Trace ids to delete for `delta.removed`, skipping ids still held by a remaining event."""
+        old_events = self.files.get(delta.name, {}).get("events", {})
+        kept = {entry.get("id") for entry in delta.events.values()}
+        ids = (old_events[key].get("id") for key in delta.removed)
+        return sorted({trace_id for trace_id in ids if trace_id and trace_id not in kept})
+
+    def commit(self, delta: CalendarDelta) -> None:
+        """Record `delta` as imported (call save() to persist)."""
+        if delta.checksum:
+            self.files[delta.name] = {**delta.checksum, "events": delta.events}
+        else:
+            self.files.pop(delta.name, None)
@@ -0,0 +1,250 @@
+# modules/calendar_io/parallel_export.py
+# Process-pool JSON -> ICS folder conversion with a resumable checkpoint and per-stage throughput
+#
+# Each finished file is recorded in a checkpoint manifest (input size, mtime and SHA-256),
+# saved as soon as the file completes. A rerun, or a run resumed after a crash, skips
+# inputs whose checksum matches and whose .ics is still there. Outputs are written to a
+# temporary file and renamed, so a crash never leaves a half-written calendar behind.
+#
+# Missing titles are generated in the parent before the fan-out, in one call, so the
+# title batching, concurrency limit and cache of summary_titles apply to the whole
+# folder and workers never talk to the LLM or write to the title cache themselves.
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Union
+
+from modules.calendar_io.export_calendar import trace_to_event
+from modules.calendar_io.ics_writer import ICSWriter, render_component
+from modules.calendar_io.import_manifest import file_sha256
+from modules.calendar_io.summary_titles import generate_summary_titles, local_title
+from modules.core.trace_catalog import load_memory
+from modules.core.trace_validator import valid_mask
+
+STAGES = ("load", "validate", "render", "write")
+RENDER_BATCH = 4096
+
+
+class FileExport(NamedTuple):
+    path: Path
+    output: Optional[Path]
+    loaded: int = 0
+    written: int = 0
+    seconds: Dict[str, float] = {}
+    error: Optional[str] = None
+
+
+# --- Checkpoint ---
+
+class ExportCheckpoint:
+    """`{"files": {name: {"size", "mtime_ns", "sha256", "output", "written"}}}`, written atomically."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.files: Dict[str, Dict] = {}
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                self.files = json.load(f).get("files", {})
+
+    def is_done(self, path: Path) -> bool:
+        entry = self.files.get(path.name)
+        if not entry or (entry["output"] and not Path(entry["output"]).exists()):
+            return False
+        stat = path.stat()
+        if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return True
+        return entry["size"] == stat.st_size and entry["sha256"] == file_sha256(path)
+
+    def record(self, result: FileExport) -> None:
+        stat = result.path.stat()
+        self.files[result.path.name] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_sha256(result.path),
+            "output": str(result.output) if result.output else None,
+            "written": result.written,
+        }
+        self.save()
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"files": self.files}, f)
+        os.replace(tmp, self.path)
+
+
+# --- Worker ---
+
+def convert_json_file(path: Union[str, Path], output_path: Union[str, Path], batch_size: int = RENDER_BATCH,
+                      titles: Optional[Dict[str, str]] = None) -> FileExport:
+    """
+    Convert one trace JSON file, timing each stage. A file with no valid traces gets no .ics.
+    `titles` maps content to a pre-generated title for untitled traces; without it,
+    titles are generated here, one render batch at a time.
+    """
+    path, output_path = Path(path), Path(output_path)
+    seconds = dict.fromkeys(STAGES, 0.0)
+
+    started = time.perf_counter()
+    traces = load_memory(path, copy=False)         # read only
+    seconds["load"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    valid = [trace for trace, ok in zip(traces, valid_mask(traces)) if ok]
+    seconds["validate"] = time.perf_counter() - started
+    if not valid:
+        output_path.unlink(missing_ok=True)
+        return FileExport(path, None, len(traces), 0, seconds)
+
+    remaining = iter(valid)
+    with ICSWriter(output_path) as writer:
+        while True:
+            batch = list(islice(remaining, batch_size))
+            if not batch:
+                break
+            started = time.perf_counter()
+            blocks = render_batch(batch, titles)
+            seconds["render"] += time.perf_counter() - started
+
+            started = time.perf_counter()
+            for block in blocks:
+                writer.write_rendered(block)
+            seconds["write"] += time.perf_counter() - started
+    return FileExport(path, output_path, len(traces), writer.count, seconds)
+
+
+def render_batch(traces: List[Dict], titles: Optional[Dict[str, str]] = None) -> List[bytes]:
+    """
+    VEVENT blocks for valid traces. Untitled traces take their title from `titles`
+    (falling back to truncated content), or without it are titled for the batch at once.
+    """
+    untitled = [i for i, trace in enumerate(traces) if not trace.get("title")]
+    summaries: List[Optional[str]] = [None] * len(traces)
+    if titles is None:
+        for i, title in zip(untitled, generate_summary_titles([traces[i]["content"] for i in untitled])):
+            summaries[i] = title
+    else:
+        for i in untitled:
+            content = traces[i]["content"]
+            summaries[i] = titles.get(content) or local_title(content)
+    blocks = []
+    for trace, summary in zip(traces, summaries):
+        try:
+            blocks.append(render_component("VEVENT", trace_to_event(trace, summary)))
+        except KeyError as e:
+            print(f"[!] Skipping trace {trace.get('id')} due to missing key: {e}")
+    return blocks
+
+
+def untitled_contents(path: Union[str, Path]) -> List[str]:
+    """Distinct contents of the valid, untitled traces in one file."""
+    traces = load_memory(path, copy=False)         # read only
+    return list(dict.fromkeys(trace["content"] for trace, ok in zip(traces, valid_mask(traces))
+                              if ok and not trace.get("title")))
+
+
+def _convert_safely(path: str, output_path: str, titles: Dict[str, str]) -> FileExport:
+    try:
+        return convert_json_file(path, output_path, titles=titles)
+    except Exception as e:
+        return FileExport(Path(path), None, error=f"{type(e).__name__}: {e}")
+
+
+# --- Folder conversion ---
+
+def convert_json_files(paths: Sequence[Union[str, Path]], output_dir: Union[str, Path],
+                       workers: Optional[int] = None, checkpoint: Optional[ExportCheckpoint] = None) -> Iterator[FileExport]:
+    """
+    Convert `paths` on `workers` processes (default: one per core; 1 runs in-process),
+    yielding results as files finish. Missing titles for all files are generated here
+    first, in one generate_summary_titles call. Files already in `checkpoint` are skipped; each
+    successful file is recorded before it is yielded.
+    """
+    output_dir = Path(output_dir)
+    todo = [Path(p) for p in sorted(paths) if checkpoint is None or not checkpoint.is_done(Path(p))]
+
+    untitled: Dict[Path, List[str]] = {}
+    for path in todo:
+        try:
+            untitled[path] = untitled_contents(path)
+        except Exception:
+            untitled[path] = []          # the worker reports the error
+    contents = list(dict.fromkeys(content for path in todo for content in untitled[path]))
+    titles = dict(zip(contents, generate_summary_titles(contents))) if contents else {}
+    jobs = [(str(path), str(output_dir / (path.stem + ".ics")), {c: titles[c] for c in untitled[path]})
+            for path in todo]
+
+    def finished(result: FileExport) -> FileExport:
+        if checkpoint is not None and result.error is None:
+            checkpoint.record(result)
+        return result
+
+    if workers == 1:
+        for job in jobs:
+            yield finished(_convert_safely(*job))
+        return
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for future in as_completed([pool.submit(_convert_safely, *job) for job in jobs]):
+            yield finished(future.result())
+
+
+def throughput_report(results: Sequence[FileExport]) -> Dict[str, Dict[str, float]]:
+    """Traces per second of stage time, summed over files (and so over workers)."""
+    counts = {
+        "load": sum(r.loaded for r in results),
+        "validate": sum(r.loaded for r in results),
+        "render": sum(r.written for r in results),
+        "write": sum(r.written for r in results),
+    }
+    report = {}
+    for stage in STAGES:
+        seconds = sum(r.seconds.get(stage, 0.0) for r in results)
+        report[stage] = {
+            "traces": counts[stage],
+            "seconds": seconds,
+            "traces_per_sec": counts[stage] / seconds if seconds else 0.0,
+        }
+    return report
+
+
+def convert_json_folder(input_dir: Union[str, Path], output_dir: Union[str, Path], workers: Optional[int] = None,
+                        checkpoint_path: Optional[Union[str, Path]] = None) -> Dict[str, object]:
+    """
+    Convert every .json file in `input_dir`, resuming from the checkpoint (default
+    `<output_dir>/export_checkpoint.json`). Returns converted/skipped/failed files and
+    per-stage throughput.
+    """
+    input_dir, output_dir = Path(input_dir), Path(output_dir)
+    json_files = sorted(input_dir.glob("*.json"))
+    if not json_files:
+        print(f"[!] No JSON files found in {input_dir}")
+    checkpoint = ExportCheckpoint(checkpoint_path or output_dir / "export_checkpoint.json")
+
+    started = time.perf_counter()
+    results, failed = [], {}
+    for result in convert_json_files(json_files, output_dir, workers, checkpoint):
+        if result.error:
+            print(f"[!] Failed to convert {result.path.name}: {result.error}")
+            failed[result.path.name] = result.error
+        elif result.written:
+            print(f"→ {result.path.name}: {result.written} of {result.loaded} trace(s) written")
+            results.append(result)
+        else:
+            print(f"[!] No valid memory traces found in {result.path.name}")
+            results.append(result)
+    elapsed = time.perf_counter() - started
+
+    converted = {r.path.name for r in results}
+    skipped = [p.name for p in json_files if p.name not in converted and p.name not in failed]
+    throughput = throughput_report(results)
+    for stage, stats in throughput.items():
+        print(f"→ {stage:<8} {stats['traces']:>8} traces in {stats['seconds']:.2f}s "
+              f"({stats['traces_per_sec']:.0f} traces/s)")
+    print(f"[✓] Converted {len(results)} file(s), skipped {len(skipped)} unchanged, "
+          f"{len(failed)} failed in {elapsed:.2f}s")
+    return {"converted": sorted(converted), "skipped": skipped, "failed": failed, "throughput": throughput}
@@ -0,0 +1,148 @@
+# modules/calendar_io/parallel_import.py
+# Process-pool ICS import: files (and large files split at VEVENT boundaries) are parsed in parallel
+#
+# Results come back per file in sorted path order, whatever order the workers finish in.
+# A file whose parse fails is reported with its error; the rest of the run continues.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import chain
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from modules.calendar_io.ics_tokenizer import iter_ics_events
+
+DEFAULT_CHUNK_BYTES = int(os.getenv("ICS_IMPORT_CHUNK_BYTES", 16 * 1024 * 1024))
+EVENT_MARKER = b"\nBEGIN:VEVENT"
+
+
+class FileImport(NamedTuple):
+    path: Path
+    traces: List[Dict]
+    invalid: int = 0
+    error: Optional[str] = None
+
+
+# --- Chunking ---
+
+def next_event_offset(f, position: int) -> Optional[int]:
+    """Offset of the first `BEGIN:VEVENT` line starting at or after `position`, if any."""
+    if position <= 0:
+        f.seek(0)
+        if f.read(len(EVENT_MARKER) - 1) == EVENT_MARKER[1:]:
+            return 0
+    data_start = max(position - 1, 0)
+    f.seek(data_start)
+    data = b""
+    while True:
+        block = f.read(1 << 16)
+        if not block:
+            return None
+        data += block
+        found = data.find(EVENT_MARKER)
+        if found != -1:
+            return data_start + found + 1
+        # Keep enough of the tail to catch a marker spanning two reads
+        drop = len(data) - (len(EVENT_MARKER) - 1)
+        if drop > 0:
+            data_start += drop
+            data = data[drop:]
+
+
+def split_at_events(path: Union[str, Path], chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> List[Tuple[int, int]]:
+    """
+    Byte ranges covering the file, each starting at the beginning of the file or of a
+    `BEGIN:VEVENT` line, so every range holds whole events. Small files are one range.
+    """
+    size = os.path.getsize(path)
+    cuts = [0]
+    with open(path, "rb") as f:
+        while cuts[-1] + chunk_bytes < size:
+            offset = next_event_offset(f, cuts[-1] + chunk_bytes)
+            if offset is None:
+                break
+            cuts.append(offset)
+    return list(zip(cuts, cuts[1:] + [size]))
+
+
+def read_range(path: Union[str, Path], start: int, end: int) -> Iterator[bytes]:
+    """Yield the lines in [start, end) of a file opened in binary mode."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        position = start
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line
+
+
+def parse_range(path: Union[str, Path], start: int, end: int,
+                validate: Optional[Callable[[Dict], bool]] = None,
+                window: Optional[Tuple[datetime, datetime]] = None,
+                validate_batch: Optional[Callable[[List[Dict]], Sequence[bool]]] = None) -> Tuple[List[Dict], int]:
+    """
+    Worker: parse the events in one byte range. Returns (valid traces, invalid count).
+    `validate` checks one trace at a time; `validate_batch` returns a validity mask for
+    the whole range at once (e.g. trace_validator.valid_mask).
+    Ranges after the first are prefixed with the calendar header (everything before the
+    first VEVENT), so VTIMEZONE definitions apply to every chunk.
+    """
+    lines = read_range(path, start, end)
+    if start > 0:
+        with open(path, "rb") as f:
+            header_end = next_event_offset(f, 0) or 0
+        lines = chain(read_range(path, 0, min(header_end, start)), lines)
+    traces, invalid = [], 0
+    for trace in iter_ics_events(lines, window):
+        if validate is None or validate(trace):
+            traces.append(trace)
+        else:
+            invalid += 1
+    if validate_batch is not None and traces:
+        mask = validate_batch(traces)
+        invalid += len(traces) - int(sum(mask))
+        traces = [trace for trace, ok in zip(traces, mask) if ok]
+    return traces, invalid
+
+
+# --- Directory import ---
+
+def import_ics_files(paths: Sequence[Union[str, Path]], workers: Optional[int] = None,
+                     chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+                     validate: Optional[Callable[[Dict], bool]] = None,
+                     window: Optional[Tuple[datetime, datetime]] = None,
+                     validate_batch: Optional[Callable[[List[Dict]], Sequence[bool]]] = None) -> Iterator[FileImport]:
+    """
+    Parse `paths` on a pool of `workers` processes (default: one per core) and yield
+    one FileImport per file, in sorted path order. `validate` / `validate_batch` (see
+    parse_range) must be module-level functions so they can be sent to the workers.
+    `window` expands recurring events.
+    """
+    paths = sorted(Path(p) for p in paths)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        jobs = []
+        for path in paths:
+            try:
+                ranges = split_at_events(path, chunk_bytes)
+                futures = [pool.submit(parse_range, str(path), start, end, validate, window, validate_batch) for start, end in ranges]
+                jobs.append((path, futures, None))
+            except OSError as e:
+                jobs.append((path, [], str(e)))
+
+        for path, futures, error in jobs:
+            traces, invalid = [], 0
+            for future in futures:
+                try:
+                    chunk, chunk_invalid = future.result()
+                except Exception as e:
+                    error = error or f"{type(e).__name__}: {e}"
+                    continue
+                traces.extend(chunk)
+                invalid += chunk_invalid
+            if error:
+                yield FileImport(path, [], invalid, error)
+            else:
+                yield FileImport(path, traces, invalid)
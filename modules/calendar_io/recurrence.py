@@ -0,0 +1,240 @@
+# modules/calendar_io/recurrence.py
+# Lazy RRULE / RDATE / EXDATE expansion: occurrences are generated only for the window asked for
+#
+# Rules are expanded in the event's local wall time, so a 09:00 meeting stays at 09:00
+# across DST changes, then given that moment's UTC offset. Infinite rules are never
+# materialised: every query walks the rule forward and stops at the end of its window.
+
+import heapq
+from datetime import datetime, timedelta, timezone
+from typing import Collection, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from dateutil.rrule import rrulestr
+
+from modules.calendar_io.ics_timezones import TimezoneResolver, TransitionTable, definition_table
+
+UTC = timezone.utc
+
+# Offsets never exceed a day, so local and UTC windows differ by less than this
+WINDOW_SLACK = timedelta(days=1)
+
+
+def _aware(value: datetime) -> datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=UTC)
+
+
+def _parse_iso(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _format_iso(value: datetime) -> str:
+    return value.astimezone(UTC).replace(tzinfo=None).isoformat() + "Z"
+
+
+class Recurrence:
+    """
+    Occurrence start times of one recurring event, as timezone-aware datetimes carrying
+    the local offset in effect at each occurrence.
+
+    `start_local` is DTSTART's naive wall time and `table` its zone (None for UTC,
+    floating and all-day values).
+    """
+
+    def __init__(self, start_local: datetime, rrules: Iterable[str] = (), rdates: Iterable[datetime] = (),
+                 exdates: Iterable[datetime] = (), table: Optional[TransitionTable] = None,
+                 tzid: Optional[str] = None):
+        self.start_local = start_local
+        self.table = table
+        self.tzid = tzid
+        self.rrule_strings = list(rrules)
+        self.rules = [self._compile(rule) for rule in self.rrule_strings]
+        self.rdates = sorted(_aware(d) for d in rdates)
+        self.exdates = {_aware(d) for d in exdates}
+
+    def _compile(self, rule: str):
+        parts = [part for part in rule.strip().split(";") if part]
+        until = next((part.split("=", 1)[1] for part in parts if part.upper().startswith("UNTIL=")), None)
+        parts = [part for part in parts if not part.upper().startswith("UNTIL=")]
+        compiled = rrulestr(";".join(parts), dtstart=self.start_local)
+        if until is not None:
+            resolved, _ = TimezoneResolver().resolve(until, {})
+            if until.strip().endswith("Z") and self.table is not None:
+                until_utc = resolved.replace(tzinfo=None)
+                until_local = until_utc + self.table.offset_for_local(until_utc)
+            else:
+                until_local = resolved.replace(tzinfo=None)
+            compiled = compiled.replace(until=until_local)
+        return compiled
+
+    @property
+    def start(self) -> datetime:
+        return self.localize(self.start_local)
+
+    def localize(self, local: datetime) -> datetime:
+        return self.table.localize(local) if self.table is not None else local.replace(tzinfo=UTC)
+
+    def is_infinite(self) -> bool:
+        return any(rule._count is None and rule._until is None for rule in self.rules)
+
+    # --- Expansion ---
+
+    def _rule_stream(self, rule, after_local: datetime) -> Iterator[datetime]:
+        for local in rule.xafter(after_local, inc=True):
+            yield self.localize(local)
+
+    def iter_from(self, after: datetime, exclude: Collection[datetime] = ()) -> Iterator[datetime]:
+        """
+        Occurrences starting at or after `after`, in order, generated lazily. Instants in
+        `exclude` are skipped like EXDATEs (e.g. those replaced by RECURRENCE-ID overrides).
+        """
+        after = _aware(after)
+        after_local = after.astimezone(UTC).replace(tzinfo=None) - WINDOW_SLACK
+        streams = [self._rule_stream(rule, after_local) for rule in self.rules]
+        streams.append(iter(self.rdates))
+        if not self.rules:
+            streams.append(iter([self.start]))
+        previous = None
+        for occurrence in heapq.merge(*streams):
+            if occurrence < after or occurrence == previous or occurrence in self.exdates or occurrence in exclude:
+                continue
+            previous = occurrence
+            yield occurrence
+
+    def between(self, start: datetime, end: datetime, exclude: Collection[datetime] = ()) -> Iterator[datetime]:
+        """Occurrences with start <= occurrence <= end, skipping `exclude`."""
+        end = _aware(end)
+        for occurrence in self.iter_from(start, exclude):
+            if occurrence > end:
+                return
+            yield occurrence
+
+    # --- Trace storage ---
+
+    def to_dict(self) -> Dict:
+        data = {
+            "rrule": self.rrule_strings,
+            "start_local": self.start_local.isoformat(),
+            "tzid": self.tzid,
+            "rdate": [_format_iso(d) for d in self.rdates],
+            "exdate": sorted(_format_iso(d) for d in self.exdates),
+        }
+        # A calendar-defined zone is not known outside its file, so it travels with the trace
+        if self.table is not None and self.table.definition is not None:
+            data["vtimezone"] = self.table.definition
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict, resolver: Optional[TimezoneResolver] = None) -> "Recurrence":
+        tzid = data.get("tzid")
+        if tzid and data.get("vtimezone"):
+            table = definition_table(tzid, data["vtimezone"])
+        else:
+            table = (resolver or TimezoneResolver()).table(tzid) if tzid else None
+        return cls(
+            datetime.fromisoformat(data["start_local"]),
+            data.get("rrule", []),
+            [_parse_iso(d) for d in data.get("rdate", [])],
+            [_parse_iso(d) for d in data.get("exdate", [])],
+            table=table,
+            tzid=tzid,
+        )
+
+
+def recurrence_from_properties(properties, resolver: TimezoneResolver) -> Optional[Recurrence]:
+    """Build a Recurrence from a VEVENT's ICSProperty list, or None if it does not recur."""
+    dtstart = None
+    rrules, rdates, exdates = [], [], []
+    for prop in properties:
+        if prop.name == "DTSTART":
+            dtstart = prop
+        elif prop.name == "RRULE":
+            rrules.append(prop.value)
+        elif prop.name in ("RDATE", "EXDATE"):
+            if prop.params.get("VALUE") == "PERIOD":
+                values = [v.split("/")[0] for v in prop.value.split(",")]
+            else:
+                values = prop.value.split(",")
+            target = rdates if prop.name == "RDATE" else exdates
+            target.extend(resolver.resolve(v, prop.params)[0] for v in values if v.strip())
+    if dtstart is None or not (rrules or rdates):
+        return None
+
+    value = dtstart.value.strip()
+    resolved, all_day = resolver.resolve(value, dtstart.params)
+    tzid = None if all_day or value.endswith("Z") else dtstart.params.get("TZID")
+    table = resolver.table(tzid) if tzid else None
+    start_local = resolved.replace(tzinfo=None)
+    # The DTSTART instance always counts, even if the rule would not produce it
+    rdates.append(resolved)
+    return Recurrence(start_local, rrules, rdates, exdates, table=table if tzid else None, tzid=tzid)
+
+
+# --- Traces ---
+
+def trace_recurrence(trace: Dict, resolver: Optional[TimezoneResolver] = None) -> Optional[Recurrence]:
+    data = trace.get("recurrence")
+    return Recurrence.from_dict(data, resolver) if data else None
+
+
+def occurrence_trace(trace: Dict, occurrence: datetime) -> Dict:
+    """Copy of a recurring trace moved to one occurrence, with its own id."""
+    start = _parse_iso(trace["timestamp"])
+    instance = {k: v for k, v in trace.items() if k != "recurrence"}
+    instance["timestamp"] = _format_iso(occurrence)
+    if trace.get("end"):
+        instance["end"] = _format_iso(occurrence + (_parse_iso(trace["end"]) - start))
+    if "id" in trace:
+        compact = occurrence.astimezone(UTC).strftime("%Y%m%dT%H%M%SZ")
+        instance["id"] = f"{trace['id']}#{compact}"
+    instance["recurrence_id"] = _format_iso(occurrence)
+    return instance
+
+
+def override_instant(trace: Dict) -> Optional[Tuple[str, datetime]]:
+    """(series id, replaced instant) for a modified-instance trace (`UID#<instant>` with a `recurrence_id`)."""
+    if trace.get("recurrence") or not trace.get("recurrence_id"):
+        return None
+    series, sep, _ = str(trace.get("id", "")).rpartition("#")
+    if not sep:
+        return None
+    try:
+        return series, _aware(_parse_iso(trace["recurrence_id"]))
+    except ValueError:
+        return None
+
+
+def add_override(overridden: Dict[str, Set[datetime]], trace: Dict) -> None:
+    """Record `trace` in a series id -> replaced instants map if it is a modified instance."""
+    found = override_instant(trace)
+    if found is not None:
+        overridden.setdefault(found[0], set()).add(found[1])
+
+
+def expand_trace(trace: Dict, start: datetime, end: datetime, resolver: Optional[TimezoneResolver] = None,
+                 recurrence: Optional[Recurrence] = None, exclude: Collection[datetime] = ()) -> Iterator[Dict]:
+    """Occurrence traces of a recurring trace starting within [start, end], skipping `exclude`."""
+    recurrence = recurrence or trace_recurrence(trace, resolver)
+    if recurrence is None:
+        return
+    for occurrence in recurrence.between(start, end, exclude):
+        yield occurrence_trace(trace, occurrence)
+
+
+def expand_traces(traces: Iterable[Dict], window: Tuple[datetime, datetime],
+                  resolver: Optional[TimezoneResolver] = None) -> Iterator[Dict]:
+    """
+    Pass non-recurring traces through; replace recurring ones by their occurrences in
+    `window`. Recurring traces are expanded last, once every override in `traces` is
+    known, so an instance moved by a RECURRENCE-ID override is not also kept at its
+    original time.
+    """
+    masters = []
+    overridden: Dict[str, Set[datetime]] = {}
+    for trace in traces:
+        if trace.get("recurrence"):
+            masters.append(trace)
+            continue
+        add_override(overridden, trace)
+        yield trace
+    for trace in masters:
+        yield from expand_trace(trace, window[0], window[1], resolver, exclude=overridden.get(trace.get("id"), ()))
@@ -0,0 +1,218 @@
+# modules/calendar_io/summary_titles.py
+# Event titles for traces without one: local for short contents, otherwise batched LLM
+# requests behind a persistent cache keyed by sha256(content)
+#
+# Contents that already fit are used as is. The rest are looked up in the cache, and
+# the misses are numbered into multi-item prompts sent a few at a time. A batch that
+# still fails after its retries falls back to truncation and is not cached.
+
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+from modules.core.embedding_cache import normalize_text
+
+TITLE_MODEL = os.getenv("SUMMARY_TITLE_MODEL", "gpt-4.1")
+DEFAULT_CACHE_PATH = os.getenv("SUMMARY_TITLE_CACHE_PATH", "data/cache/summary_titles.sqlite")
+USE_LLM_TITLES = os.getenv("SUMMARY_TITLES", "llm") != "local"
+MAX_BATCH_ITEMS = int(os.getenv("SUMMARY_TITLE_BATCH_SIZE", 25))
+MAX_BATCH_CHARS = int(os.getenv("SUMMARY_TITLE_BATCH_CHARS", 24_000))
+MAX_CONCURRENT_BATCHES = int(os.getenv("SUMMARY_TITLE_CONCURRENCY", 4))
+MAX_RETRIES = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS titles (
+    key TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    last_access REAL NOT NULL
+);
+"""
+
+
+def title_key(content: str, model: str, max_chars: int) -> str:
+    digest = hashlib.sha256(normalize_text(content).encode("utf-8")).hexdigest()
+    return f"{model}:{max_chars}:{digest}"
+
+
+def local_title(content: str, max_chars: int = 40) -> str:
+    """Fast fallback: the content itself if it fits, else its first `max_chars` characters."""
+    content = content.strip()
+    return content[:max_chars] + "..." if len(content) > max_chars else content
+
+
+class TitleCache:
+    """SQLite-backed content -> title cache, shared across export runs."""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_CACHE_PATH):
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(path)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def get_many(self, contents: Sequence[str], model: str, max_chars: int) -> List[Optional[str]]:
+        keys = [title_key(content, model, max_chars) for content in contents]
+        found: Dict[str, str] = {}
+        with self._lock:
+            unique = list(dict.fromkeys(keys))
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                found.update(self.conn.execute(
+                    f"SELECT key, title FROM titles WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall())
+            if found:
+                now = time.time()
+                with self.conn:
+                    self.conn.executemany("UPDATE titles SET last_access = ? WHERE key = ?",
+                                          [(now, key) for key in found])
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return [found.get(key) for key in keys]
+
+    def put_many(self, contents: Sequence[str], titles: Sequence[str], model: str, max_chars: int) -> None:
+        now = time.time()
+        rows = {title_key(content, model, max_chars): (title, now)
+                for content, title in zip(contents, titles) if title}
+        if not rows:
+            return
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO titles (key, title, last_access) VALUES (?, ?, ?)",
+                                  [(key, title, at) for key, (title, at) in rows.items()])
+
+
+_title_cache: Optional[TitleCache] = None
+_client = None
+
+
+def get_title_cache() -> TitleCache:
+    global _title_cache
+    if _title_cache is None:
+        _title_cache = TitleCache()
+    return _title_cache
+
+
+def get_client():
+    """OpenAI client, created on first LLM request so local-only exports need no API key."""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI()
+    return _client
+
+
+# --- Batch prompts ---
+
+def build_batch_prompt(contents: Sequence[str], max_chars: int = 40) -> str:
+    items = "\n".join(f"{i + 1}. {json.dumps(content)}" for i, content in enumerate(contents))
+    return (
+        f"Summarize each of the following {len(contents)} events as a calendar title under "
+        f"{max_chars} characters. Reply with only a JSON array of {len(contents)} strings, "
+        f"in the same order.\n\n{items}"
+    )
+
+
+def parse_batch_response(text: str, expected: int) -> List[str]:
+    """Titles from a JSON array reply; raises ValueError if it is malformed or the wrong length."""
+    match = re.search(r"\[.*\]", text, re.DOTALL)
+    if not match:
+        raise ValueError("no JSON array in response")
+    titles = json.loads(match.group(0))
+    if not isinstance(titles, list) or len(titles) != expected:
+        raise ValueError(f"expected {expected} titles, got {len(titles) if isinstance(titles, list) else 'none'}")
+    return [str(title).strip().strip('"') for title in titles]
+
+
+def make_batches(contents: Sequence[str], max_items: int = MAX_BATCH_ITEMS,
+                 max_chars: int = MAX_BATCH_CHARS) -> List[List[int]]:
+    batches, current, size = [], [], 0
+    for i, content in enumerate(contents):
+        if current and (len(current) >= max_items or size + len(content) > max_chars):
+            batches.append(current)
+            current, size = [], 0
+        current.append(i)
+        size += len(content)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def request_titles(contents: Sequence[str], max_chars: int = 40, model: str = TITLE_MODEL,
+                   max_retries: int = MAX_RETRIES, backoff: float = 1.0, api_client=None) -> List[str]:
+    """Titles for one batch in one request, retrying with exponential backoff and jitter."""
+    api_client = api_client or get_client()
+    prompt = build_batch_prompt(contents, max_chars)
+    for attempt in range(max_retries + 1):
+        try:
+            response = api_client.responses.create(model=model, input=prompt)
+            return parse_batch_response(response.output_text, len(contents))
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = backoff * (2 ** attempt) * (0.5 + random.random())
+            print(f"[!] Title batch of {len(contents)} failed ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def generate_summary_titles(contents: Sequence[str], max_chars: int = 40, model: str = TITLE_MODEL,
+                            use_llm: bool = USE_LLM_TITLES, cache: Optional[TitleCache] = None,
+                            max_items: int = MAX_BATCH_ITEMS, max_concurrency: int = MAX_CONCURRENT_BATCHES,
+                            max_retries: int = MAX_RETRIES, backoff: float = 1.0, api_client=None) -> List[str]:
+    """
+    Titles for `contents`, in order. Short contents and (with `use_llm=False`, or
+    SUMMARY_TITLES=local) all contents get local_title; cached contents cost nothing;
+    each distinct remaining content is sent once, in batches of up to `max_items`.
+    """
+    titles: List[Optional[str]] = [None] * len(contents)
+    for i, content in enumerate(contents):
+        if not use_llm or len(content.strip()) <= max_chars:
+            titles[i] = local_title(content, max_chars)
+    if all(title is not None for title in titles):
+        return titles
+
+    cache = cache or get_title_cache()
+    pending: Dict[str, List[int]] = {}
+    remaining = [i for i, title in enumerate(titles) if title is None]
+    for i, cached in zip(remaining, cache.get_many([contents[i] for i in remaining], model, max_chars)):
+        if cached is not None:
+            titles[i] = cached
+        else:
+            pending.setdefault(contents[i], []).append(i)
+
+    unique = list(pending)
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+        futures = {
+            pool.submit(request_titles, [unique[j] for j in batch], max_chars, model, max_retries, backoff,
+                        api_client): batch
+            for batch in make_batches(unique, max_items)
+        }
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                generated = future.result()
+            except Exception as e:
+                print(f"[!] Title batch of {len(batch)} failed: {e}; using truncated content")
+                generated = None
+            else:
+                cache.put_many([unique[j] for j in batch], generated, model, max_chars)
+            for k, j in enumerate(batch):
+                title = (generated[k] if generated else "") or local_title(unique[j], max_chars)
+                for i in pending[unique[j]]:
+                    titles[i] = title
+    return titles
+
+
+def generate_summary_title(content: str, max_chars: int = 40) -> str:
+    return generate_summary_titles([content], max_chars)[0]
@@ -1,4 +1,4 @@
-# python modules/calendar_io/sync_google_ics.py
+# PYTHONPATH=. python modules/calendar_io/sync_google_ics.py
 
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -10,9 +10,10 @@ import pytz
 import json
 import re
 
-from schema import validate_memory_trace 
+from modules.core.schema import validate_memory_trace
 
 SCOPES = ['https://www.googleapis.com/auth/calendar.readonly']
+PAGE_SIZE = 2500      # events.list maximum
 
 def authenticate_google():
     token_path = Path("./calendar/token.json")
@@ -29,8 +30,8 @@ def authenticate_google():
     return build("calendar", "v3", credentials=creds)
 
 def event_to_trace(event):
-    start_raw = event["start"]["dateTime"]
-    end_raw = event["end"]["dateTime"]
+    start_raw = event["start"].get("dateTime") or event["start"].get("date")     # all-day events carry a date
+    end_raw = event["end"].get("dateTime") or event["end"].get("date")
 
     try:
         start_dt = datetime.fromisoformat(start_raw.replace("Z", "+00:00"))
@@ -71,20 +72,25 @@ def fetch_and_export_events(service, output_path: Path, calendar_id="primary"):
     print("→ Fetching events from Google Calendar...")
 
     now = datetime.utcnow().isoformat() + "Z"
-    events_result = service.events().list(
-        calendarId=calendar_id, timeMin=now,
-        maxResults=100, singleEvents=True, orderBy="startTime").execute()
-
-    events = events_result.get("items", [])
     traces = []
-
-    for event in events:
-        trace = event_to_trace(event)
-        if validate_memory_trace(trace):
-            traces.append(trace)
-            print(f"[✓] Parsed: {trace.get('title')}")
-        else:
-            print(f"[!] Invalid event skipped: {event.get('id')}")
+    page_token = None
+
+    while True:
+        events_result = service.events().list(
+            calendarId=calendar_id, timeMin=now, maxResults=PAGE_SIZE,
+            singleEvents=True, orderBy="startTime", pageToken=page_token).execute()
+
+        for event in events_result.get("items", []):
+            trace = event_to_trace(event)
+            if validate_memory_trace(trace):
+                traces.append(trace)
+                print(f"[✓] Parsed: {trace.get('title')}")
+            else:
+                print(f"[!] Invalid event skipped: {event.get('id')}")
+
+        page_token = events_result.get("nextPageToken")
+        if not page_token:
+            break
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
     with open(output_path, "w") as f:
@@ -1,4 +1,4 @@
-# python modules/calendar_io/sync_google_json.py 
+# PYTHONPATH=. python modules/calendar_io/sync_google_json.py 
 
 from ics import Calendar
 from googleapiclient.discovery import build
@@ -10,7 +10,9 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import pytz
 
-from schema import validate_memory_trace
+from modules.core.schema import validate_memory_trace
+from modules.core.trace_catalog import load_memory
+from modules.google_sync.batch_insert import batch_insert_events
 
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
@@ -88,10 +90,7 @@ def convert_json_folder_to_ics(input_dir: Path, output_dir: Path):
         return
 
     for json_file in json_files:
-        with open(json_file) as f:
-            data = json.load(f)
-
-        traces = data.get("memory", [])
+        traces = load_memory(json_file)
         vevents = []
         for trace in traces:
             if validate_memory_trace(trace):
@@ -111,7 +110,7 @@ def parse_ics_and_sync(ics_path: Path, service):
     with open(ics_path, "r") as f:
         calendar = Calendar(f.read())
 
-    synced = 0
+    payloads = []
     for event in calendar.events:
         try:
             payload = {
@@ -126,13 +125,16 @@ def parse_ics_and_sync(ics_path: Path, service):
                     "timeZone": "UTC"
                 }
             }
-            service.events().insert(calendarId="primary", body=payload).execute()
-            print(f"[✓] Synced: {payload['summary']}")
-            synced += 1
+            payloads.append(payload)
         except Exception as e:
             print(f"[!] Failed to sync event: {e}")
 
-    print(f"\n[✓] {synced} events synced from {ics_path.name}")
+    report = batch_insert_events(service, payloads)
+    for index, error in sorted(report.failed.items()):
+        print(f"[!] Failed to sync {payloads[index]['summary']}: {error}")
+
+    print(f"\n[✓] {len(report.inserted)} events synced from {ics_path.name} "
+          f"in {report.round_trips} batch request(s)")
 
 if __name__ == "__main__":
     input_dir = Path("/Users/derekrosenzweig/Documents/GitHub/chronologue/data/conversation/raw")
@@ -0,0 +1,244 @@
+# modules/core/ann_index.py
+# Persistent FAISS index over trace embeddings with incremental updates and filtered search
+#
+# python modules/core/ann_index.py data/conversation/embedding/lab_manager_2025_traces_embedded --k 5
+
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import faiss
+import numpy as np
+
+from modules.core.exact_search import normalize_rows
+from modules.core.time_index import to_epoch
+
+NO_TIME = np.iinfo(np.int64).min
+
+
+class TraceANNIndex:
+    """
+    Cosine-similarity index keyed by trace id.
+
+    Starts as an exact flat index; once `train_size` vectors have been added it is
+    rebuilt as an IVF index (`nlist` cells, `nprobe` probed per query). Both support
+    `remove_ids`, so adds and removes are incremental. Each entry also keeps the
+    trace's type and start time so searches can be restricted with an ID selector;
+    these are mirrored in parallel NumPy arrays (label, type code, epoch) so the
+    selector is built with vectorised masks.
+    """
+
+    def __init__(self, dim: int, nlist: int = 256, nprobe: int = 16, train_size: Optional[int] = None):
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_size = train_size if train_size is not None else nlist * 39
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        self.labels: Dict[str, int] = {}
+        self.meta: Dict[int, Tuple[str, Optional[str], int]] = {}
+        self.next_label = 0
+        self.type_codes: Dict[Optional[str], int] = {}
+        self._entry_labels = np.empty(0, dtype=np.int64)
+        self._entry_types = np.empty(0, dtype=np.int32)
+        self._entry_epochs = np.empty(0, dtype=np.int64)
+
+    @property
+    def is_ivf(self) -> bool:
+        return not isinstance(self.index, faiss.IndexIDMap2)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __contains__(self, trace_id: str) -> bool:
+        return trace_id in self.labels
+
+    # --- Updates ---
+
+    def add(self, trace_ids: Sequence[str], vectors: np.ndarray, traces: Optional[Sequence[Dict]] = None) -> None:
+        """
+        Add or replace vectors. `traces` (aligned with ids) supplies type/timestamp for
+        filtering. An id repeated within the batch keeps its last vector.
+        """
+        vectors = normalize_rows(vectors)
+        last = {trace_id: i for i, trace_id in enumerate(trace_ids)}
+        if len(last) < len(trace_ids):
+            rows = sorted(last.values())
+            trace_ids = [trace_ids[i] for i in rows]
+            vectors = vectors[rows]
+            traces = [traces[i] for i in rows] if traces is not None else None
+        existing = [trace_id for trace_id in trace_ids if trace_id in self.labels]
+        if existing:
+            self.remove(existing)
+
+        labels = np.arange(self.next_label, self.next_label + len(trace_ids), dtype=np.int64)
+        self.next_label += len(trace_ids)
+        entries = []
+        for i, (trace_id, label) in enumerate(zip(trace_ids, labels)):
+            trace = traces[i] if traces is not None else {}
+            epoch = NO_TIME
+            if trace.get("timestamp"):
+                try:
+                    epoch = to_epoch(trace["timestamp"])
+                except ValueError:
+                    pass
+            self.labels[trace_id] = int(label)
+            self.meta[int(label)] = (trace_id, trace.get("type"), epoch)
+            entries.append((int(label), trace.get("type"), epoch))
+        self._append_entries(entries)
+
+        if not self.is_ivf and len(self.labels) - len(trace_ids) < self.train_size <= len(self.labels):
+            self.index.add_with_ids(vectors, labels)
+            self._train_ivf()
+        else:
+            self.index.add_with_ids(vectors, labels)
+
+    def add_traces(self, traces: Sequence[Dict], matrix: Optional[np.ndarray] = None) -> None:
+        if matrix is None:
+            matrix = np.asarray([t["embedding"] for t in traces], dtype=np.float32)
+        self.add([t["id"] for t in traces], matrix, traces)
+
+    def remove(self, trace_ids: Iterable[str]) -> int:
+        labels = [self.labels.pop(trace_id) for trace_id in trace_ids if trace_id in self.labels]
+        for label in labels:
+            del self.meta[label]
+        if not labels:
+            return 0
+        labels = np.asarray(labels, dtype=np.int64)
+        keep = ~np.isin(self._entry_labels, labels)
+        self._entry_labels = self._entry_labels[keep]
+        self._entry_types = self._entry_types[keep]
+        self._entry_epochs = self._entry_epochs[keep]
+        return self.index.remove_ids(labels)
+
+    def _append_entries(self, entries: Sequence[Tuple[int, Optional[str], int]]) -> None:
+        """Mirror (label, type, epoch) entries into the filter arrays."""
+        if not entries:
+            return
+        labels, trace_types, epochs = zip(*entries)
+        codes = [self.type_codes.setdefault(trace_type, len(self.type_codes)) for trace_type in trace_types]
+        self._entry_labels = np.concatenate([self._entry_labels, np.asarray(labels, dtype=np.int64)])
+        self._entry_types = np.concatenate([self._entry_types, np.asarray(codes, dtype=np.int32)])
+        self._entry_epochs = np.concatenate([self._entry_epochs, np.asarray(epochs, dtype=np.int64)])
+
+    def _train_ivf(self) -> None:
+        """Rebuild the flat index as IVF, training the coarse quantizer on what is stored."""
+        n = self.index.ntotal
+        vectors = self.index.index.reconstruct_n(0, n)
+        labels = faiss.vector_to_array(self.index.id_map).astype(np.int64)
+        nlist = max(1, min(self.nlist, n // 39))
+        quantizer = faiss.IndexFlatIP(self.dim)
+        ivf = faiss.IndexIVFFlat(quantizer, self.dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        ivf.train(vectors)
+        ivf.add_with_ids(vectors, labels)
+        self.index = ivf
+
+    # --- Search ---
+
+    def _selector(self, types: Optional[Iterable[str]], start, end):
+        if types is None and start is None and end is None:
+            return None
+        mask = np.ones(len(self._entry_labels), dtype=bool)
+        if types is not None:
+            types = [types] if isinstance(types, str) else types
+            codes = [self.type_codes[t] for t in types if t in self.type_codes]
+            mask &= np.isin(self._entry_types, np.asarray(codes, dtype=np.int32))
+        if start is not None or end is not None:
+            mask &= self._entry_epochs != NO_TIME
+        if start is not None:
+            mask &= self._entry_epochs >= to_epoch(start)
+        if end is not None:
+            mask &= self._entry_epochs <= to_epoch(end)
+        return faiss.IDSelectorBatch(self._entry_labels[mask])
+
+    def search(self, queries: np.ndarray, k: int = 5, types: Optional[Union[str, Iterable[str]]] = None,
+               start=None, end=None) -> List[List[Tuple[str, float]]]:
+        """
+        Top-k (trace_id, cosine) pairs per query row, optionally restricted to trace
+        `types` and/or a [start, end] time window.
+
+        Once the index is IVF, only the `nprobe` cells nearest each query are searched,
+        and the filter is applied inside them. A tight filter can therefore return fewer
+        than k results even when more matching traces exist; raise `nprobe` (up to
+        `nlist`) to search more cells.
+        """
+        queries = normalize_rows(queries)
+        selector = self._selector(types, start, end)
+        if self.is_ivf:
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=self.nprobe)
+        else:
+            params = faiss.SearchParameters(sel=selector) if selector is not None else None
+        scores, labels = self.index.search(queries, min(k, max(len(self), 1)), params=params)
+        return [
+            [(self.meta[int(label)][0], float(score)) for score, label in zip(row_scores, row_labels) if label >= 0]
+            for row_scores, row_labels in zip(scores, labels)
+        ]
+
+    # --- Persistence ---
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write `<path>.faiss` and `<path>.meta.json`."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        faiss.write_index(self.index, str(path.with_name(path.name + ".faiss")))
+        with open(path.with_name(path.name + ".meta.json"), "w") as f:
+            json.dump({
+                "dim": self.dim,
+                "nlist": self.nlist,
+                "nprobe": self.nprobe,
+                "train_size": self.train_size,
+                "next_label": self.next_label,
+                "entries": [[label, *meta] for label, meta in self.meta.items()],
+            }, f)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "TraceANNIndex":
+        path = Path(path)
+        with open(path.with_name(path.name + ".meta.json"), "r") as f:
+            meta = json.load(f)
+        index = cls(meta["dim"], nlist=meta["nlist"], nprobe=meta["nprobe"], train_size=meta["train_size"])
+        index.index = faiss.read_index(str(path.with_name(path.name + ".faiss")))
+        index.next_label = meta["next_label"]
+        for label, trace_id, trace_type, epoch in meta["entries"]:
+            index.labels[trace_id] = label
+            index.meta[label] = (trace_id, trace_type, epoch)
+        index._append_entries([(label, trace_type, epoch) for label, _, trace_type, epoch in meta["entries"]])
+        return index
+
+
+# --- Evaluation ---
+
+def recall_at_k(index: TraceANNIndex, trace_ids: Sequence[str], matrix: np.ndarray,
+                queries: np.ndarray, k: int = 10) -> float:
+    """Fraction of the exact cosine top-k (over `matrix`) that the index also returns."""
+    exact_scores = normalize_rows(queries) @ normalize_rows(matrix).T
+    k = min(k, len(trace_ids))
+    found = index.search(queries, k)
+    hits = 0
+    for row, approx in zip(exact_scores, found):
+        exact = {trace_ids[i] for i in np.argpartition(-row, k - 1)[:k]}
+        hits += len(exact & {trace_id for trace_id, _ in approx})
+    return hits / (k * len(queries)) if len(queries) else 1.0
+
+
+if __name__ == "__main__":
+    from modules.core.embedding_store import EmbeddingStore
+
+    parser = argparse.ArgumentParser(description="Build an ANN index from an embedding store and report recall@k")
+    parser.add_argument("store", type=str, help="Embedding store base path (without .npy)")
+    parser.add_argument("--output", type=str, help="Index path (defaults to <store>.ann)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100, help="Number of stored vectors to use as queries")
+    args = parser.parse_args()
+
+    store = EmbeddingStore(args.store)
+    traces = store.traces()
+    index = TraceANNIndex(store.dim)
+    index.add_traces(traces, store.matrix)
+    index.save(args.output or f"{args.store}.ann")
+
+    rng = np.random.default_rng(0)
+    sample = rng.choice(len(store), size=min(args.queries, len(store)), replace=False)
+    recall = recall_at_k(index, [t["id"] for t in traces], store.matrix, store.matrix[sample], args.k)
+    kind = "IVF" if index.is_ivf else "flat"
+    print(f"[✓] Indexed {len(index)} trace(s) ({kind}), recall@{args.k} = {recall:.3f}")
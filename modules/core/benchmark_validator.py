@@ -0,0 +1,135 @@
+# modules/core/benchmark_validator.py
+# Compare per-trace validate_memory_trace against the batched TraceValidator on synthetic traces
+#
+# PYTHONPATH=. python modules/core/benchmark_validator.py --traces 1000000
+
+import argparse
+import contextlib
+import io
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from modules.core.trace_validator import (
+    ALLOWED_COMPLETION_STATUSES, ALLOWED_TYPES, ALLOWED_VISIBILITY, MEMORY_TRACE_VALIDATOR, REQUIRED_FIELDS,
+)
+
+
+def synthetic_traces(n: int, invalid_ratio: float = 0.05, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    types = ["goal", "observation", "reflection", "calendar_event"]
+    traces = []
+    for i in range(n):
+        trace = {
+            "id": f"trace-{i}",
+            "type": types[i % 4],
+            "timestamp": (start + timedelta(minutes=7 * i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "content": f"Synthetic trace {i}",
+            "task_id": f"task-{i % 97}",
+            "importance": rng.random(),
+            "duration_minutes": 15 + (i % 8) * 15,
+            "visibility": "private",
+        }
+        if rng.random() < invalid_ratio:
+            broken = rng.choice(["type", "timestamp", "importance", "task_id"])
+            if broken == "task_id":
+                del trace["task_id"]
+            else:
+                trace[broken] = {"type": "unknown", "timestamp": "2025-02-30T00:00:00Z", "importance": 1.5}[broken]
+        traces.append(trace)
+    return traces
+
+
+def per_trace_validate(trace: Dict) -> bool:
+    """The original validate_memory_trace: one trace at a time, printing on failure."""
+    try:
+        # Check required fields
+        for field in REQUIRED_FIELDS:
+            if field not in trace:
+                print(f"[!] Missing required field: {field}")
+                return False
+
+        # Validate trace type
+        if trace["type"] not in ALLOWED_TYPES:
+            print(f"[!] Invalid type: {trace['type']}")
+            return False
+
+        # Validate timestamp
+        datetime.fromisoformat(trace["timestamp"].replace("Z", "+00:00"))
+
+        # Optional field: importance
+        if "importance" in trace:
+            importance = float(trace["importance"])
+            if not (0.0 <= importance <= 1.0):
+                print("[!] Importance must be between 0.0 and 1.0")
+                return False
+
+        # Optional field: collaborators
+        if "collaborators" in trace and not isinstance(trace["collaborators"], list):
+            print("[!] Collaborators must be a list")
+            return False
+
+        # Optional field: embedding
+        if "embedding" in trace and not isinstance(trace["embedding"], list):
+            print("[!] Embedding must be a list of floats")
+            return False
+
+        # Optional field: completion_status
+        if "completion_status" in trace and trace["completion_status"] not in ALLOWED_COMPLETION_STATUSES:
+            print(f"[!] Invalid completion_status: {trace['completion_status']}")
+            return False
+
+        # Optional field: visibility
+        if "visibility" in trace and trace["visibility"] not in ALLOWED_VISIBILITY:
+            print(f"[!] Invalid visibility: {trace['visibility']}")
+            return False
+
+        # Optional field: linked_event_uid
+        if "linked_event_uid" in trace and not isinstance(trace["linked_event_uid"], str):
+            print("[!] linked_event_uid must be a string")
+            return False
+
+        # Optional field: duration_minutes
+        if "duration_minutes" in trace:
+            duration = int(trace["duration_minutes"])
+            if duration <= 0 or duration > 1440:
+                print("[!] duration_minutes must be a positive integer <= 1440")
+                return False
+
+    except Exception as e:
+        print(f"[!] Validation error: {e}")
+        return False
+
+    return True
+
+
+def legacy_count_invalid(traces: List[Dict]) -> int:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return sum(not per_trace_validate(trace) for trace in traces)
+
+
+def time_call(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark per-trace vs batched trace validation")
+    parser.add_argument("--traces", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--skip-legacy", action="store_true", help="Only time the batched validator")
+    args = parser.parse_args()
+
+    for n in args.traces:
+        traces = synthetic_traces(n)
+        counted, invalid = time_call(MEMORY_TRACE_VALIDATOR.count_invalid, traces)
+        reported, report = time_call(MEMORY_TRACE_VALIDATOR.validate, traces)
+        assert report.invalid_count == invalid
+        line = f"→ {n:>8} traces ({invalid} invalid): count {counted:.2f}s, report {reported:.2f}s"
+        if not args.skip_legacy:
+            legacy, legacy_invalid = time_call(legacy_count_invalid, traces)
+            assert legacy_invalid == invalid
+            line += f", per-trace {legacy:.2f}s ({legacy / counted:.1f}x slower)"
+        print(line)
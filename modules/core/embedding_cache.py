@@ -0,0 +1,163 @@
+# modules/core/embedding_cache.py
+# Persistent, content-addressed cache of embeddings keyed by (model, dimensions, sha256(text))
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+DEFAULT_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "data/cache/embeddings.sqlite")
+DEFAULT_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    dimensions INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access);
+"""
+
+
+def normalize_text(text: str) -> str:
+    """NFC-normalise and collapse whitespace so trivially different strings share an entry."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(model: str, dimensions: int, text: str) -> str:
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{model}:{dimensions}:{digest}"
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed embedding cache. Vectors are stored as float32 blobs; once the
+    total exceeds `max_bytes`, the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.current_bytes = self.conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()[0]
+
+    def get_many(self, texts: Sequence[str], model: str, dimensions: int) -> List[Optional[List[float]]]:
+        """Cached vectors for `texts` in order, None where there is no entry."""
+        keys = [cache_key(model, dimensions, text) for text in texts]
+        found: Dict[str, bytes] = {}
+        with self._lock:
+            unique = list(dict.fromkeys(keys))
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                with self.conn:
+                    self.conn.executemany(
+                        "UPDATE embeddings SET last_access = ? WHERE key = ?", [(now, key) for key in found]
+                    )
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return [
+            np.frombuffer(found[key], dtype=np.float32).tolist() if key in found else None
+            for key in keys
+        ]
+
+    def get(self, text: str, model: str, dimensions: int) -> Optional[List[float]]:
+        return self.get_many([text], model, dimensions)[0]
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]], model: str, dimensions: int) -> None:
+        """Store vectors; empty vectors (failed requests) are never cached."""
+        now = time.time()
+        rows = [
+            (cache_key(model, dimensions, text), model, dimensions,
+             np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for text, vector in zip(texts, vectors)
+            if vector is not None and len(vector)
+        ]
+        if not rows:
+            return
+        rows = list({row[0]: row for row in rows}.values())
+        with self._lock:
+            replaced = self._stored_bytes([row[0] for row in rows])
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, model, dimensions, vector, last_access) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+            self.current_bytes += sum(len(row[3]) for row in rows) - replaced
+            self._evict()
+
+    def put(self, text: str, vector: Sequence[float], model: str, dimensions: int) -> None:
+        self.put_many([text], [vector], model, dimensions)
+
+    def _stored_bytes(self, keys: List[str]) -> int:
+        total = 0
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            total += self.conn.execute(
+                f"SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchone()[0]
+        return total
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until under max_bytes (lock held)."""
+        while self.current_bytes > self.max_bytes:
+            rows = self.conn.execute(
+                "SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_access LIMIT 256"
+            ).fetchall()
+            if not rows:
+                self.current_bytes = 0
+                return
+            victims = []
+            for key, size in rows:
+                if self.current_bytes <= self.max_bytes:
+                    break
+                victims.append((key,))
+                self.current_bytes -= size
+            with self.conn:
+                self.conn.executemany("DELETE FROM embeddings WHERE key = ?", victims)
+            self.evictions += len(victims)
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        with self._lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM embeddings")
+            self.current_bytes = 0
@@ -0,0 +1,140 @@
+# modules/core/embedding_store.py
+# Sidecar binary store for trace embeddings: a float32 .npy matrix opened with mmap
+#
+# python modules/core/embedding_store.py data/conversation/embedding   # migrate *_embedded.json files
+
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+DEFAULT_MODEL = "text-embedding-3-small"
+
+
+class EmbeddedTraces(list):
+    """
+    List of traces that also carries the embedding matrix, row-aligned with the list;
+    `normalized` is True when the rows are stored with unit length.
+    """
+
+    def __init__(self, traces: List[Dict], matrix: np.ndarray, normalized: bool = False):
+        super().__init__(traces)
+        self.matrix = matrix
+        self.normalized = normalized
+
+
+def embedding_matrix(traces: List[Dict]) -> np.ndarray:
+    """
+    Return an (n, d) float32 matrix for `traces`. Lists loaded from an EmbeddingStore
+    hand back the memory-mapped matrix itself; anything else is stacked once.
+    """
+    matrix = getattr(traces, "matrix", None)
+    if matrix is not None and len(matrix) == len(traces):
+        return matrix
+    return np.asarray([t["embedding"] for t in traces], dtype=np.float32)
+
+
+class EmbeddingStore:
+    """
+    Embeddings for one trace collection, stored next to each other as:
+
+    - `<base>.npy`          float32 matrix, one row per trace
+    - `<base>.index.json`   {"model", "dim", "ids", "normalized"}: row order and provenance
+    - `<base>.traces.json`  the traces themselves, without their `embedding` lists
+    """
+
+    def __init__(self, base: Union[str, Path]):
+        self.base = Path(base)
+        self.matrix_path = self.base.with_name(self.base.name + ".npy")
+        self.index_path = self.base.with_name(self.base.name + ".index.json")
+        self.traces_path = self.base.with_name(self.base.name + ".traces.json")
+
+        with open(self.index_path, "r") as f:
+            meta = json.load(f)
+        self.model = meta.get("model", DEFAULT_MODEL)
+        self.dim = meta["dim"]
+        self.ids: List[Optional[str]] = meta["ids"]
+        self.normalized = meta.get("normalized", False)
+        self.rows: Dict[str, int] = {trace_id: i for i, trace_id in enumerate(self.ids) if trace_id is not None}
+        self.matrix = np.load(self.matrix_path, mmap_mode="r")
+
+    @staticmethod
+    def exists(base: Union[str, Path]) -> bool:
+        base = Path(base)
+        return base.with_name(base.name + ".npy").exists() and base.with_name(base.name + ".index.json").exists()
+
+    @classmethod
+    def write(cls, base: Union[str, Path], traces: List[Dict], model: str = DEFAULT_MODEL,
+              dim: Optional[int] = None, normalize: bool = True) -> "EmbeddingStore":
+        """
+        Write the embedded traces (those with a `dim`-length embedding) as a new store.
+        With `normalize`, rows are scaled to unit length so cosine search can use the
+        mapped matrix as is (all-zero rows stay zero).
+        """
+        base = Path(base)
+        base.parent.mkdir(parents=True, exist_ok=True)
+        if dim is None:
+            dim = next((len(t["embedding"]) for t in traces if t.get("embedding") is not None and len(t["embedding"])), 0)
+        kept = [t for t in traces if t.get("embedding") is not None and len(t["embedding"]) == dim]
+        if len(kept) < len(traces):
+            print(f"[!] Skipping {len(traces) - len(kept)} trace(s) without a {dim}-dim embedding")
+
+        matrix = np.lib.format.open_memmap(
+            base.with_name(base.name + ".npy"), mode="w+", dtype=np.float32, shape=(len(kept), dim)
+        )
+        for i, trace in enumerate(kept):
+            matrix[i] = trace["embedding"]
+        if normalize and len(kept):
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            np.divide(matrix, norms, out=matrix, where=norms > 0)
+        matrix.flush()
+        del matrix
+
+        with open(base.with_name(base.name + ".traces.json"), "w") as f:
+            json.dump([{k: v for k, v in t.items() if k != "embedding"} for t in kept], f, indent=2)
+        with open(base.with_name(base.name + ".index.json"), "w") as f:
+            json.dump({"model": model, "dim": dim, "ids": [t.get("id") for t in kept], "normalized": normalize}, f)
+        return cls(base)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def vector(self, trace_id: str) -> Optional[np.ndarray]:
+        """Read-only view of one trace's embedding (unit length in a normalized store), or None."""
+        row = self.rows.get(trace_id)
+        return None if row is None else self.matrix[row]
+
+    def traces(self) -> EmbeddedTraces:
+        """Stored traces, each with `embedding` set to a view of its matrix row."""
+        with open(self.traces_path, "r") as f:
+            traces = json.load(f)
+        for i, trace in enumerate(traces):
+            trace["embedding"] = self.matrix[i]
+        return EmbeddedTraces(traces, self.matrix, self.normalized)
+
+
+def store_base_for(json_path: Union[str, Path]) -> Path:
+    """`.../x_embedded.json` -> `.../x_embedded` (the store base next to it)."""
+    json_path = Path(json_path)
+    return json_path.with_suffix("") if json_path.suffix == ".json" else json_path
+
+
+def migrate_embedded_json(json_path: Union[str, Path], model: str = DEFAULT_MODEL) -> EmbeddingStore:
+    """Convert an `*_embedded.json` file (a list of traces with embedding lists) into a store."""
+    with open(json_path, "r") as f:
+        data = json.load(f)
+    traces = data if isinstance(data, list) else data.get("memory", [])
+    return EmbeddingStore.write(store_base_for(json_path), traces, model=model)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate *_embedded.json files to binary embedding stores")
+    parser.add_argument("directory", type=str, help="Directory containing *_embedded.json files")
+    args = parser.parse_args()
+
+    for json_file in sorted(Path(args.directory).glob("*_embedded.json")):
+        store = migrate_embedded_json(json_file)
+        size = store.matrix_path.stat().st_size
+        print(f"[✓] {json_file.name} → {store.matrix_path.name} ({len(store)} x {store.dim}, {size / 1e6:.2f} MB)")
@@ -1,32 +1,156 @@
+# PYTHONPATH=. python modules/core/embeddings.py
+
 import os
 import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Dict, Union
+from typing import List, Dict, Optional, Union
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from modules.core.embedding_cache import EmbeddingCache
+from modules.core.embedding_store import EmbeddingStore
+from modules.core.trace_catalog import load_memory
+
 # Load API key from .env
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+EMBEDDING_MODEL = "text-embedding-3-small"
+USE_EMBEDDING_CACHE = os.getenv("EMBEDDING_CACHE", "1") != "0"
+
+# Batching limits (the embeddings API accepts up to 2048 inputs per request)
+MAX_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", 100_000))
+MAX_BATCH_INPUTS = 2048
+MAX_CONCURRENT_BATCHES = int(os.getenv("EMBEDDING_CONCURRENCY", 4))
+MAX_RETRIES = 4
+
+_embedding_cache: Optional[EmbeddingCache] = None
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Shared on-disk embedding cache, opened on first use (disable with EMBEDDING_CACHE=0)."""
+    global _embedding_cache
+    if _embedding_cache is None and USE_EMBEDDING_CACHE:
+        _embedding_cache = EmbeddingCache()
+    return _embedding_cache
+
 def get_openai_embedding(text: str) -> List[float]:
+    cache = get_embedding_cache()
+    if cache is not None:
+        cached = cache.get(text, EMBEDDING_MODEL, 0)
+        if cached is not None:
+            return cached
     try:
         response = client.embeddings.create(
             input=[text],
-            model="text-embedding-3-small"
+            model=EMBEDDING_MODEL
         )
-        return response.data[0].embedding
+        embedding = response.data[0].embedding
     except Exception as e:
         print(f"[Embedding Error] {e}")
         return []
+    if cache is not None:
+        cache.put(text, embedding, EMBEDDING_MODEL, 0)
+    return embedding
+
+# --- Batched Embedding ---
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used only to size batches."""
+    return len(text) // 4 + 1
+
+def make_batches(texts: List[str], max_tokens: int = MAX_BATCH_TOKENS,
+                 max_inputs: int = MAX_BATCH_INPUTS) -> List[List[int]]:
+    """Group text positions into batches under the token and input-count budgets."""
+    batches, current, current_tokens = [], [], 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_inputs):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def request_embeddings(texts: List[str], model: str = EMBEDDING_MODEL, max_retries: int = MAX_RETRIES,
+                       backoff: float = 1.0, api_client: Optional[OpenAI] = None,
+                       dimensions: Optional[int] = None) -> List[List[float]]:
+    """Embed one batch, retrying with exponential backoff and jitter."""
+    api_client = api_client or client
+    options = {"dimensions": dimensions} if dimensions else {}
+    for attempt in range(max_retries + 1):
+        try:
+            response = api_client.embeddings.create(input=texts, model=model, **options)
+            return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = backoff * (2 ** attempt) * (0.5 + random.random())
+            print(f"[Embedding Retry] batch of {len(texts)} failed ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+def get_openai_embeddings(texts: List[str], model: str = EMBEDDING_MODEL, dimensions: Optional[int] = None,
+                          max_tokens: int = MAX_BATCH_TOKENS, max_inputs: int = MAX_BATCH_INPUTS,
+                          max_concurrency: int = MAX_CONCURRENT_BATCHES, max_retries: int = MAX_RETRIES,
+                          backoff: float = 1.0, api_client: Optional[OpenAI] = None,
+                          use_cache: bool = True) -> List[List[float]]:
+    """
+    Embed many texts with as few requests as possible. Cached texts and repeats are
+    not sent; the rest are batched, run concurrently and returned in input order.
+    Texts in a batch that still fails after all retries (and empty texts) get an
+    empty list, as in get_openai_embedding.
+    """
+    results: List[List[float]] = [[] for _ in texts]
+    cache = get_embedding_cache() if use_cache else None
+    if cache is not None:
+        for i, cached in enumerate(cache.get_many(texts, model, dimensions or 0)):
+            if cached is not None:
+                results[i] = cached
+
+    # One request slot per distinct uncached text
+    pending: Dict[str, List[int]] = {}
+    for i, text in enumerate(texts):
+        if text and not results[i]:
+            pending.setdefault(text, []).append(i)
+    unique = list(pending)
+    batches = make_batches(unique, max_tokens, max_inputs)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+        futures = {
+            pool.submit(request_embeddings, [unique[j] for j in batch], model, max_retries, backoff,
+                        api_client, dimensions): batch
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                vectors = future.result()
+            except Exception as e:
+                print(f"[Embedding Error] batch of {len(batch)} failed: {e}")
+                continue
+            for j, vector in zip(batch, vectors):
+                for i in pending[unique[j]]:
+                    results[i] = vector
+            if cache is not None:
+                cache.put_many([unique[j] for j in batch], vectors, model, dimensions or 0)
+    return results
 
 def embed_trace(trace: Dict[str, Union[str, List[float]]]) -> List[float]:
     return get_openai_embedding(trace.get("content", ""))
 
-def embed_memory_traces(traces: List[Dict], overwrite: bool = False) -> List[Dict]:
-    for trace in traces:
-        if overwrite or "embedding" not in trace or not trace["embedding"]:
-            trace["embedding"] = embed_trace(trace)
+def embed_memory_traces(traces: List[Dict], overwrite: bool = False, **batch_options) -> List[Dict]:
+    """Embed every trace that lacks an embedding, in batches (see get_openai_embeddings)."""
+    pending = [
+        trace for trace in traces
+        if overwrite or trace.get("embedding") is None or len(trace["embedding"]) == 0
+    ]
+    vectors = get_openai_embeddings([trace.get("content", "") for trace in pending], **batch_options)
+    for trace, vector in zip(pending, vectors):
+        trace["embedding"] = vector
     return traces
 if __name__ == "__main__":
     # Make script location robust
@@ -38,13 +162,8 @@ if __name__ == "__main__":
 
     # Iterate over all JSON files in the input directory
     for input_file in input_dir.glob("*.json"):
-        output_path = output_dir / f"{input_file.stem}_embedded.json"
-
         if input_file.exists():
-            with open(input_file, "r") as f:
-                session_data = json.load(f)
-
-            memory = session_data.get("memory", [])
+            memory = load_memory(input_file)
             embedded = embed_memory_traces(memory)
 
             for trace in embedded[:2]:
@@ -54,10 +173,9 @@ if __name__ == "__main__":
             valid = [t for t in embedded if "embedding" in t and len(t["embedding"]) == 1536]
             print(f"[✓] Embedded {len(valid)} of {len(embedded)} traces successfully.")
 
-            with open(output_path, "w") as f:
-                json.dump(embedded, f, indent=2)
-
-            print(f"[✓] Saved to {output_path.resolve()}")
+            # Vectors go to a float32 sidecar store instead of JSON float lists
+            store = EmbeddingStore.write(output_dir / f"{input_file.stem}_embedded", embedded)
+            print(f"[✓] Saved to {store.matrix_path.resolve()}")
         else:
             print(f"[Error] File not found: {input_file.resolve()}")
 
@@ -0,0 +1,74 @@
+# modules/core/exact_search.py
+# Exact cosine top-k over a pre-normalised embedding matrix (BLAS products + argpartition)
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from modules.core.embedding_store import EmbeddedTraces, embedding_matrix
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Float32, C-contiguous copy with unit-length rows; all-zero rows stay zero (cosine 0 to everything)."""
+    matrix = np.array(matrix, dtype=np.float32, order="C", ndmin=2)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Indices and scores of the k highest entries in each row of `scores`, best first.
+    Uses argpartition, so only the k selected entries are sorted; ties keep index order.
+    """
+    scores = np.atleast_2d(scores)
+    n = scores.shape[1]
+    k = min(k, n)
+    if k <= 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.int64), empty.astype(scores.dtype)
+    if k < n:
+        candidates = np.sort(np.argpartition(-scores, k - 1, axis=1)[:, :k], axis=1)
+    else:
+        candidates = np.broadcast_to(np.arange(n), scores.shape)
+    picked = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-picked, axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(picked, order, axis=1)
+
+
+class ExactIndex:
+    """
+    Normalises the embedding matrix once; every query is then a single matrix-vector
+    (or, for a batch of queries, matrix-matrix) product. Traces from a store written
+    with unit-length rows are searched in the mapped matrix itself, without a copy.
+    """
+
+    def __init__(self, traces: List[Dict], matrix: Optional[np.ndarray] = None):
+        self.traces = traces
+        if matrix is None and getattr(traces, "normalized", False):
+            self.matrix = embedding_matrix(traces)
+        else:
+            self.matrix = normalize_rows(embedding_matrix(traces) if matrix is None else matrix)
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    def scores(self, queries: np.ndarray) -> np.ndarray:
+        """Cosine scores, shape (n,) for one query vector or (q, n) for a query matrix."""
+        queries = np.asarray(queries, dtype=np.float32)
+        scores = normalize_rows(queries) @ self.matrix.T
+        return scores[0] if queries.ndim == 1 else scores
+
+    def search(self, queries: np.ndarray, k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """(indices, scores) of the top-k rows, each of shape (q, k); a 1-D query gives q = 1."""
+        return top_k(np.atleast_2d(self.scores(queries)), k)
+
+
+def exact_index(traces: List[Dict]) -> ExactIndex:
+    """ExactIndex for `traces`; store-loaded lists keep theirs, so repeat queries reuse it."""
+    index = getattr(traces, "exact_index", None)
+    if index is None:
+        index = ExactIndex(traces)
+        if isinstance(traces, EmbeddedTraces):
+            traces.exact_index = index
+    return index
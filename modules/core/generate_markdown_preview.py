@@ -1,45 +1,14 @@
 # python modules/core/generate_markdown_preview.py
 
 import json
-from datetime import datetime
 from pathlib import Path
 from typing import List, Dict
 
-def parse_ics_datetime(dt_str: str) -> str:
-    """Convert ICS datetime to ISO 8601."""
-    return datetime.strptime(dt_str.strip(), "%Y%m%dT%H%M%SZ").isoformat() + "Z"
+from modules.calendar_io.ics_tokenizer import iter_ics_events
 
 def import_ics(filepath: str) -> List[Dict]:
     """Import events from .ics into list of memory traces."""
-    with open(filepath, "r") as f:
-        content = f.read()
-
-    events = []
-    for block in content.split("BEGIN:VEVENT")[1:]:
-        lines = block.strip().splitlines()
-        trace = {"type": "calendar_event"}
-        for line in lines:
-            if line.startswith("SUMMARY:"):
-                trace["title"] = line[8:].strip()
-            elif line.startswith("DESCRIPTION:"):
-                trace["content"] = line[12:].strip()
-            elif line.startswith("DTSTART:"):
-                trace["timestamp"] = parse_ics_datetime(line[8:].strip())
-            elif line.startswith("DTEND:"):
-                trace["end"] = parse_ics_datetime(line[6:].strip())
-            elif line.startswith("UID:"):
-                trace["id"] = line[4:].strip()
-            elif line.startswith("LOCATION:"):
-                trace["location"] = line[9:].strip()
-
-        if "timestamp" in trace and "end" in trace:
-            start = datetime.fromisoformat(trace["timestamp"].replace("Z", "+00:00"))
-            end = datetime.fromisoformat(trace["end"].replace("Z", "+00:00"))
-            trace["duration_minutes"] = int((end - start).total_seconds() / 60)
-
-        events.append(trace)
-
-    return events
+    return list(iter_ics_events(filepath))
 
 def traces_to_markdown_table(traces: List[Dict]) -> str:
     """Format memory traces into a Markdown table."""
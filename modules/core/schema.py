@@ -3,94 +3,37 @@ from datetime import datetime
 import json
 import os
 
-# Allowed values for trace fields
-REQUIRED_FIELDS = ["id", "type", "timestamp", "content", "task_id"]
-ALLOWED_TYPES = {"goal", "observation", "reflection", "calendar_event"}
-ALLOWED_COMPLETION_STATUSES = {"pending", "done", "scheduled", "canceled"}
-ALLOWED_VISIBILITY = {"private", "shared", "public"}
+from modules.core.trace_catalog import load_memory
+from modules.core.trace_validator import (
+    ALLOWED_COMPLETION_STATUSES, ALLOWED_TYPES, ALLOWED_VISIBILITY, MEMORY_TRACE_VALIDATOR, REQUIRED_FIELDS,
+    validate_traces,
+)
 
-def validate_memory_trace(trace: Dict) -> bool:
+def validate_memory_trace(trace: Dict, verbose: bool = True) -> bool:
     """
     Validate a memory trace based on required fields, types, and optional metadata.
-    Returns True if valid, False otherwise.
+    Returns True if valid, False otherwise. Bulk callers should use
+    trace_validator.validate_traces / count_invalid instead.
     """
-    try:
-        # Check required fields
-        for field in REQUIRED_FIELDS:
-            if field not in trace:
-                print(f"[!] Missing required field: {field}")
-                return False
-
-        # Validate trace type
-        if trace["type"] not in ALLOWED_TYPES:
-            print(f"[!] Invalid type: {trace['type']}")
-            return False
-
-        # Validate timestamp
-        datetime.fromisoformat(trace["timestamp"].replace("Z", "+00:00"))
-
-        # Optional field: importance
-        if "importance" in trace:
-            importance = float(trace["importance"])
-            if not (0.0 <= importance <= 1.0):
-                print("[!] Importance must be between 0.0 and 1.0")
-                return False
-
-        # Optional field: collaborators
-        if "collaborators" in trace and not isinstance(trace["collaborators"], list):
-            print("[!] Collaborators must be a list")
-            return False
-
-        # Optional field: embedding
-        if "embedding" in trace and not isinstance(trace["embedding"], list):
-            print("[!] Embedding must be a list of floats")
-            return False
-
-        # Optional field: completion_status
-        if "completion_status" in trace and trace["completion_status"] not in ALLOWED_COMPLETION_STATUSES:
-            print(f"[!] Invalid completion_status: {trace['completion_status']}")
-            return False
-
-        # Optional field: visibility
-        if "visibility" in trace and trace["visibility"] not in ALLOWED_VISIBILITY:
-            print(f"[!] Invalid visibility: {trace['visibility']}")
-            return False
-
-        # Optional field: linked_event_uid
-        if "linked_event_uid" in trace and not isinstance(trace["linked_event_uid"], str):
-            print("[!] linked_event_uid must be a string")
-            return False
-
-        # Optional field: duration_minutes
-        if "duration_minutes" in trace:
-            duration = int(trace["duration_minutes"])
-            if duration <= 0 or duration > 1440:
-                print("[!] duration_minutes must be a positive integer <= 1440")
-                return False
-
-    except Exception as e:
-        print(f"[!] Validation error: {e}")
-        return False
-
-    return True
+    errors = MEMORY_TRACE_VALIDATOR.errors(trace)
+    if errors and verbose:
+        print(f"[!] {errors[0].message}")
+    return not errors
 
 
 def load_traces_from_json(path: str) -> List[Dict]:
     if not os.path.exists(path):
         raise FileNotFoundError(f"File not found: {path}")
-    with open(path, "r") as f:
-        return json.load(f).get("memory", [])
+    return load_memory(path)
 
 
 def validate_trace_file(path: str) -> bool:
     traces = load_traces_from_json(path)
-    all_valid = True
-    for trace in traces:
-        is_valid = validate_memory_trace(trace)
-        print(f"Trace {trace['id']}: {'Valid' if is_valid else 'Invalid'}")
-        if not is_valid:
-            all_valid = False
-    return all_valid
+    report = validate_traces(traces)
+    for error in report.errors:
+        print(f"[!] Trace {error.trace_id or error.index}: {error.message}")
+    print(f"Valid: {len(traces) - report.invalid_count}, invalid: {report.invalid_count}")
+    return report.invalid_count == 0
 
 
 # Optional: ICS export example (not actively used if using custom writer)
@@ -1,16 +1,17 @@
 # generate_tempo_context.py
 
-from ics import Calendar
 from datetime import datetime
 from pathlib import Path
 import re
 import argparse
 
+from modules.calendar_io.ics_events import load_calendar_events
+
 # === Tempo Token Encoder === #
 def generate_tempo_tokens(event):
     tokens = []
-    start = event.begin.datetime
-    end = event.end.datetime
+    start = event.begin
+    end = event.end
 
     # Absolute datetime token
     tokens.append(f"<tempo:{start.strftime('%Y-%m-%dT%H:%MZ')}>")
@@ -56,7 +57,7 @@ def generate_tempo_tokens(event):
 
 # === Natural Language Context Generator === #
 def event_to_context_sentence(event):
-    start = event.begin.datetime.strftime("%I:%M %p").lstrip("0")
+    start = event.begin.strftime("%I:%M %p").lstrip("0")
     title = event.name or "Untitled Event"
     desc = (event.description or "").strip()
     return f"At {start}, the user has an event titled '{title}'. {desc}"
@@ -65,11 +66,8 @@ def event_to_context_sentence(event):
 
 # === System Prompt Builder === #
 def generate_system_prompt_from_ics(ics_path: Path) -> str:
-    with open(ics_path, 'r') as f:
-        calendar = Calendar(f.read())
-
     prompt_blocks = []
-    for event in sorted(calendar.events, key=lambda e: e.begin):
+    for event in sorted(load_calendar_events(ics_path), key=lambda e: e.begin):
         tokens = generate_tempo_tokens(event)
         sentence = event_to_context_sentence(event)
         block = f"Event: {event.name}\nTokens: {' '.join(tokens)}\nSummary: {sentence}"
@@ -0,0 +1,206 @@
+# modules/core/time_index.py
+# Sorted time index over memory traces for range, overlap and ISO-week queries
+
+import heapq
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from modules.calendar_io.recurrence import add_override, occurrence_trace, trace_recurrence
+
+TimeLike = Union[str, datetime, date, int, float]
+
+
+def to_epoch(value: TimeLike) -> int:
+    """Convert an ISO string, date/datetime or epoch number to epoch seconds. Naive values are UTC."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    elif not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def trace_interval(trace: Dict) -> Optional[tuple]:
+    """Return (start, end) epoch seconds for a trace, or None without a usable timestamp."""
+    try:
+        start = to_epoch(trace["timestamp"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    end = start
+    try:
+        if trace.get("end"):
+            end = to_epoch(trace["end"])
+        elif trace.get("duration_minutes"):
+            end = start + int(trace["duration_minutes"]) * 60
+    except (TypeError, ValueError):
+        pass
+    return start, max(start, end)
+
+
+class _DurationBucket:
+    """Intervals whose durations share a power-of-two class, sorted by (start, row)."""
+
+    __slots__ = ("starts", "rows", "ends", "max_duration")
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.rows: List[int] = []
+        self.ends: List[int] = []
+        self.max_duration = 0
+
+    def add(self, start: int, row: int, end: int) -> None:
+        pos = bisect_right(self.starts, start)
+        self.starts.insert(pos, start)
+        self.rows.insert(pos, row)
+        self.ends.insert(pos, end)
+        self.max_duration = max(self.max_duration, end - start)
+
+    def overlapping(self, s: int, e: int) -> Iterator[Tuple[int, int]]:
+        """(start, row) of intervals intersecting [s, e]; see TimeIndex.overlapping."""
+        lo = bisect_left(self.starts, s - self.max_duration)
+        hi = bisect_right(self.starts, e)
+        for i in range(lo, hi):
+            if self.ends[i] > s or self.starts[i] >= s:
+                yield self.starts[i], self.rows[i]
+
+
+class TimeIndex:
+    """
+    Traces sorted by start time. Range and ISO-week queries are two binary searches.
+
+    Overlap queries search intervals bucketed by duration (powers of two): within a
+    bucket only traces starting up to that bucket's longest duration before the probe
+    can still be running, so one multi-day block does not widen the search for every
+    short event.
+
+    Traces with a `recurrence` are kept aside and expanded lazily into occurrence
+    traces for each query's window only, so infinite rules are safe to index. An
+    instance moved by a RECURRENCE-ID override in the index is left out of its series.
+    """
+
+    def __init__(self, traces: Iterable[Dict] = ()):
+        self.traces: List[Dict] = []
+        self.skipped = 0
+        self._starts: List[int] = []
+        self._rows: List[int] = []
+        self._buckets: Dict[int, _DurationBucket] = {}
+        self.recurring: List[tuple] = []
+        self._overridden: Dict[str, Set[datetime]] = {}
+
+        entries = []
+        for trace in traces:
+            add_override(self._overridden, trace)
+            if trace.get("recurrence") and self._add_recurring(trace):
+                continue
+            interval = trace_interval(trace)
+            if interval is None:
+                self.skipped += 1
+                continue
+            entries.append((interval[0], len(self.traces), interval[1]))
+            self.traces.append(trace)
+        entries.sort()
+        self._starts = [e[0] for e in entries]
+        self._rows = [e[1] for e in entries]
+        for start, row, end in entries:
+            bucket = self._buckets.setdefault((end - start).bit_length(), _DurationBucket())
+            bucket.starts.append(start)
+            bucket.rows.append(row)
+            bucket.ends.append(end)
+            bucket.max_duration = max(bucket.max_duration, end - start)
+
+    def __len__(self) -> int:
+        return len(self._starts) + len(self.recurring)
+
+    def _add_recurring(self, trace: Dict) -> bool:
+        interval = trace_interval(trace)
+        if interval is None:
+            return False
+        try:
+            recurrence = trace_recurrence(trace)
+        except (ValueError, IndexError):
+            return False
+        self.recurring.append((trace, recurrence, interval[1] - interval[0]))
+        return True
+
+    def _occurrences(self, lo: int, hi: int, running: bool = False) -> List[tuple]:
+        """
+        (start, end, occurrence trace) for recurring occurrences starting in [lo, hi];
+        with `running`, also those that started earlier and still intersect [lo, hi].
+        """
+        found = []
+        end = datetime.fromtimestamp(hi, timezone.utc)
+        for trace, recurrence, duration in self.recurring:
+            first = datetime.fromtimestamp(lo - duration if running else lo, timezone.utc)
+            exclude = self._overridden.get(trace.get("id"), ())
+            for occurrence in recurrence.between(first, end, exclude):
+                t = int(occurrence.timestamp())
+                if running and not (t + duration > lo or t >= lo):
+                    continue
+                found.append((t, t + duration, occurrence_trace(trace, occurrence)))
+        found.sort(key=lambda entry: entry[0])
+        return found
+
+    def _merge(self, static: List[Tuple[int, int]], occurrences: List[tuple]) -> List[Dict]:
+        """Static (start, row) pairs and occurrences, merged on their already-computed starts."""
+        if not occurrences:
+            return [self.traces[row] for _, row in static]
+        merged = heapq.merge(((start, self.traces[row]) for start, row in static),
+                             ((o[0], o[2]) for o in occurrences), key=lambda entry: entry[0])
+        return [trace for _, trace in merged]
+
+    def add(self, trace: Dict) -> bool:
+        """Insert one trace in sorted position. Returns False if it has no usable timestamp."""
+        add_override(self._overridden, trace)
+        if trace.get("recurrence") and self._add_recurring(trace):
+            return True
+        interval = trace_interval(trace)
+        if interval is None:
+            self.skipped += 1
+            return False
+        start, end = interval
+        row = len(self.traces)
+        self.traces.append(trace)
+        pos = bisect_right(self._starts, start)
+        self._starts.insert(pos, start)
+        self._rows.insert(pos, row)
+        self._buckets.setdefault((end - start).bit_length(), _DurationBucket()).add(start, row, end)
+        return True
+
+    def extend(self, traces: Iterable[Dict]) -> int:
+        return sum(1 for trace in traces if self.add(trace))
+
+    # --- Queries ---
+
+    def range(self, start: TimeLike, end: TimeLike) -> List[Dict]:
+        """Traces with start <= timestamp <= end, in chronological order."""
+        s, e = to_epoch(start), to_epoch(end)
+        lo = bisect_left(self._starts, s)
+        hi = bisect_right(self._starts, e)
+        static = list(zip(self._starts[lo:hi], self._rows[lo:hi]))
+        return self._merge(static, self._occurrences(s, e) if self.recurring else [])
+
+    def at(self, moment: TimeLike) -> List[Dict]:
+        """Traces whose [start, end) interval contains `moment`; zero-length traces match their start."""
+        t = to_epoch(moment)
+        return self.overlapping(t, t)
+
+    def overlapping(self, start: TimeLike, end: TimeLike) -> List[Dict]:
+        """Traces whose interval intersects [start, end]."""
+        s, e = to_epoch(start), to_epoch(end)
+        static = sorted(entry for bucket in self._buckets.values() for entry in bucket.overlapping(s, e))
+        return self._merge(static, self._occurrences(s, e, running=True) if self.recurring else [])
+
+    def iso_week(self, year: int, week: int) -> List[Dict]:
+        """Traces falling in the given ISO week (UTC)."""
+        monday = date.fromisocalendar(year, week, 1)
+        start = datetime(monday.year, monday.month, monday.day, tzinfo=timezone.utc)
+        s, e = int(start.timestamp()), int((start + timedelta(days=7)).timestamp())
+        lo = bisect_left(self._starts, s)
+        hi = bisect_left(self._starts, e)
+        static = list(zip(self._starts[lo:hi], self._rows[lo:hi]))
+        return self._merge(static, self._occurrences(s, e - 1) if self.recurring else [])
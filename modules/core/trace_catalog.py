@@ -0,0 +1,117 @@
+# modules/core/trace_catalog.py
+# Process-wide cache of parsed trace JSON files, validated by (path, mtime_ns, size)
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+DEFAULT_MAX_BYTES = int(os.getenv("TRACE_CATALOG_MAX_BYTES", 256 * 1024 * 1024))
+
+
+def copy_json(value: Any) -> Any:
+    """Copy of a decoded JSON value: new dicts and lists, shared immutable leaves."""
+    if isinstance(value, dict):
+        return {k: copy_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [copy_json(v) for v in value]
+    return value
+
+
+class TraceCatalog:
+    """
+    LRU cache of decoded JSON documents. An entry is reused only while the file's
+    mtime and size are unchanged, so a repeated read costs one stat() call.
+
+    Memory is accounted by on-disk file size; `max_bytes` caps the total.
+    Callers get their own copy of the document (dicts and lists are copied, strings
+    and numbers shared), so mutating a trace never reaches the cache. Read-only hot
+    paths may pass `copy=False` to get the cached object itself and must not mutate it.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, path: Union[str, Path], copy: bool = True) -> Any:
+        """Return the parsed JSON document at `path`, decoding it only if it changed."""
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy_json(entry[1]) if copy else entry[1]
+            self.misses += 1
+
+        with open(key, "r") as f:
+            data = json.load(f)
+
+        with self._lock:
+            self._discard(key)
+            if stat.st_size <= self.max_bytes:
+                self._entries[key] = (version, data)
+                self.current_bytes += stat.st_size
+                self._evict()
+        return copy_json(data) if copy else data
+
+    def load_memory(self, path: Union[str, Path], copy: bool = True) -> List[Dict]:
+        """Return the trace list of a session file (`{"memory": [...]}`) or a bare list file."""
+        data = self.load(path, copy=False)
+        traces = data if isinstance(data, list) else data.get("memory", [])
+        return copy_json(traces) if copy else traces
+
+    def invalidate(self, path: Union[str, Path]) -> None:
+        with self._lock:
+            self._discard(os.path.abspath(path))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    # --- Internal helpers (lock held) ---
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[0][1]
+
+    def _evict(self) -> None:
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, (version, _) = self._entries.popitem(last=False)
+            self.current_bytes -= version[1]
+            self.evictions += 1
+
+
+# Shared catalog for the whole process
+catalog = TraceCatalog()
+
+
+def load_json(path: Union[str, Path], copy: bool = True) -> Any:
+    return catalog.load(path, copy)
+
+
+def load_memory(path: Union[str, Path], copy: bool = True) -> List[Dict]:
+    return catalog.load_memory(path, copy)
@@ -1,15 +1,21 @@
+# PYTHONPATH=. python modules/core/trace_evaluator.py
+
 import os
 import json
 import numpy as np
 from pathlib import Path
-from typing import List, Dict, Union
-from embeddings import embed_trace
+from typing import List, Dict, Optional
 from dotenv import load_dotenv
 from openai import OpenAI
 from openTSNE import TSNE
 import matplotlib.pyplot as plt
 import faiss
 
+from modules.core.ann_index import TraceANNIndex
+from modules.core.embeddings import embed_trace
+from modules.core.embedding_store import EmbeddingStore, embedding_matrix, store_base_for
+from modules.core.exact_search import ExactIndex, exact_index, top_k as top_k_rows
+
 # Load environment variables for OpenAI
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
@@ -22,27 +28,68 @@ def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
     return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
 
 def load_embedded_traces(file_path: Path) -> List[Dict]:
-    """Load memory traces with embeddings from a JSON file."""
+    """
+    Load memory traces with embeddings. If a binary store sits next to the JSON file,
+    embeddings are memory-mapped rows of its matrix instead of decoded float lists.
+    """
+    base = store_base_for(file_path)
+    if EmbeddingStore.exists(base):
+        return EmbeddingStore(base).traces()
     with open(file_path, "r") as f:
         traces = json.load(f)
     return [t for t in traces if "embedding" in t and len(t["embedding"]) == 1536]
 
-def rank_traces_by_query(traces: List[Dict], query: str) -> List[Dict]:
-    """Rank memory traces by similarity to a natural language query."""
-    query_vec = embed_trace({"content": query})
-    ranked = sorted(
-        traces,
-        key=lambda t: cosine_similarity(t["embedding"], query_vec),
-        reverse=True
-    )
-    return ranked
-
-def display_top_traces(traces: List[Dict], query: str, top_k: int = 5):
-    """Print top-k most similar traces to a query."""
+class RankedTraces(list):
+    """Traces in rank order, carrying their similarity `scores` (aligned with the list)."""
+
+    def __init__(self, traces: List[Dict], scores: np.ndarray):
+        super().__init__(traces)
+        self.scores = scores
+
+def rank_traces_by_query(traces: List[Dict], query: str, top_k: Optional[int] = None,
+                         index: Optional[ExactIndex] = None) -> RankedTraces:
+    """
+    Rank memory traces by similarity to a natural language query. Traces loaded from
+    an EmbeddingStore reuse one ExactIndex across queries; for plain lists pass an
+    ExactIndex built once over `traces`. `top_k` selects only the best k instead of
+    sorting everything.
+    """
+    if index is None:
+        index = exact_index(traces)
+    scores = index.scores(np.asarray(embed_trace({"content": query}), dtype=np.float32))
+    if top_k is None:
+        order = np.argsort(-scores, kind="stable")
+    else:
+        order = top_k_rows(scores, top_k)[0][0]
+    return RankedTraces([traces[i] for i in order], scores[order])
+
+def rank_traces_by_queries(traces: List[Dict], queries: List[str], top_k: int = 5,
+                           index: Optional[ExactIndex] = None) -> List[RankedTraces]:
+    """Top-k traces for several queries with one matrix-matrix product."""
+    if index is None:
+        index = exact_index(traces)
+    query_vecs = np.asarray([embed_trace({"content": q}) for q in queries], dtype=np.float32)
+    rows, scores = index.search(query_vecs, top_k)
+    return [RankedTraces([traces[i] for i in row], row_scores) for row, row_scores in zip(rows, scores)]
+
+def search_traces_ann(index: TraceANNIndex, traces: List[Dict], query: str, top_k: int = 5, **filters) -> List[Dict]:
+    """Top-k traces from a TraceANNIndex; `filters` are passed to index.search (types, start, end)."""
+    by_id = {t.get("id"): t for t in traces}
+    query_vec = np.asarray(embed_trace({"content": query}), dtype=np.float32)
+    return [by_id[trace_id] for trace_id, _ in index.search(query_vec, top_k, **filters)[0] if trace_id in by_id]
+
+def display_top_traces(traces: List[Dict], query: str, top_k: int = 5, scores: Optional[np.ndarray] = None):
+    """
+    Print top-k most similar traces to a query. Scores come from `scores` or from the
+    RankedTraces returned by rank_traces_by_query; they are only recomputed otherwise.
+    """
     print(f"\nTop {top_k} traces for query: '{query}'")
-    query_vec = embed_trace({"content": query})
-    for i, trace in enumerate(traces[:top_k]):
-        score = cosine_similarity(trace["embedding"], query_vec)
+    shown = traces[:top_k]
+    if scores is None:
+        scores = getattr(traces, "scores", None)
+    if scores is None:
+        scores = ExactIndex(shown).scores(np.asarray(embed_trace({"content": query}), dtype=np.float32))
+    for i, (trace, score) in enumerate(zip(shown, scores)):
         print(f"\nRank {i+1} – ID: {trace.get('id', 'unknown')}")
         print(f"Type: {trace.get('type', 'N/A')}")
         print(f"Timestamp: {trace.get('timestamp', 'N/A')}")
@@ -56,7 +103,7 @@ from openTSNE.affinity import PerplexityBasedNN
 from openTSNE.initialization import pca
 
 def visualize_traces_tsne_pytorch(traces: List[Dict]):
-    embeddings = np.array([t["embedding"] for t in traces], dtype=np.float32)
+    embeddings = np.ascontiguousarray(embedding_matrix(traces))
     labels = [t.get("type", "unknown") for t in traces]
 
     affinities = PerplexityBasedNN(embeddings, perplexity=30, metric="cosine", method="annoy")
@@ -80,7 +127,7 @@ def visualize_traces_tsne_pytorch(traces: List[Dict]):
 
 
 def cluster_traces_faiss(traces: List[Dict], n_clusters: int = 5) -> List[Dict]:
-    embeddings = np.array([t["embedding"] for t in traces], dtype='float32')
+    embeddings = np.ascontiguousarray(embedding_matrix(traces))
     kmeans = faiss.Kmeans(d=embeddings.shape[1], k=n_clusters, niter=20, verbose=False)
     kmeans.train(embeddings)
     distances, assignments = kmeans.index.search(embeddings, 1)
@@ -97,13 +144,13 @@ if __name__ == "__main__":
     data_dir = Path("/Users/derekrosenzweig/Documents/GitHub/chronologue/data/conversation/embedding")
     file_to_evaluate = data_dir / "lab_manager_2025_traces_embedded.json"  
 
-    if not file_to_evaluate.exists():
+    if not file_to_evaluate.exists() and not EmbeddingStore.exists(store_base_for(file_to_evaluate)):
         print(f"[!] File not found: {file_to_evaluate}")
         exit(1)
 
     traces = load_embedded_traces(file_to_evaluate)
     query = "Lab safety inspection and reagent restock"
-    ranked_traces = rank_traces_by_query(traces, query)
+    ranked_traces = rank_traces_by_query(traces, query, top_k=5)
     display_top_traces(ranked_traces, query, top_k=5)
 
     traces = load_embedded_traces(file_to_evaluate)
@@ -0,0 +1,250 @@
+# modules/core/trace_log.py
+# Append-only JSONL trace log with a sidecar id -> byte offset index
+#
+# python modules/core/trace_log.py to-log data/conversation/raw/lab_manager_4-12.json data/conversation/log/lab_manager_4-12.jsonl
+# python modules/core/trace_log.py to-json data/conversation/log/lab_manager_4-12.jsonl out.json
+
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+INDEX_SUFFIX = ".idx"
+# Writers compact once superseded versions and tombstones make up this share of the log
+COMPACT_RATIO = float(os.getenv("TRACE_LOG_COMPACT_RATIO", 0.5))
+
+
+class TraceLog:
+    """
+    Traces are appended one JSON object per line. Writing a trace whose id already
+    exists appends a new version; the index always points at the latest one.
+
+    The sidecar index (`<log>.idx`) is itself append-only: one `id<TAB>offset<TAB>flag`
+    line per write, replayed on open. If it is missing or behind the log, the tail of
+    the log is re-scanned, so a crash between the two writes loses nothing; a torn
+    final record is truncated and unreadable lines are skipped with a warning.
+
+    Removing a trace appends a tombstone record (`{"id": ..., "_deleted": true}`),
+    indexed with flag 1; compaction drops both.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + INDEX_SUFFIX)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.touch(exist_ok=True)
+        self.offsets: Dict[str, int] = {}
+        self.records = 0
+        self._load_index()
+
+    # --- Index maintenance ---
+
+    def _load_index(self) -> None:
+        entries = []
+        if self.index_path.exists():
+            with open(self.index_path, "r") as f:
+                try:
+                    for line in f:
+                        trace_id, offset, flag = line.rstrip("\n").rsplit("\t", 2)
+                        entries.append((trace_id, int(offset), flag == "1"))
+                except ValueError:
+                    entries = None
+
+        # The last indexed record must still be where the index says it is
+        if entries is None or (entries and self._read_id(entries[-1][1]) != entries[-1][0]):
+            print(f"[!] Index out of sync with {self.path.name}, rebuilding")
+            entries = []
+            self.index_path.unlink()
+
+        for trace_id, offset, deleted in entries:
+            self._apply(trace_id, offset, deleted)
+        self.records = len(entries)
+        self._scan_tail(entries[-1][1] if entries else None)
+
+    def _apply(self, trace_id: str, offset: int, deleted: bool) -> None:
+        """Replay one index entry."""
+        if deleted:
+            self.offsets.pop(trace_id, None)
+        else:
+            self.offsets[trace_id] = offset
+
+    def _read_id(self, offset: int) -> Optional[str]:
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            line = f.readline()
+        try:
+            trace_id = json.loads(line).get("id")
+        except (ValueError, AttributeError):
+            return None
+        return None if trace_id is None else str(trace_id)
+
+    def _scan_tail(self, last_indexed: Optional[int]) -> None:
+        """Index records written after `last_indexed` (the whole log if None)."""
+        missing = []
+        torn_at = None
+        unreadable = 0
+        with open(self.path, "rb") as f:
+            if last_indexed is not None:
+                f.seek(last_indexed)
+                f.readline()
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                if not line.endswith(b"\n"):
+                    # Torn final write: drop it so the next append starts on a clean line
+                    torn_at = offset
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    unreadable += 1
+                    continue
+                if isinstance(record, dict) and record.get("id") is not None:
+                    missing.append((str(record["id"]), offset, bool(record.get("_deleted"))))
+        if unreadable:
+            print(f"[!] Skipped {unreadable} unreadable record(s) in {self.path.name}")
+        if torn_at is not None:
+            print(f"[!] Dropping torn final record in {self.path.name}")
+            os.truncate(self.path, torn_at)
+        if missing:
+            with open(self.index_path, "a") as idx:
+                for trace_id, offset, deleted in missing:
+                    self._apply(trace_id, offset, deleted)
+                    self.records += 1
+                    idx.write(f"{trace_id}\t{offset}\t{int(deleted)}\n")
+
+    # --- Writes ---
+
+    def append(self, trace: Dict) -> int:
+        """Append one trace and return its byte offset."""
+        return self.extend([trace])[0]
+
+    def extend(self, traces: Iterable[Dict]) -> List[int]:
+        offsets = []
+        with open(self.path, "ab") as log, open(self.index_path, "a") as idx:
+            for trace in traces:
+                if "id" not in trace:
+                    raise ValueError("Traces written to a TraceLog need an 'id'")
+                offset = log.tell()
+                log.write(json.dumps(trace, ensure_ascii=False).encode("utf-8") + b"\n")
+                log.flush()
+                idx.write(f"{trace['id']}\t{offset}\t0\n")
+                self.offsets[str(trace["id"])] = offset
+                self.records += 1
+                offsets.append(offset)
+        return offsets
+
+    def remove(self, trace_ids: Iterable[str]) -> int:
+        """Append tombstones for the given ids; unknown ids are ignored. Returns the count removed."""
+        removed = 0
+        with open(self.path, "ab") as log, open(self.index_path, "a") as idx:
+            for trace_id in trace_ids:
+                trace_id = str(trace_id)
+                if trace_id not in self.offsets:
+                    continue
+                offset = log.tell()
+                log.write(json.dumps({"id": trace_id, "_deleted": True}).encode("utf-8") + b"\n")
+                log.flush()
+                idx.write(f"{trace_id}\t{offset}\t1\n")
+                del self.offsets[trace_id]
+                self.records += 1
+                removed += 1
+        return removed
+
+    # --- Reads ---
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __contains__(self, trace_id: str) -> bool:
+        return trace_id in self.offsets
+
+    def get(self, trace_id: str) -> Optional[Dict]:
+        """Read the latest version of one trace with a single seek."""
+        offset = self.offsets.get(trace_id)
+        if offset is None:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Yield the latest version of every trace, in log order."""
+        live = set(self.offsets.values())
+        with open(self.path, "rb") as f:
+            offset = 0
+            for line in f:
+                if offset in live:
+                    yield json.loads(line)
+                offset += len(line)
+
+    def superseded(self) -> int:
+        return self.records - len(self.offsets)
+
+    # --- Compaction ---
+
+    def compact(self, min_superseded_ratio: float = 0.0) -> bool:
+        """
+        Rewrite the log keeping only the latest version of each trace. Skipped unless
+        superseded records make up at least `min_superseded_ratio` of the log.
+        """
+        if self.records == 0 or self.superseded() / self.records < min_superseded_ratio:
+            return False
+
+        tmp_log = self.path.with_name(self.path.name + ".tmp")
+        tmp_idx = self.index_path.with_name(self.index_path.name + ".tmp")
+        offsets = {}
+        with open(tmp_log, "wb") as log, open(tmp_idx, "w") as idx:
+            for trace in self:
+                offset = log.tell()
+                log.write(json.dumps(trace, ensure_ascii=False).encode("utf-8") + b"\n")
+                idx.write(f"{trace['id']}\t{offset}\t0\n")
+                offsets[str(trace["id"])] = offset
+        # A crash between the two renames leaves a mismatched index, which is rebuilt on open
+        os.replace(tmp_log, self.path)
+        os.replace(tmp_idx, self.index_path)
+        self.offsets = offsets
+        self.records = len(offsets)
+        return True
+
+
+# --- Converters for {"memory": [...]} session files ---
+
+def json_to_log(json_path: Union[str, Path], log_path: Union[str, Path]) -> TraceLog:
+    with open(json_path, "r") as f:
+        data = json.load(f)
+    traces = data if isinstance(data, list) else data.get("memory", [])
+    log = TraceLog(log_path)
+    log.extend(traces)
+    return log
+
+
+def log_to_json(log_path: Union[str, Path], json_path: Union[str, Path]) -> int:
+    traces = list(TraceLog(log_path))
+    Path(json_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(json_path, "w") as f:
+        json.dump({"memory": traces}, f, indent=4)
+    return len(traces)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert between session JSON files and JSONL trace logs")
+    parser.add_argument("command", choices=["to-log", "to-json", "compact"])
+    parser.add_argument("source", type=str)
+    parser.add_argument("target", type=str, nargs="?")
+    args = parser.parse_args()
+
+    if args.command == "to-log":
+        log = json_to_log(args.source, args.target)
+        print(f"→ {len(log)} trace(s) in {args.target}")
+    elif args.command == "to-json":
+        count = log_to_json(args.source, args.target)
+        print(f"→ Saved {count} trace(s) to {args.target}")
+    else:
+        log = TraceLog(args.source)
+        dropped = log.superseded()
+        log.compact()
+        print(f"[✓] Compacted {args.source}, dropped {dropped} superseded record(s)")
@@ -0,0 +1,281 @@
+# modules/core/trace_store.py
+# SQLite-backed store for memory traces with indexed lookups
+#
+# python modules/core/trace_store.py --input data/conversation/raw --db data/conversation/trace_store.db
+
+import json
+import sqlite3
+import argparse
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS traces (
+    row_id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    id TEXT,
+    type TEXT,
+    completion_status TEXT,
+    task_id TEXT,
+    timestamp TEXT,
+    epoch INTEGER,
+    iso_year INTEGER,
+    iso_week INTEGER,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_traces_id ON traces (id);
+CREATE INDEX IF NOT EXISTS idx_traces_type_status ON traces (type, completion_status);
+CREATE INDEX IF NOT EXISTS idx_traces_task_id ON traces (task_id);
+CREATE INDEX IF NOT EXISTS idx_traces_epoch ON traces (epoch);
+CREATE INDEX IF NOT EXISTS idx_traces_iso_week ON traces (iso_year, iso_week);
+CREATE INDEX IF NOT EXISTS idx_traces_source ON traces (source, position);
+
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sync_tokens (
+    source TEXT PRIMARY KEY,
+    token TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+ORDER = "ORDER BY source, position"
+
+
+def to_utc(dt: datetime) -> datetime:
+    """Convert `dt` to UTC; naive datetimes are taken to already be UTC."""
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def parse_timestamp(value: str) -> Optional[datetime]:
+    """Parse an ISO 8601 trace timestamp, keeping its own offset; None if it is malformed."""
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+
+
+def trace_to_row(trace: Dict, source: str, position: int) -> tuple:
+    """
+    Project the indexed columns out of a trace dict. The epoch is the UTC instant (naive
+    timestamps are read as UTC); the ISO week is that of the timestamp's own local date,
+    so a Sunday-evening trace stays in its week whatever its offset.
+    """
+    dt = parse_timestamp(trace.get("timestamp"))
+    epoch = iso_year = iso_week = None
+    if dt is not None:
+        epoch = int(to_utc(dt).timestamp())
+        iso_year, iso_week, _ = dt.isocalendar()
+    return (
+        source,
+        position,
+        trace.get("id"),
+        trace.get("type"),
+        trace.get("completion_status"),
+        trace.get("task_id"),
+        trace.get("timestamp"),
+        epoch,
+        iso_year,
+        iso_week,
+        json.dumps(trace),
+    )
+
+
+class TraceStore:
+    """
+    Embedded trace store. Bodies are kept as JSON, filter columns are indexed.
+    One connection is shared by every thread; all access goes through `_lock`.
+    """
+
+    def __init__(self, db_path: Union[str, Path] = ":memory:"):
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = str(db_path)
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+    # --- Writes ---
+
+    def replace_source(self, source: str, traces: Iterable[Dict]) -> int:
+        """Replace every trace stored under `source` with `traces`."""
+        rows = [trace_to_row(t, source, i) for i, t in enumerate(traces)]
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM traces WHERE source = ?", (source,))
+            self.conn.executemany(
+                "INSERT INTO traces (source, position, id, type, completion_status, task_id,"
+                " timestamp, epoch, iso_year, iso_week, body) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def remove_source(self, source: str) -> None:
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM traces WHERE source = ?", (source,))
+            self.conn.execute("DELETE FROM sources WHERE path = ?", (source,))
+            self.conn.execute("DELETE FROM sync_tokens WHERE source = ?", (source,))
+
+    def apply_changes(self, source: str, upserts: Iterable[Dict] = (), deleted_ids: Iterable[str] = (),
+                      sync_token: Optional[str] = None, replace: bool = False) -> Dict[str, int]:
+        """
+        Upsert traces by id and delete `deleted_ids` within `source`, and record
+        `sync_token`, in one transaction. With `replace=True` the source and its old token
+        are cleared first (a full resync). Returns counts of inserted, updated and deleted traces.
+        """
+        stats = {"inserted": 0, "updated": 0, "deleted": 0}
+        with self._lock, self.conn:
+            if replace:
+                self.conn.execute("DELETE FROM traces WHERE source = ?", (source,))
+                self.conn.execute("DELETE FROM sync_tokens WHERE source = ?", (source,))
+            for trace_id in deleted_ids:
+                stats["deleted"] += self.conn.execute(
+                    "DELETE FROM traces WHERE source = ? AND id = ?", (source, trace_id)
+                ).rowcount
+            position = self.conn.execute(
+                "SELECT COALESCE(MAX(position) + 1, 0) FROM traces WHERE source = ?", (source,)
+            ).fetchone()[0]
+            for trace in upserts:
+                row = self.conn.execute(
+                    "SELECT position FROM traces WHERE source = ? AND id = ?", (source, trace.get("id"))
+                ).fetchone()
+                if row is not None:
+                    self.conn.execute("DELETE FROM traces WHERE source = ? AND id = ?", (source, trace.get("id")))
+                    stats["updated"] += 1
+                else:
+                    row = (position,)
+                    position += 1
+                    stats["inserted"] += 1
+                self.conn.execute(
+                    "INSERT INTO traces (source, position, id, type, completion_status, task_id,"
+                    " timestamp, epoch, iso_year, iso_week, body) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    trace_to_row(trace, source, row[0]),
+                )
+            if sync_token is not None:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO sync_tokens (source, token, updated_at) VALUES (?, ?, ?)",
+                    (source, sync_token, time.time()),
+                )
+        return stats
+
+    def get_sync_token(self, source: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute("SELECT token FROM sync_tokens WHERE source = ?", (source,)).fetchone()
+        return row[0] if row else None
+
+    def load_json_file(self, path: Union[str, Path]) -> int:
+        """Ingest a `{"memory": [...]}` session file, replacing any previous copy."""
+        path = Path(path)
+        stat = path.stat()
+        with open(path) as f:
+            data = json.load(f)
+        with self._lock:
+            count = self.replace_source(str(path), data.get("memory", []))
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO sources (path, mtime_ns, size) VALUES (?, ?, ?)",
+                    (str(path), stat.st_mtime_ns, stat.st_size),
+                )
+        return count
+
+    def sync_directory(self, directory: Union[str, Path], pattern: str = "*.json") -> Dict[str, int]:
+        """
+        Bring the store in line with the session files in `directory`.
+        Files are re-read only when their mtime or size changed; deleted files are dropped.
+        """
+        directory = Path(directory)
+        with self._lock:
+            known = {
+                row[0]: (row[1], row[2])
+                for row in self.conn.execute("SELECT path, mtime_ns, size FROM sources")
+            }
+        stats = {"loaded": 0, "unchanged": 0, "removed": 0}
+
+        seen = set()
+        for json_file in sorted(directory.glob(pattern)):
+            key = str(json_file)
+            seen.add(key)
+            stat = json_file.stat()
+            if known.get(key) == (stat.st_mtime_ns, stat.st_size):
+                stats["unchanged"] += 1
+                continue
+            try:
+                self.load_json_file(json_file)
+                stats["loaded"] += 1
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"[!] Failed to load {json_file.name}: {e}")
+
+        for key in known:
+            if key not in seen and Path(key).parent == directory and Path(key).match(pattern):
+                self.remove_source(key)
+                stats["removed"] += 1
+        return stats
+
+    # --- Queries ---
+
+    def _bodies(self, sql: str, params: tuple = ()) -> List[Dict]:
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get(self, trace_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT body FROM traces WHERE id = ? {ORDER} LIMIT 1", (trace_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def by_type_status(self, trace_type: str, completion_status: Optional[str] = None) -> List[Dict]:
+        if completion_status is None:
+            return self._bodies(f"SELECT body FROM traces WHERE type = ? {ORDER}", (trace_type,))
+        return self._bodies(
+            f"SELECT body FROM traces WHERE type = ? AND completion_status = ? {ORDER}",
+            (trace_type, completion_status),
+        )
+
+    def by_task(self, task_id: str) -> List[Dict]:
+        return self._bodies(f"SELECT body FROM traces WHERE task_id = ? {ORDER}", (task_id,))
+
+    def in_range(self, start: datetime, end: datetime) -> List[Dict]:
+        """Traces with start <= timestamp <= end, in chronological order (naive bounds are UTC)."""
+        return self._bodies(
+            "SELECT body FROM traces WHERE epoch BETWEEN ? AND ? ORDER BY epoch, source, position",
+            (int(to_utc(start).timestamp()), int(to_utc(end).timestamp())),
+        )
+
+    def in_iso_week(self, year: int, week: int) -> List[Dict]:
+        """Traces whose timestamp, on its own local date, falls in ISO `week` of `year`."""
+        return self._bodies(
+            f"SELECT body FROM traces WHERE iso_year = ? AND iso_week = ? {ORDER}", (year, week)
+        )
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM traces").fetchone()[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load memory JSON files into the trace store")
+    parser.add_argument("--input", type=str, default="data/conversation/raw", help="Directory of session JSON files")
+    parser.add_argument("--db", type=str, default="data/conversation/trace_store.db", help="SQLite database path")
+    args = parser.parse_args()
+
+    store = TraceStore(args.db)
+    stats = store.sync_directory(Path(args.input))
+    print(f"[✓] Loaded {stats['loaded']} file(s), {stats['unchanged']} unchanged, {stats['removed']} removed")
+    print(f"→ {store.count()} trace(s) in {args.db}")
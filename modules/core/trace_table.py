@@ -0,0 +1,354 @@
+# modules/core/trace_table.py
+# Columnar in-memory table of memory traces backed by NumPy arrays
+
+import json
+import numbers
+import sys
+from collections.abc import MutableMapping
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+MISSING_TIME = np.iinfo(np.int64).min  # reads as NaT once viewed as datetime64
+MISSING_INT = -1
+MISSING_CODE = -1
+
+CATEGORICAL_COLUMNS = ("type", "completion_status", "visibility")
+STRING_COLUMNS = ("id", "task_id")
+TIME_COLUMNS = ("timestamp", "end")
+COLUMN_KEYS = STRING_COLUMNS + CATEGORICAL_COLUMNS + TIME_COLUMNS + ("duration_minutes", "importance", "content")
+
+
+def parse_time(value: str) -> tuple:
+    """ISO 8601 string -> (epoch seconds, UTC offset in seconds). Naive values are UTC."""
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp()), int(dt.utcoffset().total_seconds())
+
+
+def to_epoch(value: str) -> int:
+    return parse_time(value)[0]
+
+
+def format_offset(seconds: int) -> str:
+    sign = "-" if seconds < 0 else "+"
+    hours, minutes = divmod(abs(int(seconds)) // 60, 60)
+    return f"{sign}{hours:02d}:{minutes:02d}"
+
+
+def from_epoch(value: int) -> str:
+    return datetime.fromtimestamp(int(value), tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class TraceRow(MutableMapping):
+    """
+    Dict-like view of one row. Reads and writes go straight to the table columns,
+    so code written against trace dicts (`trace.get(...)`, `trace["embedding"] = ...`) keeps working.
+    """
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: "TraceTable", index: int):
+        self.table = table
+        self.index = index
+
+    def __getitem__(self, key: str):
+        return self.table.get_value(self.index, key)
+
+    def __setitem__(self, key: str, value) -> None:
+        self.table.set_value(self.index, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self.table.del_value(self.index, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.table.row_keys(self.index))
+
+    def __len__(self) -> int:
+        return len(self.table.row_keys(self.index))
+
+    def __repr__(self) -> str:
+        return f"TraceRow({dict(self)!r})"
+
+
+class TraceTable:
+    """
+    Traces stored column by column:
+
+    - `timestamp`/`end` as int64 epoch seconds, plus the UTC offset `timestamp` was written
+      with (int32 seconds) so views can show the trace's own wall-clock time
+    - `duration_minutes` as int64 (whole minutes; fractional values stay in the row dict)
+    - `type`, `completion_status`, `visibility` as int8 codes into per-column category lists,
+      widened to int16/int32 if a column outgrows them
+    - `importance` as float32 (NaN when absent)
+    - `id`, `task_id` as interned strings, `content` as plain strings
+    - any other field in a sparse per-row dict
+
+    Timestamps are normalised to UTC `...Z` strings when read back.
+    """
+
+    def __init__(self, size: int = 0):
+        self.size = size
+        self.timestamp = np.full(size, MISSING_TIME, dtype=np.int64)
+        self.end = np.full(size, MISSING_TIME, dtype=np.int64)
+        self.timestamp_offset = np.zeros(size, dtype=np.int32)
+        self.duration_minutes = np.full(size, MISSING_INT, dtype=np.int64)
+        self.importance = np.full(size, np.nan, dtype=np.float32)
+        self.codes = {col: np.full(size, MISSING_CODE, dtype=np.int8) for col in CATEGORICAL_COLUMNS}
+        self.categories: Dict[str, List[str]] = {col: [] for col in CATEGORICAL_COLUMNS}
+        self.strings = {col: np.full(size, None, dtype=object) for col in STRING_COLUMNS}
+        self.content = np.full(size, None, dtype=object)
+        self.extras: List[Optional[Dict]] = [None] * size
+
+    # --- Construction ---
+
+    @classmethod
+    def from_traces(cls, traces: Iterable[Dict]) -> "TraceTable":
+        traces = traces if isinstance(traces, list) else list(traces)
+        table = cls(len(traces))
+        for i, trace in enumerate(traces):
+            for key, value in trace.items():
+                table.set_value(i, key, value)
+        return table
+
+    @classmethod
+    def from_json(cls, path: Union[str, Path]) -> "TraceTable":
+        """Load a `{"memory": [...]}` session file (or a bare list) into a table."""
+        with open(path, "r") as f:
+            data = json.load(f)
+        return cls.from_traces(data if isinstance(data, list) else data.get("memory", []))
+
+    # --- Row access ---
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: int) -> TraceRow:
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("TraceTable index out of range")
+        return TraceRow(self, index)
+
+    def __iter__(self) -> Iterator[TraceRow]:
+        return (TraceRow(self, i) for i in range(self.size))
+
+    def to_dicts(self) -> List[Dict]:
+        return [dict(row) for row in self]
+
+    def row_keys(self, i: int) -> List[str]:
+        extras = self.extras[i] or {}
+        keys = [key for key in COLUMN_KEYS if key not in extras and self._has(i, key)]
+        keys.extend(extras)
+        return keys
+
+    def _has(self, i: int, key: str) -> bool:
+        if self.extras[i] and key in self.extras[i]:
+            return True
+        if key in STRING_COLUMNS:
+            return self.strings[key][i] is not None
+        if key in CATEGORICAL_COLUMNS:
+            return self.codes[key][i] != MISSING_CODE
+        if key in TIME_COLUMNS:
+            return getattr(self, key)[i] != MISSING_TIME
+        if key == "duration_minutes":
+            return self.duration_minutes[i] != MISSING_INT
+        if key == "importance":
+            return not np.isnan(self.importance[i])
+        if key == "content":
+            return self.content[i] is not None
+        return False
+
+    def get_value(self, i: int, key: str):
+        if self.extras[i] and key in self.extras[i]:
+            return self.extras[i][key]
+        if not self._has(i, key):
+            raise KeyError(key)
+        if key in STRING_COLUMNS:
+            return self.strings[key][i]
+        if key in CATEGORICAL_COLUMNS:
+            return self.categories[key][self.codes[key][i]]
+        if key in TIME_COLUMNS:
+            return from_epoch(getattr(self, key)[i])
+        if key == "duration_minutes":
+            return int(self.duration_minutes[i])
+        if key == "importance":
+            # Shortest repr that round-trips through float32, so 0.8 reads back as 0.8
+            return float(str(self.importance[i]))
+        return self.content[i]
+
+    def set_value(self, i: int, key: str, value) -> None:
+        if key in COLUMN_KEYS and self._store_column(i, key, value):
+            if self.extras[i] and key in self.extras[i]:
+                del self.extras[i][key]
+            return
+        # Values that do not fit their column keep their original form
+        if key in COLUMN_KEYS:
+            self._clear_column(i, key)
+        if self.extras[i] is None:
+            self.extras[i] = {}
+        self.extras[i][key] = value
+
+    def _store_column(self, i: int, key: str, value) -> bool:
+        if isinstance(value, bool):
+            return False
+        if key in STRING_COLUMNS and isinstance(value, str):
+            self.strings[key][i] = sys.intern(value)
+        elif key in CATEGORICAL_COLUMNS and isinstance(value, str):
+            self.codes[key][i] = self.category_code(key, value)
+        elif key in TIME_COLUMNS and isinstance(value, str):
+            try:
+                epoch, offset = parse_time(value)
+            except ValueError:
+                return False
+            getattr(self, key)[i] = epoch
+            if key == "timestamp":
+                self.timestamp_offset[i] = offset
+        elif key == "duration_minutes" and isinstance(value, numbers.Real) and value >= 0 \
+                and float(value).is_integer():
+            self.duration_minutes[i] = int(value)
+        elif key == "importance" and isinstance(value, (int, float)):
+            self.importance[i] = value
+        elif key == "content" and isinstance(value, str):
+            self.content[i] = value
+        else:
+            return False
+        return True
+
+    def del_value(self, i: int, key: str) -> None:
+        if not self._has(i, key):
+            raise KeyError(key)
+        if self.extras[i] and key in self.extras[i]:
+            del self.extras[i][key]
+        else:
+            self._clear_column(i, key)
+
+    def _clear_column(self, i: int, key: str) -> None:
+        if key in STRING_COLUMNS:
+            self.strings[key][i] = None
+        elif key in CATEGORICAL_COLUMNS:
+            self.codes[key][i] = MISSING_CODE
+        elif key in TIME_COLUMNS:
+            getattr(self, key)[i] = MISSING_TIME
+            if key == "timestamp":
+                self.timestamp_offset[i] = 0
+        elif key == "duration_minutes":
+            self.duration_minutes[i] = MISSING_INT
+        elif key == "importance":
+            self.importance[i] = np.nan
+        elif key == "content":
+            self.content[i] = None
+
+    def category_code(self, column: str, value: str) -> int:
+        """Return the code for `value` in a categorical column, registering it if new."""
+        categories = self.categories[column]
+        try:
+            return categories.index(value)
+        except ValueError:
+            codes = self.codes[column]
+            if len(categories) >= np.iinfo(codes.dtype).max:
+                wider = np.int16 if codes.dtype == np.int8 else np.int32
+                self.codes[column] = codes.astype(wider)
+            categories.append(value)
+            return len(categories) - 1
+
+    # --- Column operations ---
+
+    def mask(self, column: str, value: str) -> np.ndarray:
+        """Boolean mask of rows whose categorical `column` equals `value`."""
+        if value not in self.categories[column]:
+            return np.zeros(self.size, dtype=bool)
+        return self.codes[column] == self.categories[column].index(value)
+
+    def take(self, rows: Union[np.ndarray, List[int]]) -> "TraceTable":
+        """New table holding the selected rows (boolean mask or row numbers)."""
+        rows = np.flatnonzero(rows) if np.asarray(rows).dtype == bool else np.asarray(rows, dtype=np.int64)
+        table = TraceTable(0)
+        table.size = len(rows)
+        table.timestamp = self.timestamp[rows]
+        table.end = self.end[rows]
+        table.timestamp_offset = self.timestamp_offset[rows]
+        table.duration_minutes = self.duration_minutes[rows]
+        table.importance = self.importance[rows]
+        table.codes = {col: codes[rows] for col, codes in self.codes.items()}
+        table.categories = {col: list(values) for col, values in self.categories.items()}
+        table.strings = {col: values[rows] for col, values in self.strings.items()}
+        table.content = self.content[rows]
+        table.extras = [self.extras[r] for r in rows]
+        return table
+
+    def to_pandas(self):
+        """
+        DataFrame over the column arrays. Numeric, string and time columns share memory
+        with the table (timestamps as datetime64[s] views of the epoch arrays, missing
+        durations masked as <NA> in a nullable Int64); categoricals copy only their codes.
+        """
+        import pandas as pd
+
+        data = {
+            "id": self.strings["id"],
+            "type": pd.Categorical.from_codes(self.codes["type"], categories=self.categories["type"]),
+            "timestamp": self.timestamp.view("datetime64[s]"),
+            "end": self.end.view("datetime64[s]"),
+            "duration_minutes": pd.arrays.IntegerArray(self.duration_minutes,
+                                                       self.duration_minutes == MISSING_INT),
+            "importance": self.importance,
+            "completion_status": pd.Categorical.from_codes(
+                self.codes["completion_status"], categories=self.categories["completion_status"]
+            ),
+            "visibility": pd.Categorical.from_codes(
+                self.codes["visibility"], categories=self.categories["visibility"]
+            ),
+            "task_id": self.strings["task_id"],
+            "content": self.content,
+        }
+        return pd.DataFrame(data, copy=False)
+
+
+def load_trace_table(path: Union[str, Path]) -> TraceTable:
+    return TraceTable.from_json(path)
+
+
+def calendar_frame(table: TraceTable, default_duration: int = 15):
+    """
+    Schedule view of a table for the Streamlit calendar (Date, Day, Start/End Time,
+    Duration, Event Title, Location, Notes), computed column-wise from to_pandas().
+    Times are shown in each trace's own UTC offset, as written in its timestamp.
+    """
+    import pandas as pd
+
+    df = table.to_pandas()
+    offset = pd.Series(table.timestamp_offset, index=df.index)
+    start = df["timestamp"] + pd.to_timedelta(offset, unit="s")       # wall-clock time
+    duration = df["duration_minutes"].fillna(default_duration).astype("int64")
+    # Fractional durations do not fit the int column and are kept in the row's extras
+    fractional = {i: extras["duration_minutes"] for i, extras in enumerate(table.extras)
+                  if extras and isinstance(extras.get("duration_minutes"), numbers.Real)
+                  and not isinstance(extras["duration_minutes"], bool) and extras["duration_minutes"] >= 0}
+    if fractional:
+        duration = duration.astype("float64")
+        duration.iloc[list(fractional)] = list(fractional.values())
+    end = start + pd.to_timedelta(duration, unit="m")
+    kind = df["type"].astype(object).fillna("")
+    notes = "Type: " + kind
+    for label, column in (("Task", df["task_id"]), ("Status", df["completion_status"].astype(object)),
+                          ("Importance", df["importance"].astype(str))):
+        present = column.notna()
+        notes = notes.where(~present, notes + f", {label}: " + column.astype(str))
+    return pd.DataFrame({
+        "Date": start.dt.strftime("%Y-%m-%d"),
+        "Day": start.dt.strftime("%A"),
+        "Start Time": start.dt.strftime("%I:%M %p").str.lstrip("0"),
+        "Start Time 24H": start.dt.strftime("%H:%M"),
+        "Start ISO": start.dt.strftime("%Y-%m-%dT%H:%M:%S") + offset.map(
+            {o: format_offset(o) for o in np.unique(table.timestamp_offset)}),
+        "End Time": end.dt.strftime("%I:%M %p").str.lstrip("0"),
+        "Duration (min)": duration,
+        "Event Title": df["content"].fillna("(" + kind.str.capitalize() + ")"),
+        # Collaborators are not a column; only rows that have them hold an extras dict
+        "Location": [", ".join((extras or {}).get("collaborators") or []) for extras in table.extras],
+        "Notes": notes,
+    })
@@ -0,0 +1,251 @@
+# modules/core/trace_validator.py
+# Compiled, batched memory-trace validation returning structured errors instead of printing
+#
+# The schema is compiled once into precomputed field checks. Presence, allowed-value and
+# type checks screen a whole batch in one pass; timestamps are checked a column at a time
+# and numeric ranges tested in NumPy. Only rows that fail the screen are looked at check
+# by check. Nothing is printed; callers decide what to report.
+
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+# Allowed values for trace fields
+REQUIRED_FIELDS = ["id", "type", "timestamp", "content", "task_id"]
+ALLOWED_TYPES = {"goal", "observation", "reflection", "calendar_event"}
+ALLOWED_COMPLETION_STATUSES = {"pending", "done", "scheduled", "canceled"}
+ALLOWED_VISIBILITY = {"private", "shared", "public"}
+
+MISSING = object()
+
+
+class ValidationError(NamedTuple):
+    index: int                  # position of the trace in the batch
+    trace_id: Optional[str]
+    field: str
+    code: str                   # missing | invalid_value | invalid_timestamp | out_of_range | wrong_type
+    message: str
+
+
+class ValidationReport(NamedTuple):
+    valid: np.ndarray           # bool mask, one entry per trace
+    errors: List[ValidationError]
+
+    @property
+    def invalid_count(self) -> int:
+        return int((~self.valid).sum())
+
+    def valid_traces(self, traces: Sequence[Dict]) -> List[Dict]:
+        return [trace for trace, ok in zip(traces, self.valid) if ok]
+
+
+class ColumnCheck(NamedTuple):
+    field: str
+    code: str
+    message: Callable[[object], str]
+    failing: Callable[[List[Dict]], List[int]]    # traces -> indices failing this check
+    screened: bool = False                        # also covered by TraceValidator's one-pass screen
+
+
+# --- Column checks ---
+
+def _accepted(allowed: set) -> frozenset:
+    return frozenset(allowed) | {MISSING}
+
+
+def _is_one_of(value: object, accepted: frozenset) -> bool:
+    return value.__hash__ is not None and value in accepted
+
+
+def _one_of(field: str, allowed: set) -> Callable[[List[Dict]], List[int]]:
+    accepted = _accepted(allowed)
+
+    def failing(traces):
+        return [i for i, t in enumerate(traces) if not _is_one_of(t.get(field, MISSING), accepted)]
+    return failing
+
+
+def _instance_of(field: str, kind: type) -> Callable[[List[Dict]], List[int]]:
+    default = kind()
+
+    def failing(traces):
+        return [i for i, t in enumerate(traces) if not isinstance(t.get(field, default), kind)]
+    return failing
+
+
+def _parses_iso(value: object) -> bool:
+    try:
+        datetime.fromisoformat(value.replace("Z", "+00:00"))
+        return True
+    except (AttributeError, TypeError, ValueError):
+        return False
+
+
+def _timestamps(field: str) -> Callable[[List[Dict]], List[int]]:
+    """Failing rows under `datetime.fromisoformat(value.replace("Z", "+00:00"))`."""
+    default = "1970-01-01"
+
+    def failing(traces):
+        return [i for i, t in enumerate(traces) if not _parses_iso(t.get(field, default))]
+    return failing
+
+
+def _in_range(field: str, convert: Callable[[object], float], low: float, high: float,
+              low_inclusive: bool = True) -> Callable[[List[Dict]], List[int]]:
+    """Failing rows under `low <= convert(value) <= high` (or `low < ...`)."""
+    default = high
+
+    def out_of_range(numbers: np.ndarray) -> np.ndarray:
+        with np.errstate(invalid="ignore"):
+            above = numbers >= low if low_inclusive else numbers > low
+            return ~(above & (numbers <= high))
+
+    def failing(traces):
+        values = [t.get(field, default) for t in traces]
+        try:
+            numbers = np.array(values)
+        except (TypeError, ValueError):
+            numbers = None
+        # int() truncates and float() parses strings, so only plain numeric arrays can skip convert()
+        if numbers is not None and numbers.ndim == 1 and (
+                numbers.dtype.kind in "iub" or (convert is float and numbers.dtype.kind == "f")):
+            return np.flatnonzero(out_of_range(numbers.astype(np.float64))).tolist()
+        converted = np.empty(len(values), dtype=np.float64)
+        for i, value in enumerate(values):
+            try:
+                converted[i] = convert(value)
+            except (TypeError, ValueError, OverflowError):
+                converted[i] = np.nan
+        return np.flatnonzero(out_of_range(converted)).tolist()
+    return failing
+
+
+# --- Validator ---
+
+class TraceValidator:
+    """
+    Memory-trace schema compiled into per-field column checks. A trace may fail
+    several checks; every failure is reported, not only the first.
+    """
+
+    def __init__(self, required: Iterable[str] = REQUIRED_FIELDS, allowed_types: set = ALLOWED_TYPES,
+                 completion_statuses: set = ALLOWED_COMPLETION_STATUSES, visibility: set = ALLOWED_VISIBILITY):
+        self.required = list(required)
+        # What the one-pass screen tests per trace, besides presence of the required fields
+        self._allowed = [("type", _accepted(allowed_types)),
+                         ("completion_status", _accepted(completion_statuses)),
+                         ("visibility", _accepted(visibility))]
+        self._types = [(field, kind(), kind) for field, kind in
+                       (("collaborators", list), ("embedding", list), ("linked_event_uid", str))]
+        self.checks = [
+            ColumnCheck("type", "invalid_value", lambda v: f"Invalid type: {v}",
+                        _one_of("type", allowed_types), True),
+            ColumnCheck("timestamp", "invalid_timestamp", lambda v: f"Invalid timestamp: {v}",
+                        _timestamps("timestamp")),
+            ColumnCheck("importance", "out_of_range", lambda v: "Importance must be between 0.0 and 1.0",
+                        _in_range("importance", float, 0.0, 1.0)),
+            ColumnCheck("collaborators", "wrong_type", lambda v: "Collaborators must be a list",
+                        _instance_of("collaborators", list), True),
+            ColumnCheck("embedding", "wrong_type", lambda v: "Embedding must be a list of floats",
+                        _instance_of("embedding", list), True),
+            ColumnCheck("completion_status", "invalid_value", lambda v: f"Invalid completion_status: {v}",
+                        _one_of("completion_status", completion_statuses), True),
+            ColumnCheck("visibility", "invalid_value", lambda v: f"Invalid visibility: {v}",
+                        _one_of("visibility", visibility), True),
+            ColumnCheck("linked_event_uid", "wrong_type", lambda v: "linked_event_uid must be a string",
+                        _instance_of("linked_event_uid", str), True),
+            ColumnCheck("duration_minutes", "out_of_range",
+                        lambda v: "duration_minutes must be a positive integer <= 1440",
+                        _in_range("duration_minutes", int, 0, 1440, low_inclusive=False)),
+        ]
+
+    def _passes_screen(self, trace: Dict) -> bool:
+        for field in self.required:
+            if field not in trace:
+                return False
+        for field, accepted in self._allowed:
+            if not _is_one_of(trace.get(field, MISSING), accepted):
+                return False
+        for field, default, kind in self._types:
+            if not isinstance(trace.get(field, default), kind):
+                return False
+        return True
+
+    def _screened(self, traces: List[Dict]) -> List[int]:
+        """
+        Rows failing any presence, allowed-value or type check, in one pass over the
+        batch (which checks they fail is worked out only for those rows).
+        """
+        passes = self._passes_screen
+        return [i for i, t in enumerate(traces) if not passes(t)]
+
+    def _failures(self, traces: List[Dict]):
+        """Yield (field, code, message_fn, failing row indices) per failed check."""
+        flagged = self._screened(traces)
+        subset = [traces[i] for i in flagged]
+        for field in self.required:
+            rows = [flagged[j] for j, t in enumerate(subset) if field not in t]
+            if rows:
+                yield field, "missing", lambda v, field=field: f"Missing required field: {field}", rows
+        for check in self.checks:
+            if check.screened:
+                rows = [flagged[j] for j in check.failing(subset)]
+            else:
+                rows = check.failing(traces)
+            if rows:
+                yield check.field, check.code, check.message, rows
+
+    def mask(self, traces: Sequence[Dict]) -> np.ndarray:
+        """Bool mask of valid traces, without building error objects."""
+        traces = traces if isinstance(traces, list) else list(traces)
+        valid = np.ones(len(traces), dtype=bool)
+        valid[self._screened(traces)] = False
+        for check in self.checks:
+            if not check.screened:
+                valid[check.failing(traces)] = False
+        return valid
+
+    def count_invalid(self, traces: Sequence[Dict]) -> int:
+        """Counting-only mode for hot paths."""
+        return int((~self.mask(traces)).sum())
+
+    def validate(self, traces: Sequence[Dict]) -> ValidationReport:
+        traces = traces if isinstance(traces, list) else list(traces)
+        valid = np.ones(len(traces), dtype=bool)
+        errors = []
+        for field, code, message, rows in self._failures(traces):
+            valid[rows] = False
+            for i in rows:
+                trace_id = traces[i].get("id")
+                errors.append(ValidationError(i, trace_id if isinstance(trace_id, str) else None,
+                                              field, code, message(traces[i].get(field))))
+        errors.sort(key=lambda e: e.index)
+        return ValidationReport(valid, errors)
+
+    def errors(self, trace: Dict) -> List[ValidationError]:
+        return self.validate([trace]).errors
+
+    def is_valid(self, trace: Dict) -> bool:
+        return bool(self.mask([trace])[0])
+
+
+MEMORY_TRACE_VALIDATOR = TraceValidator()
+
+
+# Module-level entry points (picklable, so they can be handed to worker processes)
+
+def validate_traces(traces: Sequence[Dict]) -> ValidationReport:
+    return MEMORY_TRACE_VALIDATOR.validate(traces)
+
+
+def count_invalid(traces: Sequence[Dict]) -> int:
+    return MEMORY_TRACE_VALIDATOR.count_invalid(traces)
+
+
+def valid_mask(traces: Sequence[Dict]) -> np.ndarray:
+    return MEMORY_TRACE_VALIDATOR.mask(traces)
+
+
+def is_valid_trace(trace: Dict) -> bool:
+    return MEMORY_TRACE_VALIDATOR.is_valid(trace)
@@ -0,0 +1,135 @@
+# modules/google_sync/batch_insert.py
+# Bulk Google Calendar writes through HTTP batch requests (up to 50 calls per round-trip)
+#
+# Each batch is one multipart POST; the per-item callback sorts results into inserted,
+# retryable (429, 5xx, rate-limited 403) and failed. Only the retryable items are sent
+# again, regrouped into fresh batches, with exponential backoff and jitter between passes.
+
+import json
+import os
+import random
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from googleapiclient.errors import BatchError, HttpError
+from googleapiclient.http import BatchHttpRequest, HttpRequest
+from httplib2 import HttpLib2Error
+
+MAX_BATCH_SIZE = int(os.getenv("GOOGLE_BATCH_SIZE", 50))     # Calendar API limit is 50 calls per batch
+MAX_RETRIES = 3
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded"}
+
+
+class BatchReport(NamedTuple):
+    results: Dict[int, Dict]         # call index -> response body
+    failed: Dict[int, str]           # call index -> last error
+    statuses: Dict[int, int]         # call index -> HTTP status of the last error (0: transport)
+    round_trips: int
+
+
+class BatchInsertReport(NamedTuple):
+    inserted: Dict[int, Dict]        # input index -> created event
+    failed: Dict[int, str]           # input index -> last error
+    round_trips: int
+
+
+def is_retryable(error: Exception) -> bool:
+    """Transport errors, 429/5xx, and 403s whose reason is a rate limit."""
+    if not isinstance(error, HttpError):
+        return isinstance(error, (HttpLib2Error, OSError, BatchError))
+    status = error.resp.status
+    if status in RETRYABLE_STATUSES:
+        return True
+    if status == 403:
+        try:
+            errors = json.loads(error.content).get("error", {}).get("errors", [])
+        except (ValueError, AttributeError):
+            return False
+        return any(e.get("reason") in RATE_LIMIT_REASONS for e in errors)
+    return False
+
+
+def describe_error(error: Exception) -> str:
+    if isinstance(error, HttpError):
+        return f"HTTP {error.resp.status}: {error._get_reason()}"
+    return f"{type(error).__name__}: {error}"
+
+
+def new_batch(service, callback, batch_uri: Optional[str] = None) -> BatchHttpRequest:
+    """
+    Batch request for `service`. Discovery-built services post batches to the public
+    rootUrl even when `api_endpoint` is overridden, so local servers pass `batch_uri`.
+    """
+    batch_uri = batch_uri or os.getenv("GOOGLE_CALENDAR_BATCH_URI")
+    if batch_uri:
+        return BatchHttpRequest(callback=callback, batch_uri=batch_uri)
+    return service.new_batch_http_request(callback=callback)
+
+
+def execute_in_batches(service, build_request: Callable[[object, int], HttpRequest], count: int,
+                       batch_size: int = MAX_BATCH_SIZE, max_retries: int = MAX_RETRIES,
+                       backoff: float = 1.0, batch_uri: Optional[str] = None) -> BatchReport:
+    """
+    Run `build_request(service.events(), i)` for i in range(count) as batch requests of
+    `batch_size` calls. Calls that fail with a retryable error are rebuilt and retried up
+    to `max_retries` times; everything else is reported in `failed` by index.
+    """
+    batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+    results: Dict[int, Dict] = {}
+    failed: Dict[int, str] = {}
+    statuses: Dict[int, int] = {}
+    round_trips = 0
+    pending = list(range(count))
+    resource = service.events()         # building the resource parses the discovery doc; do it once
+
+    for attempt in range(max_retries + 1):
+        retry: List[int] = []
+
+        def record_failure(index: int, error: Exception) -> None:
+            failed[index] = describe_error(error)
+            statuses[index] = error.resp.status if isinstance(error, HttpError) else 0
+            if is_retryable(error):
+                retry.append(index)
+
+        def collect(request_id, response, exception):
+            index = int(request_id)
+            if exception is None:
+                results[index] = response
+                failed.pop(index, None)
+                statuses.pop(index, None)
+            else:
+                record_failure(index, exception)
+
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            batch = new_batch(service, collect, batch_uri)
+            for index in chunk:
+                batch.add(build_request(resource, index), request_id=str(index))
+            round_trips += 1
+            try:
+                batch.execute()
+            except (HttpError, BatchError, HttpLib2Error, OSError) as e:     # the batch POST itself failed
+                for index in chunk:
+                    if index not in results:
+                        record_failure(index, e)
+
+        if not retry or attempt == max_retries:
+            break
+        pending = sorted(set(retry))
+        delay = backoff * (2 ** attempt) * (0.5 + random.random())
+        print(f"[!] {len(pending)} call(s) failed with retryable errors, retrying in {delay:.1f}s")
+        time.sleep(delay)
+
+    return BatchReport(results, failed, statuses, round_trips)
+
+
+def batch_insert_events(service, events: Sequence[Dict], calendar_id: str = "primary",
+                        batch_size: int = MAX_BATCH_SIZE, max_retries: int = MAX_RETRIES,
+                        backoff: float = 1.0, batch_uri: Optional[str] = None) -> BatchInsertReport:
+    """Insert `events` (Calendar API event bodies) in batches; see execute_in_batches."""
+    report = execute_in_batches(
+        service, lambda resource, i: resource.insert(calendarId=calendar_id, body=events[i]), len(events),
+        batch_size, max_retries, backoff, batch_uri,
+    )
+    return BatchInsertReport(report.results, report.failed, report.round_trips)
@@ -0,0 +1,324 @@
+# modules/google_sync/fake_calendar.py
+# In-memory Calendar API v3 server for tests and offline runs of the sync code
+#
+# Serves calendarList.list, events insert/get/list (paged, with sync tokens)/patch/
+# update/delete and the multipart /batch/calendar/v3 endpoint on a local port, so
+# googleapiclient services built with `build_fake_service` exercise the real request
+# and batch serialisation. Writes honour If-Match (412 on a stale etag), and a deleted
+# event keeps its id: insert answers 409 until an update brings it back. `fail()` injects per-call errors; /token answers OAuth
+# refresh requests.
+#
+#   python -m modules.google_sync.fake_calendar --port 8089
+
+import argparse
+import email.parser
+import json
+import threading
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+import httplib2
+from googleapiclient.discovery import build
+
+API_PREFIX = "/calendar/v3/"
+BATCH_PATH = "/batch/calendar/v3"
+TOKEN_PATH = "/token"
+REASONS = {200: "OK", 204: "No Content", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+           409: "Conflict", 412: "Precondition Failed", 429: "Too Many Requests", 500: "Internal Server Error",
+           503: "Service Unavailable"}
+
+
+def error_body(status: int, message: str, reason: str = "backendError") -> Dict:
+    return {"error": {"code": status, "message": message,
+                      "errors": [{"domain": "global", "reason": reason, "message": message}]}}
+
+
+def parse_time(value) -> datetime:
+    """RFC 3339 string or event start/end dict (dateTime or all-day date) as an aware datetime."""
+    if isinstance(value, dict):
+        value = value.get("dateTime") or value.get("date")
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+class FailRule:
+    def __init__(self, status: int, times: int, when: Optional[Callable[[str, str, Dict], bool]], reason: str):
+        self.status, self.times, self.when, self.reason = status, times, when, reason
+
+
+class FakeCalendarAPI:
+    """
+    Thread-safe fake of the Calendar API subset the sync modules use:
+
+        with FakeCalendarAPI() as api:
+            service = build_fake_service(api)
+            batch_insert_events(service, events, batch_uri=api.batch_uri)
+            api.events("primary"), api.http_requests
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.calendars: Dict[str, Dict[str, Dict]] = {"primary": {}}
+        self.http_requests = 0
+        self.calls = 0
+        self.active = 0
+        self.peak_concurrency = 0       # most HTTP requests in flight at once
+        self.token_lifetime = 3600      # expires_in handed out by the token endpoint
+        self.tokens_issued = 0
+        self.last_authorization: Optional[str] = None
+        self._revision = 0
+        self._token_epoch = 0
+        self._rules: List[FailRule] = []
+        self._lock = threading.RLock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def batch_uri(self) -> str:
+        return self.url.rstrip("/") + BATCH_PATH
+
+    @property
+    def token_uri(self) -> str:
+        return self.url.rstrip("/") + TOKEN_PATH
+
+    def events(self, calendar_id: str = "primary") -> List[Dict]:
+        """Live (not cancelled) events."""
+        with self._lock:
+            return [e for e in self.calendars.get(calendar_id, {}).values() if e["status"] != "cancelled"]
+
+    def expire_sync_tokens(self) -> None:
+        """Invalidate every issued sync token; the next incremental list gets 410 Gone."""
+        with self._lock:
+            self._token_epoch += 1
+
+    def fail(self, status: int = 503, times: int = 1, when: Optional[Callable[[str, str, Dict], bool]] = None,
+             reason: str = "backendError") -> None:
+        """Answer the next `times` calls matching `when(method, path, body)` with `status`."""
+        with self._lock:
+            self._rules.append(FailRule(status, times, when, reason))
+
+    def issue_token(self) -> Dict:
+        """OAuth refresh-token grant: a new access token each time."""
+        with self._lock:
+            self.tokens_issued += 1
+            return {"access_token": f"fake-token-{self.tokens_issued}", "expires_in": self.token_lifetime,
+                    "token_type": "Bearer"}
+
+    # --- Lifecycle ---
+
+    def start(self) -> "FakeCalendarAPI":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeCalendarAPI":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # --- API ---
+
+    def call(self, method: str, target: str, body: bytes,
+             if_match: Optional[str] = None) -> Tuple[int, Optional[Dict]]:
+        """Handle one API call (direct or from a batch part); returns (status, JSON body)."""
+        parsed = urlparse(target)
+        path = unquote(parsed.path)
+        query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        payload = json.loads(body) if body.strip() else {}
+        with self._lock:
+            self.calls += 1
+            for rule in self._rules:
+                if rule.times > 0 and (rule.when is None or rule.when(method, path, payload)):
+                    rule.times -= 1
+                    return rule.status, error_body(rule.status, REASONS.get(rule.status, "Error"), rule.reason)
+            if not path.startswith(API_PREFIX):
+                return 404, error_body(404, "Not Found", "notFound")
+            parts = path[len(API_PREFIX):].strip("/").split("/")
+            if parts == ["users", "me", "calendarList"] and method == "GET":
+                return self._calendar_list(query)
+            if len(parts) >= 3 and parts[0] == "calendars" and parts[2] == "events":
+                return self._events(method, parts[1], parts[3] if len(parts) > 3 else None, query, payload,
+                                    if_match)
+            return 404, error_body(404, "Not Found", "notFound")
+
+    def _store(self, calendar: Dict[str, Dict], event: Dict) -> Dict:
+        self._revision += 1
+        event["etag"] = f'"{self._revision}"'
+        event["updated"] = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        event.setdefault("status", "confirmed")
+        calendar[event["id"]] = event
+        return event
+
+    def _events(self, method: str, calendar_id: str, event_id: Optional[str], query: Dict, payload: Dict,
+                if_match: Optional[str] = None):
+        calendar = self.calendars.setdefault(calendar_id, {})
+        if event_id is None and method == "POST":
+            event_id = payload.get("id") or uuid.uuid4().hex
+            if event_id in calendar:
+                return 409, error_body(409, "The requested identifier already exists.", "duplicate")
+            return 200, self._store(calendar, dict(payload, id=event_id))
+        if event_id is None and method == "GET":
+            return self._list(calendar, query)
+        if event_id not in calendar:
+            return 404, error_body(404, "Not Found", "notFound")
+        if method == "GET":
+            return 200, calendar[event_id]
+        if if_match not in (None, "*", calendar[event_id]["etag"]):
+            return 412, error_body(412, "Precondition Failed", "conditionNotMet")
+        if method == "PATCH":
+            return 200, self._store(calendar, {**calendar[event_id], **payload, "id": event_id})
+        if method == "PUT":
+            return 200, self._store(calendar, dict(payload, id=event_id))
+        if method == "DELETE":
+            if calendar[event_id]["status"] == "cancelled":
+                return 410, error_body(410, "Resource has been deleted", "deleted")
+            self._store(calendar, {**calendar[event_id], "status": "cancelled"})
+            return 204, None
+        return 400, error_body(400, f"Unsupported method {method}", "badRequest")
+
+    def _calendar_list(self, query: Dict):
+        ids = sorted(self.calendars)
+        offset = int(query.get("pageToken", 0))
+        size = int(query.get("maxResults", 100))
+        result = {"kind": "calendar#calendarList", "items": [
+            {"id": cid, "summary": cid, "accessRole": "owner", "primary": cid == "primary"}
+            for cid in ids[offset:offset + size]
+        ]}
+        if offset + size < len(ids):
+            result["nextPageToken"] = str(offset + size)
+        return 200, result
+
+    def _list(self, calendar: Dict[str, Dict], query: Dict):
+        """
+        events.list with pageToken/maxResults paging. Without syncToken: live events
+        (timeMin filters on end); with one: everything changed since it, cancelled
+        included. The last page carries nextSyncToken.
+        """
+        revision = lambda event: int(event["etag"].strip('"'))
+        since = None
+        if "syncToken" in query:
+            epoch, _, rev = query["syncToken"].partition("-")
+            if not rev.isdigit() or int(epoch) != self._token_epoch:
+                return 410, error_body(410, "Sync token is no longer valid, a full sync is required.",
+                                       "fullSyncRequired")
+            since = int(rev)
+        offset, snapshot = 0, self._revision
+        if "pageToken" in query:
+            offset, snapshot = (int(x) for x in query["pageToken"].split("-"))
+
+        events = [e for e in calendar.values() if revision(e) <= snapshot]
+        if since is not None:
+            events = [e for e in events if revision(e) > since]
+        else:
+            if query.get("showDeleted") != "true":
+                events = [e for e in events if e["status"] != "cancelled"]
+            if "timeMin" in query:
+                time_min = parse_time(query["timeMin"])
+                events = [e for e in events if "end" not in e or parse_time(e["end"]) >= time_min]
+        if query.get("orderBy") == "startTime":
+            events.sort(key=lambda e: (e.get("start", {}).get("dateTime", ""), e["id"]))
+        else:
+            events.sort(key=revision)
+
+        size = int(query.get("maxResults", 250))
+        page = events[offset:offset + size]
+        result = {"kind": "calendar#events", "items": page}
+        if offset + size < len(events):
+            result["nextPageToken"] = f"{offset + size}-{snapshot}"
+        else:
+            result["nextSyncToken"] = f"{self._token_epoch}-{snapshot}"
+        return 200, result
+
+    def batch(self, content_type: str, body: bytes) -> Tuple[str, bytes]:
+        """Answer a multipart/mixed batch with one application/http part per call."""
+        message = email.parser.BytesParser().parsebytes(
+            b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body)
+        boundary = f"batch_{uuid.uuid4().hex}"
+        out = []
+        for part in message.get_payload():
+            raw = part.get_payload(decode=False)
+            request_line, rest = raw.split("\n", 1)
+            method, target, _ = request_line.strip().split(" ", 2)
+            inner = rest.replace("\r\n", "\n").split("\n\n", 1)
+            headers = email.parser.Parser().parsestr(inner[0], headersonly=True)
+            status, result = self.call(method, target, inner[1].encode() if len(inner) > 1 else b"",
+                                       headers["If-Match"])
+            text = json.dumps(result) if result is not None else ""
+            content_id = part["Content-ID"][1:-1]
+            out.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n\r\n{text}\r\n"
+            )
+        out.append(f"--{boundary}--\r\n")
+        return f"multipart/mixed; boundary={boundary}", "".join(out).encode("utf-8")
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self, status: int, content_type: str, data: bytes) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _dispatch(self) -> None:
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                with api._lock:
+                    api.http_requests += 1
+                    api.active += 1
+                    api.peak_concurrency = max(api.peak_concurrency, api.active)
+                try:
+                    if urlparse(self.path).path == TOKEN_PATH:
+                        self._respond(200, "application/json", json.dumps(api.issue_token()).encode())
+                        return
+                    with api._lock:
+                        api.last_authorization = self.headers.get("Authorization")
+                    if urlparse(self.path).path == BATCH_PATH:
+                        content_type, data = api.batch(self.headers["Content-Type"], body)
+                        self._respond(200, content_type, data)
+                        return
+                    status, result = api.call(self.command, self.path, body, self.headers.get("If-Match"))
+                    self._respond(status, "application/json; charset=UTF-8",
+                                  json.dumps(result).encode() if result is not None else b"")
+                finally:
+                    with api._lock:
+                        api.active -= 1
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _dispatch
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return Handler
+
+
+def build_fake_service(api: FakeCalendarAPI):
+    """Calendar v3 service from the bundled discovery document, pointed at `api`."""
+    return build("calendar", "v3", http=httplib2.Http(), static_discovery=True,
+                 client_options={"api_endpoint": api.url.rstrip("/") + API_PREFIX})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve an in-memory Calendar API v3")
+    parser.add_argument("--port", type=int, default=8089)
+    args = parser.parse_args()
+    api = FakeCalendarAPI(port=args.port)
+    print(f"→ Fake Calendar API on {api.url} (batch: {api.batch_uri})")
+    api._server.serve_forever()
@@ -1,12 +1,13 @@
 from ics import Calendar
 from datetime import datetime
 import pytz
+from google_sync.batch_insert import batch_insert_events
 
 def sync_ics_file(service, ics_path):
     with open(ics_path, "r") as f:
         calendar = Calendar(f.read())
 
-    synced = 0
+    payloads = []
     for event in calendar.events:
         try:
             payload = {
@@ -21,8 +22,10 @@ def sync_ics_file(service, ics_path):
                     "timeZone": "UTC"
                 }
             }
-            service.events().insert(calendarId="primary", body=payload).execute()
-            print(f"[✓] Synced: {payload['summary']}")
-            synced += 1
+            payloads.append(payload)
         except Exception as e:
             print(f"[!] Failed to sync event: {e}")
+
+    report = batch_insert_events(service, payloads)
+    for index, error in sorted(report.failed.items()):
+        print(f"[!] Failed to sync {payloads[index]['summary']}: {error}")
@@ -1,22 +1,26 @@
 import json
 from schema import validate_memory_trace
 from google_sync.event_utils import memory_trace_to_event
+from google_sync.batch_insert import batch_insert_events
 
 def sync_json_file(service, memory_json_path):
     with open(memory_json_path) as f:
         session = json.load(f)
 
     traces = session.get("memory", [])
-    synced = 0
+    events, trace_ids = [], []
 
     for trace in traces:
         if validate_memory_trace(trace):
             try:
-                event = memory_trace_to_event(trace)
-                service.events().insert(calendarId='primary', body=event).execute()
-                print(f"[✓] Synced: {event['summary']}")
-                synced += 1
+                events.append(memory_trace_to_event(trace))
+                trace_ids.append(trace.get("id"))
             except Exception as e:
                 print(f"[!] Failed to sync {trace.get('id')}: {e}")
 
-    print(f"\n[✓] {synced} events synced from {memory_json_path.name}")
+    report = batch_insert_events(service, events)
+    for index, error in sorted(report.failed.items()):
+        print(f"[!] Failed to sync {trace_ids[index]}: {error}")
+
+    print(f"\n[✓] {len(report.inserted)} events synced from {memory_json_path.name} "
+          f"in {report.round_trips} batch request(s)")
@@ -0,0 +1,251 @@
+# modules/google_sync/multi_fetch.py
+# Concurrent fetch of many Google calendars, streamed page by page into a trace sink
+#
+# Calendars come from calendarList (or an explicit list) and are fetched on a thread
+# pool whose size is the shared concurrency limit; pages of one calendar are sequential
+# because each needs the previous pageToken. Workers convert pages with event_to_trace
+# and hand them to a bounded queue, drained by a single writer thread into the trace
+# store or per-calendar JSONL logs. Memory is bounded by (queue size + workers) pages,
+# whatever the size of the calendars. Both sinks keep sync tokens, so repeat fetches
+# are incremental (see pull_sync).
+#
+#   PYTHONPATH=. python -m modules.google_sync.multi_fetch --db data/conversation/trace_store.db
+#   PYTHONPATH=. python -m modules.google_sync.multi_fetch --jsonl data/calendar/log
+
+import json
+import os
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Union
+
+from modules.core.trace_log import COMPACT_RATIO, TraceLog
+from modules.core.trace_store import TraceStore
+from modules.google_sync.pull_sync import PAGE_SIZE, convert_events, iter_sync_pages, store_source
+
+MAX_CONCURRENT_CALENDARS = int(os.getenv("GOOGLE_FETCH_CONCURRENCY", 8))
+QUEUE_PAGES = 2         # pages buffered per worker before producers block
+
+
+class CalendarFetch(NamedTuple):
+    calendar_id: str
+    written: int
+    deleted: int
+    skipped: int
+    pages: int
+    requests: int
+    full_sync: bool
+    error: Optional[str] = None
+
+
+def list_calendars(service, min_access_role: Optional[str] = None) -> List[Dict]:
+    """Every calendarList entry, following nextPageToken."""
+    resource = service.calendarList()
+    calendars: List[Dict] = []
+    page_token = None
+    while True:
+        params = {"maxResults": 250}
+        if page_token:
+            params["pageToken"] = page_token
+        if min_access_role:
+            params["minAccessRole"] = min_access_role
+        response = resource.list(**params).execute()
+        calendars.extend(response.get("items", []))
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return calendars
+
+
+# --- Sinks ---
+
+class StoreSink:
+    """Writes each calendar to the trace store as source `google:<calendar id>`."""
+
+    def __init__(self, store: TraceStore):
+        self.store = store
+
+    def sync_token(self, calendar_id: str) -> Optional[str]:
+        return self.store.get_sync_token(store_source(calendar_id))
+
+    def write(self, calendar_id: str, traces: List[Dict], removed: List[str], replace: bool,
+              sync_token: Optional[str]) -> int:
+        stats = self.store.apply_changes(store_source(calendar_id), traces, removed, sync_token, replace)
+        return stats["deleted"]
+
+    def finish(self, calendar_id: str) -> None:
+        pass
+
+
+class JSONLSink:
+    """
+    One TraceLog per calendar under `directory`, plus `sync_tokens.json`. A full sync
+    truncates the calendar's log; incremental pages append new versions and tombstones.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.tokens_path = self.directory / "sync_tokens.json"
+        self.tokens: Dict[str, str] = {}
+        if self.tokens_path.exists():
+            with open(self.tokens_path) as f:
+                self.tokens = json.load(f)
+        self.logs: Dict[str, TraceLog] = {}
+
+    def log_path(self, calendar_id: str) -> Path:
+        return self.directory / (re.sub(r"[^\w.@-]", "_", calendar_id) + ".jsonl")
+
+    def sync_token(self, calendar_id: str) -> Optional[str]:
+        return self.tokens.get(calendar_id) if self.log_path(calendar_id).exists() else None
+
+    def write(self, calendar_id: str, traces: List[Dict], removed: List[str], replace: bool,
+              sync_token: Optional[str]) -> int:
+        path = self.log_path(calendar_id)
+        if replace:
+            self.logs.pop(calendar_id, None)
+            for stale in (path, path.with_name(path.name + ".idx")):
+                stale.unlink(missing_ok=True)
+            self._save_token(calendar_id, None)
+        if calendar_id not in self.logs:
+            self.logs[calendar_id] = TraceLog(path)
+        log = self.logs[calendar_id]
+        deleted = log.remove(removed) if removed else 0
+        log.extend(traces)
+        if sync_token:
+            self._save_token(calendar_id, sync_token)
+        return deleted
+
+    def finish(self, calendar_id: str) -> None:
+        """Compact the calendar's log if incremental pages left enough old versions, then drop its index."""
+        log = self.logs.pop(calendar_id, None)
+        if log is not None:
+            log.compact(min_superseded_ratio=COMPACT_RATIO)
+
+    def _save_token(self, calendar_id: str, token: Optional[str]) -> None:
+        if token is None and calendar_id not in self.tokens:
+            return
+        if token is None:
+            del self.tokens[calendar_id]
+        else:
+            self.tokens[calendar_id] = token
+        tmp = self.tokens_path.with_name(self.tokens_path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.tokens, f, indent=2)
+        os.replace(tmp, self.tokens_path)
+
+
+# --- Fetch ---
+
+class _Page(NamedTuple):
+    calendar_id: str
+    traces: List[Dict]
+    removed: List[str]
+    skipped: int
+    replace: bool
+    sync_token: Optional[str]
+    full_sync: bool
+    requests: int
+
+
+class _Done(NamedTuple):
+    calendar_id: str
+    error: Optional[str]
+
+
+def fetch_calendars(service_factory: Callable[[], object], sink, calendar_ids: Optional[Sequence[str]] = None,
+                    max_concurrency: int = MAX_CONCURRENT_CALENDARS,
+                    page_size: int = PAGE_SIZE) -> Dict[str, CalendarFetch]:
+    """
+    Fetch `calendar_ids` (default: every calendarList entry) into `sink` (StoreSink or
+    JSONLSink). `service_factory` builds a Calendar service; one is made per worker
+    thread, since googleapiclient services are not thread-safe.
+    """
+    local = threading.local()
+
+    def service():
+        if not hasattr(local, "service"):
+            local.service = service_factory()
+        return local.service
+
+    if calendar_ids is None:
+        calendar_ids = [entry["id"] for entry in list_calendars(service_factory())]
+    calendar_ids = list(dict.fromkeys(calendar_ids))
+    tokens = {calendar_id: sink.sync_token(calendar_id) for calendar_id in calendar_ids}
+    workers = max(1, min(max_concurrency, len(calendar_ids) or 1))
+    pages: "queue.Queue" = queue.Queue(maxsize=workers * QUEUE_PAGES)
+    stop = threading.Event()            # set if the writer fails, so blocked producers give up
+
+    def put(item) -> None:
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        raise RuntimeError("fetch aborted")
+
+    def fetch(calendar_id: str) -> None:
+        try:
+            first = True
+            for page in iter_sync_pages(service(), calendar_id, tokens[calendar_id], page_size):
+                traces, removed, skipped = convert_events(page.events)
+                put(_Page(calendar_id, traces, removed, skipped, page.full_sync and first,
+                          page.next_sync_token, page.full_sync, page.requests))
+                first = False
+            put(_Done(calendar_id, None))
+        except Exception as e:
+            if not stop.is_set():
+                put(_Done(calendar_id, f"{type(e).__name__}: {e}"))
+
+    totals = {calendar_id: CalendarFetch(calendar_id, 0, 0, 0, 0, 0, False) for calendar_id in calendar_ids}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for calendar_id in calendar_ids:
+            pool.submit(fetch, calendar_id)
+        remaining = len(calendar_ids)
+        try:
+            while remaining:
+                item = pages.get()
+                current = totals[item.calendar_id]
+                if isinstance(item, _Done):
+                    remaining -= 1
+                    sink.finish(item.calendar_id)
+                    if item.error:
+                        print(f"[!] Failed to fetch {item.calendar_id}: {item.error}")
+                        totals[item.calendar_id] = current._replace(error=item.error)
+                    continue
+                deleted = sink.write(item.calendar_id, item.traces, item.removed, item.replace, item.sync_token)
+                totals[item.calendar_id] = current._replace(
+                    written=current.written + len(item.traces), deleted=current.deleted + deleted,
+                    skipped=current.skipped + item.skipped, pages=current.pages + 1,
+                    requests=current.requests + item.requests, full_sync=item.full_sync,
+                )
+        except BaseException:
+            stop.set()
+            raise
+    return totals
+
+
+if __name__ == "__main__":
+    import argparse
+    from modules.google_sync.auth import authenticate_google
+
+    parser = argparse.ArgumentParser(description="Fetch every Google calendar into the trace store or JSONL logs")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--db", type=str, default=os.getenv("TRACE_DB_PATH", "data/conversation/trace_store.db"),
+                        help="SQLite trace store path")
+    target.add_argument("--jsonl", type=str, help="Directory for per-calendar JSONL logs")
+    parser.add_argument("--calendar", action="append", help="Calendar id (repeatable; default: all)")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_CALENDARS)
+    args = parser.parse_args()
+
+    sink = JSONLSink(args.jsonl) if args.jsonl else StoreSink(TraceStore(args.db))
+    authenticate_google()               # run any interactive OAuth flow once, before the workers start
+    results = fetch_calendars(authenticate_google, sink, args.calendar, args.concurrency)
+    for result in results.values():
+        if result.error is None:
+            kind = "full" if result.full_sync else "incremental"
+            print(f"→ {result.calendar_id}: {result.written} trace(s), {result.deleted} deleted "
+                  f"({kind}, {result.pages} page(s))")
+    print(f"[✓] Fetched {sum(r.error is None for r in results.values())} of {len(results)} calendar(s)")
@@ -0,0 +1,132 @@
+# modules/google_sync/pull_sync.py
+# Incremental pull of Google Calendar events into the trace store using sync tokens
+#
+# The first pull lists every event page by page and stores the final nextSyncToken per
+# calendar. Later pulls send that token and get back only events changed since, with
+# deletions as status=cancelled, so a quiet calendar costs one small request. Each page
+# is applied as it arrives; the new token is committed with the last one, so a pull that
+# dies halfway is simply repeated. A 410 Gone (token expired) falls back to a full
+# resync that replaces the calendar's traces.
+#
+#   PYTHONPATH=. python -m modules.google_sync.pull_sync --calendar primary
+
+import os
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from googleapiclient.errors import HttpError
+
+from modules.calendar_io.sync_google_ics import event_to_trace
+from modules.core.trace_store import TraceStore
+from modules.core.trace_validator import valid_mask
+
+PAGE_SIZE = int(os.getenv("GOOGLE_PULL_PAGE_SIZE", 2500))     # events.list maximum
+
+
+class SyncPage(NamedTuple):
+    events: List[Dict]
+    next_sync_token: Optional[str]   # set on the last page only
+    full_sync: bool
+    requests: int                    # requests spent on this page (2 after a 410)
+
+
+class PullReport(NamedTuple):
+    calendar_id: str
+    full_sync: bool
+    inserted: int
+    updated: int
+    deleted: int
+    skipped: int                     # events that did not convert to a valid trace
+    requests: int
+
+
+def store_source(calendar_id: str) -> str:
+    """TraceStore source name for a calendar's pulled events."""
+    return f"google:{calendar_id}"
+
+
+def iter_sync_pages(service, calendar_id: str, sync_token: Optional[str] = None,
+                    page_size: int = PAGE_SIZE) -> Iterator[SyncPage]:
+    """
+    events.list pages, from `sync_token` if given (else a full listing). If the token
+    has expired (410 on the first request) the listing restarts as a full sync.
+    """
+    resource = service.events()
+    page_token = None
+    requests = 0
+    while True:
+        params = {"calendarId": calendar_id, "maxResults": page_size, "singleEvents": True}
+        if sync_token:
+            params["syncToken"] = sync_token
+        if page_token:
+            params["pageToken"] = page_token
+        requests += 1
+        try:
+            response = resource.list(**params).execute()
+        except HttpError as e:
+            if e.resp.status != 410 or not sync_token or page_token:
+                raise
+            print(f"[!] Sync token for {calendar_id} expired, running a full resync")
+            sync_token = None
+            continue
+        page_token = response.get("nextPageToken")
+        yield SyncPage(response.get("items", []), None if page_token else response["nextSyncToken"],
+                       not sync_token, requests)
+        requests = 0
+        if not page_token:
+            return
+
+
+def convert_events(events: List[Dict]) -> Tuple[List[Dict], List[str], int]:
+    """
+    (valid traces to upsert, event ids to remove, skipped count) for one page. Cancelled
+    events are removed, and so are events that no longer convert to a valid trace.
+    """
+    removed = [event["id"] for event in events if event.get("status") == "cancelled"]
+    live = [event for event in events if event.get("status") != "cancelled"]
+    traces = []
+    for event in live:
+        try:
+            traces.append(event_to_trace(event))
+        except (KeyError, AttributeError) as e:
+            print(f"[!] Invalid event skipped: {event.get('id')} ({e})")
+            traces.append({})
+    mask = valid_mask(traces)
+    upserts = [trace for trace, ok in zip(traces, mask) if ok]
+    removed.extend(event["id"] for event, ok in zip(live, mask) if not ok and event.get("id"))
+    return upserts, removed, len(live) - len(upserts)
+
+
+def pull_calendar(service, store: TraceStore, calendar_id: str = "primary",
+                  page_size: int = PAGE_SIZE) -> PullReport:
+    """Bring `store`'s copy of `calendar_id` up to date; see the module notes."""
+    source = store_source(calendar_id)
+    totals = {"inserted": 0, "updated": 0, "deleted": 0}
+    skipped = requests = 0
+    full_sync = False
+    for i, page in enumerate(iter_sync_pages(service, calendar_id, store.get_sync_token(source), page_size)):
+        full_sync = page.full_sync
+        upserts, removed, page_skipped = convert_events(page.events)
+        stats = store.apply_changes(source, upserts, removed, sync_token=page.next_sync_token,
+                                    replace=page.full_sync and i == 0)
+        for key in totals:
+            totals[key] += stats[key]
+        skipped += page_skipped
+        requests += page.requests
+    return PullReport(calendar_id, full_sync, totals["inserted"], totals["updated"], totals["deleted"],
+                      skipped, requests)
+
+
+if __name__ == "__main__":
+    import argparse
+    from modules.google_sync.auth import authenticate_google
+
+    parser = argparse.ArgumentParser(description="Incrementally pull Google Calendar events into the trace store")
+    parser.add_argument("--calendar", type=str, default="primary", help="Calendar id")
+    parser.add_argument("--db", type=str, default=os.getenv("TRACE_DB_PATH", "data/conversation/trace_store.db"),
+                        help="SQLite trace store path")
+    args = parser.parse_args()
+
+    report = pull_calendar(authenticate_google(), TraceStore(args.db), args.calendar)
+    kind = "full" if report.full_sync else "incremental"
+    print(f"[✓] {kind} pull of {report.calendar_id}: +{report.inserted} ~{report.updated} -{report.deleted} "
+          f"({report.skipped} skipped) in {report.requests} request(s)")
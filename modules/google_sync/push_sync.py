@@ -0,0 +1,222 @@
+# modules/google_sync/push_sync.py
+# Idempotent push of memory traces to Google Calendar: deterministic event ids plus a
+# local ledger of content hashes and etags, so each trace becomes an insert, a patch or
+# nothing at all
+#
+# Event ids are derived from the trace's ICS UID (linked_event_uid or generate_uid) and
+# trace id, encoded as base32hex, which Google accepts as a client-supplied id. Re-running
+# a sync re-derives the same ids; traces whose payload hash matches the ledger cost no
+# API call. Patches carry the ledger etag as If-Match, so an event edited in Calendar
+# since the last push fails with 412 and is reported as a conflict instead of being
+# overwritten. If the ledger is lost, an insert that hits 409 (the id exists, possibly
+# as a deleted event Google still remembers) is retried as a full update that also
+# restores it, and a patch that hits 404 (deleted remotely) as an insert.
+
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from modules.calendar_io.export_calendar import generate_uid
+from modules.google_sync.batch_insert import MAX_BATCH_SIZE, MAX_RETRIES, execute_in_batches
+
+DEFAULT_LEDGER_PATH = os.getenv("GOOGLE_SYNC_LEDGER_PATH", "data/cache/google_sync_ledger.sqlite")
+EVENT_DURATION_MINUTES = 15
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pushed (
+    calendar_id TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    trace_id TEXT,
+    content_hash TEXT NOT NULL,
+    etag TEXT,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (calendar_id, event_id)
+);
+"""
+
+
+class LedgerEntry(NamedTuple):
+    content_hash: str
+    etag: Optional[str]
+
+
+class PushReport(NamedTuple):
+    inserted: List[str]              # event ids
+    patched: List[str]
+    unchanged: List[str]
+    failed: Dict[str, str]           # event id -> error (412 conflicts included)
+    round_trips: int
+
+
+# --- Event ids and payloads ---
+
+def google_event_id(trace: Dict) -> str:
+    """Stable Calendar event id: base32hex of sha256(ICS UID + trace id), 32 chars of [0-9a-v]."""
+    start = datetime.fromisoformat(trace["timestamp"].replace("Z", "+00:00"))
+    uid = trace.get("linked_event_uid") or generate_uid(trace.get("task_id") or str(trace["id"]),
+                                                        start.strftime("%Y%m%d"))
+    digest = hashlib.sha256(f"{uid}#{trace['id']}".encode("utf-8")).digest()[:20]
+    return base64.b32hexencode(digest).decode("ascii").lower()
+
+
+def trace_to_google_event(trace: Dict) -> Dict:
+    """Calendar API body for a trace, with its deterministic id."""
+    start_dt = datetime.fromisoformat(trace["timestamp"].replace("Z", "+00:00"))
+    end_dt = start_dt + timedelta(minutes=EVENT_DURATION_MINUTES)
+    return {
+        "id": google_event_id(trace),
+        "summary": trace["content"][:40],
+        "description": trace.get("content", ""),
+        "start": {"dateTime": start_dt.isoformat(), "timeZone": "UTC"},
+        "end": {"dateTime": end_dt.isoformat(), "timeZone": "UTC"},
+        "location": trace.get("location", ""),
+        "extendedProperties": {"private": {"trace_id": str(trace["id"])}},
+    }
+
+
+def payload_hash(event: Dict) -> str:
+    return hashlib.sha256(json.dumps(event, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+# --- Ledger ---
+
+class SyncLedger:
+    """SQLite record of what was last pushed per (calendar, event id)."""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_LEDGER_PATH):
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def get_many(self, calendar_id: str, event_ids: Sequence[str]) -> Dict[str, LedgerEntry]:
+        found: Dict[str, LedgerEntry] = {}
+        unique = list(dict.fromkeys(event_ids))
+        with self._lock:
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT event_id, content_hash, etag FROM pushed "
+                    f"WHERE calendar_id = ? AND event_id IN ({','.join('?' * len(chunk))})",
+                    [calendar_id, *chunk],
+                ).fetchall()
+                found.update((event_id, LedgerEntry(h, etag)) for event_id, h, etag in rows)
+        return found
+
+    def put_many(self, calendar_id: str, rows: Sequence[Tuple[str, Optional[str], str, Optional[str]]]) -> None:
+        """rows: (event_id, trace_id, content_hash, etag)."""
+        if not rows:
+            return
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO pushed (calendar_id, event_id, trace_id, content_hash, etag, synced_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(calendar_id, event_id, trace_id, h, etag, now) for event_id, trace_id, h, etag in rows],
+            )
+
+    def forget(self, calendar_id: str, event_ids: Sequence[str]) -> None:
+        with self._lock, self.conn:
+            self.conn.executemany("DELETE FROM pushed WHERE calendar_id = ? AND event_id = ?",
+                                  [(calendar_id, event_id) for event_id in event_ids])
+
+
+_ledger: Optional[SyncLedger] = None
+
+
+def get_sync_ledger() -> SyncLedger:
+    global _ledger
+    if _ledger is None:
+        _ledger = SyncLedger()
+    return _ledger
+
+
+# --- Push ---
+
+def push_traces(service, traces: Sequence[Dict], calendar_id: str = "primary", ledger: Optional[SyncLedger] = None,
+                batch_size: int = MAX_BATCH_SIZE, max_retries: int = MAX_RETRIES, backoff: float = 1.0,
+                batch_uri: Optional[str] = None) -> PushReport:
+    """
+    Push `traces` so the calendar holds exactly one event per trace. Unchanged traces
+    make no API call; new ones are inserted and changed ones patched, in batches.
+    Events changed in Calendar since their last push are left alone and reported in
+    `failed` as conflicts.
+    """
+    ledger = ledger or get_sync_ledger()
+    failed: Dict[str, str] = {}
+    events: Dict[str, Dict] = {}
+    for trace in traces:
+        try:
+            event = trace_to_google_event(trace)
+        except (KeyError, ValueError) as e:
+            failed[str(trace.get("id"))] = f"{type(e).__name__}: {e}"
+            continue
+        events[event["id"]] = event                  # a repeated trace keeps its last version
+
+    hashes = {event_id: payload_hash(event) for event_id, event in events.items()}
+    known = ledger.get_many(calendar_id, list(events))
+    unchanged = [event_id for event_id in events
+                 if event_id in known and known[event_id].content_hash == hashes[event_id]]
+    to_insert = [event_id for event_id in events if event_id not in known]
+    to_patch = [event_id for event_id in events
+                if event_id in known and known[event_id].content_hash != hashes[event_id]]
+
+    inserted: List[str] = []
+    patched: List[str] = []
+    round_trips = 0
+
+    def run(event_ids: List[str], method: str) -> Dict[str, int]:
+        """Insert, patch or update `event_ids`; records successes and returns failed id -> HTTP status."""
+        nonlocal round_trips
+        if not event_ids:
+            return {}
+        if method == "insert":
+            build = lambda resource, i: resource.insert(calendarId=calendar_id, body=events[event_ids[i]])
+        elif method == "update":
+            build = lambda resource, i: resource.update(calendarId=calendar_id, eventId=event_ids[i],
+                                                        body=dict(events[event_ids[i]], status="confirmed"))
+        else:
+            def build(resource, i):
+                request = resource.patch(calendarId=calendar_id, eventId=event_ids[i], body=events[event_ids[i]])
+                etag = known[event_ids[i]].etag
+                if etag:
+                    request.headers["If-Match"] = etag
+                return request
+        report = execute_in_batches(service, build, len(event_ids), batch_size, max_retries, backoff, batch_uri)
+        round_trips += report.round_trips
+        done = []
+        for i, response in report.results.items():
+            event_id = event_ids[i]
+            (inserted if method == "insert" else patched).append(event_id)
+            trace_id = events[event_id]["extendedProperties"]["private"]["trace_id"]
+            done.append((event_id, trace_id, hashes[event_id], (response or {}).get("etag")))
+        ledger.put_many(calendar_id, done)
+        for i, error in report.failed.items():
+            if report.statuses.get(i) == 412:
+                error = f"conflict: event changed in Calendar since the last push ({error})"
+            failed[event_ids[i]] = error
+        return {event_ids[i]: status for i, status in report.statuses.items()}
+
+    insert_errors = run(to_insert, "insert")
+    patch_errors = run(to_patch, "patch")
+
+    # Ledger and calendar disagree: the id exists remotely (live or deleted), or is gone there
+    exists = [event_id for event_id, status in insert_errors.items() if status == 409]
+    deleted = [event_id for event_id, status in patch_errors.items() if status in (404, 410)]
+    ledger.forget(calendar_id, deleted)
+    for event_id in exists + deleted:
+        failed.pop(event_id, None)
+    run(exists, "update")
+    run(deleted, "insert")
+
+    return PushReport(sorted(inserted), sorted(patched), sorted(unchanged), failed, round_trips)
@@ -0,0 +1,164 @@
+# modules/google_sync/service_provider.py
+# Long-lived Google API services: credentials loaded once, clients built once from the
+# bundled (static) discovery document, tokens refreshed in the background
+#
+# authenticate_google() used to re-read token.json and rebuild the discovery client on
+# every call. A provider keeps one Credentials object per token file and one service
+# per (api, version) and thread - httplib2 connections are not thread-safe - so repeat
+# calls reuse the same client and its open HTTPS connection. A timer refreshes the
+# access token `refresh_margin` seconds before expiry and writes it back to token.json;
+# the services share the Credentials object, so they pick up the new token at once.
+
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import google_auth_httplib2
+import httplib2
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+
+SCOPES = ['https://www.googleapis.com/auth/calendar']
+DEFAULT_TOKEN_PATH = os.getenv("GOOGLE_TOKEN_PATH", "calendar/token.json")
+DEFAULT_CREDENTIALS_PATH = os.getenv("GOOGLE_CREDENTIALS_PATH", "calendar/credentials.json")
+REFRESH_MARGIN = int(os.getenv("GOOGLE_TOKEN_REFRESH_MARGIN", 300))     # seconds before expiry
+RETRY_DELAY = 30
+
+
+class GoogleServiceProvider:
+    """
+    Cached credentials and services for one token file:
+
+        provider = get_service_provider()
+        service = provider.service()            # same object on every call from this thread
+
+    With `interactive=False` a missing or unusable token raises instead of opening a
+    browser for the OAuth flow (servers); `token_uri` and `client_options` point the
+    provider at a local fake API.
+    """
+
+    def __init__(self, token_path: Union[str, Path] = DEFAULT_TOKEN_PATH,
+                 credentials_path: Union[str, Path] = DEFAULT_CREDENTIALS_PATH,
+                 scopes: Sequence[str] = SCOPES, interactive: bool = True,
+                 refresh_margin: float = REFRESH_MARGIN, token_uri: Optional[str] = None,
+                 client_options: Optional[Dict] = None):
+        self.token_path = Path(token_path)
+        self.credentials_path = Path(credentials_path)
+        self.scopes = list(scopes)
+        self.interactive = interactive
+        self.refresh_margin = refresh_margin
+        self.token_uri = token_uri
+        self.client_options = client_options
+        self.refreshes = 0
+        self._creds: Optional[Credentials] = None
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._timer: Optional[threading.Timer] = None
+        self._closed = False
+
+    # --- Credentials ---
+
+    def credentials(self) -> Credentials:
+        """The shared Credentials, loaded (and refreshed or authorized if needed) on first use."""
+        with self._lock:
+            if self._creds is None:
+                self._creds = self._load()
+                if not self._creds.valid:
+                    self._refresh()
+                self._schedule()
+            return self._creds
+
+    def _load(self) -> Credentials:
+        if self.token_path.exists():
+            creds = Credentials.from_authorized_user_file(str(self.token_path), self.scopes)
+            if self.token_uri:
+                expiry = creds.expiry
+                creds = creds.with_token_uri(self.token_uri)
+                creds.expiry = expiry           # the copy does not carry the expiry over
+            if creds.valid or creds.refresh_token:
+                return creds
+        if not self.interactive:
+            raise RuntimeError(f"No usable Google token at {self.token_path}. Run auth_setup.py first.")
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        flow = InstalledAppFlow.from_client_secrets_file(str(self.credentials_path), self.scopes)
+        creds = flow.run_local_server(port=0)
+        self._save(creds)
+        return creds
+
+    def _refresh(self) -> None:
+        self._creds.refresh(google_auth_httplib2.Request(httplib2.Http()))
+        self.refreshes += 1
+        self._save(self._creds)
+
+    def _save(self, creds: Credentials) -> None:
+        self.token_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.token_path.with_name(self.token_path.name + ".tmp")
+        with open(tmp, "w") as token:
+            token.write(creds.to_json())
+        os.replace(tmp, self.token_path)
+
+    # --- Background refresh ---
+
+    def _schedule(self, delay: Optional[float] = None) -> None:
+        if self._closed or self._creds is None or (delay is None and self._creds.expiry is None):
+            return
+        if delay is None:
+            remaining = (self._creds.expiry - datetime.utcnow()).total_seconds()    # expiry is naive UTC
+            delay = max(0.0, remaining - self.refresh_margin)
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            try:
+                self._refresh()
+            except Exception as e:
+                print(f"[!] Background token refresh failed ({e}), retrying in {RETRY_DELAY}s")
+                self._schedule(RETRY_DELAY)
+                return
+            self._schedule()
+
+    # --- Services ---
+
+    def service(self, api: str = "calendar", version: str = "v3"):
+        """Service for `api`/`version`, built once per thread from the static discovery document."""
+        services: Dict[Tuple[str, str], object] = getattr(self._local, "services", None)
+        if services is None:
+            services = self._local.services = {}
+        if (api, version) not in services:
+            http = google_auth_httplib2.AuthorizedHttp(self.credentials(), http=httplib2.Http())
+            services[(api, version)] = build(api, version, http=http, static_discovery=True,
+                                             cache_discovery=False, client_options=self.client_options)
+        return services[(api, version)]
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            if self._timer is not None:
+                self._timer.cancel()
+
+
+_providers: Dict[Tuple[str, str, Tuple[str, ...], bool], GoogleServiceProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_service_provider(token_path: Union[str, Path] = DEFAULT_TOKEN_PATH,
+                         credentials_path: Union[str, Path] = DEFAULT_CREDENTIALS_PATH,
+                         scopes: Sequence[str] = SCOPES, interactive: bool = True) -> GoogleServiceProvider:
+    """Process-wide provider per (token file, client secrets, scopes, interactive)."""
+    key = (str(Path(token_path).resolve()), str(credentials_path), tuple(scopes), interactive)
+    with _providers_lock:
+        if key not in _providers:
+            _providers[key] = GoogleServiceProvider(token_path, credentials_path, scopes, interactive)
+        return _providers[key]
+
+
+def get_calendar_service(interactive: bool = True):
+    return get_service_provider(interactive=interactive).service("calendar", "v3")
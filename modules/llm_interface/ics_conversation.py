@@ -1,9 +1,13 @@
 import json
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 from openai import OpenAI
 
+from modules.calendar_io.ics_tokenizer import iter_ics_events
+from modules.calendar_io.recurrence import expand_traces
+from modules.core.time_index import TimeIndex, to_epoch, trace_interval
+
 client = OpenAI()
 
 # --- Function Definitions for Tool Use ---
@@ -23,42 +27,24 @@ function_definitions = [
 ]
 
 # --- ICS Importer ---
-def parse_ics_datetime(dt_str: str) -> str:
-    return datetime.strptime(dt_str.strip(), "%Y%m%dT%H%M%SZ").isoformat() + "Z"
-
 def import_ics(filepath: str) -> List[Dict]:
-    with open(filepath, "r") as f:
-        content = f.read()
-    events = []
-    for block in content.split("BEGIN:VEVENT")[1:]:
-        lines = block.strip().splitlines()
-        trace = {"type": "calendar_event"}
-        for line in lines:
-            if line.startswith("SUMMARY:"):
-                trace["title"] = line[8:].strip()
-            elif line.startswith("DESCRIPTION:"):
-                trace["content"] = line[12:].strip()
-            elif line.startswith("DTSTART:"):
-                trace["timestamp"] = parse_ics_datetime(line[8:].strip())
-            elif line.startswith("DTEND:"):
-                trace["end"] = parse_ics_datetime(line[6:].strip())
-            elif line.startswith("UID:"):
-                trace["id"] = line[4:].strip()
-        if "timestamp" in trace and "end" in trace:
-            start = datetime.fromisoformat(trace["timestamp"].replace("Z", "+00:00"))
-            end = datetime.fromisoformat(trace["end"].replace("Z", "+00:00"))
-            trace["duration_minutes"] = int((end - start).total_seconds() / 60)
-        events.append(trace)
-    return events
+    return list(iter_ics_events(filepath))
 
 # --- Timestamp Filter ---
-def filter_by_timestamp(traces: List[Dict], start_date: str, end_date: str) -> List[Dict]:
-    start = datetime.fromisoformat(start_date)
-    end = datetime.fromisoformat(end_date)
-    return [
-        trace for trace in traces
-        if start <= datetime.fromisoformat(trace["timestamp"].replace("Z", "+00:00")) <= end
-    ]
+def filter_by_timestamp(traces: List[Dict], start_date: str, end_date: str,
+                        index: Optional[TimeIndex] = None) -> List[Dict]:
+    # Pass a prebuilt index when filtering the same traces repeatedly; a one-off call is a linear scan
+    if index is not None:
+        return index.range(start_date, end_date)
+    s, e = to_epoch(start_date), to_epoch(end_date)
+    window = (datetime.fromtimestamp(s, timezone.utc), datetime.fromtimestamp(e, timezone.utc))
+    found = []
+    for trace in expand_traces(traces, window):
+        interval = trace_interval(trace)
+        if interval is not None and s <= interval[0] <= e:
+            found.append((interval[0], trace))
+    found.sort(key=lambda entry: entry[0])
+    return [trace for _, trace in found]
 
 # --- Summarization ---
 def format_traces_for_summary(traces: List[Dict]) -> str:
@@ -92,7 +78,8 @@ def parse_date_call(tool_calls) -> (str, str):
     return None, None
 
 # --- Full Prompt Handler ---
-def summarize_events_from_prompt(user_prompt: str, traces: List[Dict]) -> Dict:
+def summarize_events_from_prompt(user_prompt: str, traces: List[Dict],
+                                 index: Optional[TimeIndex] = None) -> Dict:
     system_message = {
         "role": "developer",
         "content": (
@@ -121,7 +108,7 @@ def summarize_events_from_prompt(user_prompt: str, traces: List[Dict]) -> Dict:
             "error": "Missing date extraction."
         }
 
-    filtered = filter_by_timestamp(traces, start_date, end_date)
+    filtered = filter_by_timestamp(traces, start_date, end_date, index=index)
     summary = summarize_traces(filtered) if filtered else f"No events found between {start_date} and {end_date}."
 
     return {
@@ -135,6 +122,7 @@ def summarize_events_from_prompt(user_prompt: str, traces: List[Dict]) -> Dict:
 # --- Run a Prompt Suite ---
 def run_prompt_suite(data_path: str, prompt_path: str, output_dir: str):
     traces = import_ics(data_path)
+    index = TimeIndex(traces)
     with open(prompt_path, "r") as f:
         prompts = json.load(f)
 
@@ -142,7 +130,7 @@ def run_prompt_suite(data_path: str, prompt_path: str, output_dir: str):
     for entry in prompts:
         prompt = entry["prompt"]
         print(f"→ Running prompt: {prompt}")
-        result = summarize_events_from_prompt(prompt, traces)
+        result = summarize_events_from_prompt(prompt, traces, index=index)
         result["id"] = entry.get("id")
         result["expected"] = entry.get("expected")
         results.append(result)
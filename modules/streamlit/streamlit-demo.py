@@ -1,4 +1,4 @@
-# streamlit run modules/streamlit/streamlit-demo.py
+# PYTHONPATH=. streamlit run modules/streamlit/streamlit-demo.py
 
 import streamlit as st
 import pandas as pd
@@ -7,7 +7,7 @@ from ics import Calendar, Event
 from openai import OpenAI
 import json
 from zoneinfo import ZoneInfo
-from dateutil.parser import parse
+from modules.core.trace_table import TraceTable, calendar_frame
 
 st.set_page_config(page_title="Chronologue: Conversational Calendar", layout="wide")
 client = OpenAI()
@@ -81,28 +81,7 @@ def load_memory_trace(json_text):
         return []
 
 def convert_full_memory_trace_to_dataframe(memory_entries):
-    rows = []
-    for entry in memory_entries:
-        start_dt = parse(entry["timestamp"])
-        duration = entry.get("duration_minutes", 15)
-
-        rows.append({
-            "Date": start_dt.date().isoformat(),
-            "Day": start_dt.strftime("%A"),
-            "Start Time": start_dt.strftime("%I:%M %p").lstrip("0"),
-            "Start Time 24H": start_dt.strftime("%H:%M"),
-            "Start ISO": start_dt.isoformat(),
-            "End Time": (start_dt + pd.to_timedelta(duration, unit='m')).strftime("%I:%M %p").lstrip("0"),
-            "Duration (min)": duration,
-            "Event Title": entry.get("content", f"({entry['type'].capitalize()})"),
-            "Location": ", ".join(entry.get("collaborators", [])) if entry.get("collaborators") else "",
-            "Notes": f"Type: {entry['type']}" +
-                     (f", Task: {entry['task_id']}" if 'task_id' in entry else '') +
-                     (f", Status: {entry['completion_status']}" if 'completion_status' in entry else '') +
-                     (f", Importance: {entry['importance']}" if 'importance' in entry else '')
-        })
-
-    return pd.DataFrame(rows)
+    return calendar_frame(TraceTable.from_traces(memory_entries))
 
 # --- Prompt Constructor ---
 def build_prompt(df, user_query):
@@ -1,34 +1,55 @@
 # python modules/tempo/tempo_token.py
 
-from ics import Calendar
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from openai import OpenAI
 import re
 
+from modules.calendar_io.ics_events import load_calendar_events, overridden_instants
+
 client = OpenAI()
 
 # --- Parse ICS and Generate Tempo Tokens ---
 def parse_ics_to_events(ics_path):
-    with open(ics_path, 'r') as f:
-        calendar = Calendar(f.read())
     events = []
-    for event in calendar.events:
+    for event in load_calendar_events(ics_path):
         tokens = generate_tempo_tokens(event)
         events.append({
             "uid": event.uid,
             "title": event.name,
             "description": event.description or "",
-            "start": event.begin.datetime,
-            "end": event.end.datetime,
-            "tokens": tokens
+            "start": event.begin,
+            "end": event.end,
+            "tokens": tokens,
+            "event": event
         })
     return events
 
+# --- Recurrence ---
+def events_on_date(events, date_filter):
+    """Events on a YYYY-MM-DD date, with recurring events expanded to that day's occurrences."""
+    day = datetime.fromisoformat(date_filter).replace(tzinfo=timezone.utc)
+    # Occurrences are filtered on their local date, so search a day either side
+    window = (day - timedelta(days=1), day + timedelta(days=2))
+    # Instances moved by an override are listed at their new time only
+    overridden = overridden_instants(e["event"] for e in events if e.get("event") is not None)
+    matched = []
+    for e in events:
+        event = e.get("event")
+        if event is None or event.recurrence is None:
+            if e["start"].date().isoformat() == date_filter:
+                matched.append(e)
+            continue
+        for occurrence in event.occurrences(*window, exclude=overridden.get(event.uid, ())):
+            if occurrence.begin.date().isoformat() == date_filter:
+                matched.append({**e, "start": occurrence.begin, "end": occurrence.end,
+                                "tokens": generate_tempo_tokens(occurrence)})
+    return matched
+
 # --- Tempo Token Generator ---
 def generate_tempo_tokens(event):
     tokens = []
-    start = event.begin.datetime
-    end = event.end.datetime
+    start = event.begin
+    end = event.end
 
     tokens.append(f"<tempo:uid-{event.uid}>")
     tokens.append(f"<tempo:{start.strftime('%Y-%m-%dT%H:%MZ')}>")
@@ -55,9 +76,9 @@ def generate_tempo_tokens(event):
 # --- Prompt Constructor ---
 def construct_prompt(events, user_query, date_filter=None):
     prompt = "You are a calendar-aware assistant. Based on the user's schedule:\n"
+    if date_filter:
+        events = events_on_date(events, date_filter)
     for e in events:
-        if date_filter and e["start"].date().isoformat() != date_filter:
-            continue
         token_str = " ".join(e["tokens"])
         time_str = e["start"].strftime("%I:%M %p").lstrip("0")
         prompt += f"- {e['title']} at {time_str}. {token_str}\n"
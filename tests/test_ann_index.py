@@ -0,0 +1,98 @@
+# tests/test_ann_index.py
+
+# PYTHONPATH=. pytest tests/test_ann_index.py
+
+import numpy as np
+from modules.core.ann_index import TraceANNIndex, recall_at_k
+
+TRACES = [
+    {"id": "m001", "type": "observation", "timestamp": "2025-04-12T09:00:00Z"},
+    {"id": "m002", "type": "reminder", "timestamp": "2025-04-13T09:00:00Z"},
+    {"id": "m003", "type": "reminder", "timestamp": "2025-04-20T09:00:00Z"},
+]
+VECTORS = np.array([[1.0, 0.0, 0.0], [0.9, 0.1, 0.0], [0.0, 1.0, 0.0]], dtype=np.float32)
+
+
+def make_index():
+    index = TraceANNIndex(3)
+    index.add([t["id"] for t in TRACES], VECTORS, TRACES)
+    return index
+
+
+def test_add_search_and_remove():
+    index = make_index()
+    hits = index.search(np.array([1.0, 0.0, 0.0]), k=2)[0]
+    assert [trace_id for trace_id, _ in hits] == ["m001", "m002"]
+    assert abs(hits[0][1] - 1.0) < 1e-6
+
+    index.remove(["m001"])
+    assert "m001" not in index
+    assert index.search(np.array([1.0, 0.0, 0.0]), k=1)[0][0][0] == "m002"
+
+
+def test_re_adding_an_id_replaces_it():
+    index = make_index()
+    index.add(["m001"], np.array([[0.0, 0.0, 1.0]]), [TRACES[0]])
+    assert len(index) == 3
+    assert index.search(np.array([0.0, 0.0, 1.0]), k=1)[0][0][0] == "m001"
+
+
+def test_repeated_id_in_one_batch_keeps_the_last_vector():
+    index = TraceANNIndex(3)
+    index.add(["m001", "m002", "m001"], np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]))
+    assert len(index) == 2
+    assert index.index.ntotal == 2
+    hits = index.search(np.array([1.0, 0.0, 0.0]), k=3)[0]
+    assert sorted(trace_id for trace_id, _ in hits) == ["m001", "m002"]
+    assert index.search(np.array([0.0, 0.0, 1.0]), k=1)[0][0][0] == "m001"
+
+
+def test_filtered_search():
+    index = make_index()
+    query = np.array([1.0, 0.0, 0.0])
+    assert [h[0] for h in index.search(query, k=3, types="reminder")[0]] == ["m002", "m003"]
+    assert [h[0] for h in index.search(query, k=3, start="2025-04-13T00:00:00Z")[0]] == ["m002", "m003"]
+    assert [h[0] for h in index.search(query, k=3, types="reminder", end="2025-04-14T00:00:00Z")[0]] == ["m002"]
+
+
+def test_save_and_load(tmp_path):
+    index = make_index()
+    index.save(tmp_path / "traces.ann")
+    loaded = TraceANNIndex.load(tmp_path / "traces.ann")
+    assert len(loaded) == 3
+    assert loaded.search(np.array([0.0, 1.0, 0.0]), k=1, types="reminder")[0][0][0] == "m003"
+
+    loaded.add(["m004"], np.array([[0.0, 1.0, 0.1]]))
+    assert loaded.labels["m004"] == 3
+
+
+def test_ivf_promotion_keeps_recall():
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((800, 16)).astype(np.float32)
+    ids = [f"t{i}" for i in range(len(matrix))]
+    index = TraceANNIndex(16, nlist=8, nprobe=8, train_size=400)
+    index.add(ids[:500], matrix[:500])
+    assert index.is_ivf
+    index.add(ids[500:], matrix[500:])
+    index.remove(ids[:10])
+
+    live = ids[10:]
+    # All cells probed, so IVF search must match exact search
+    assert recall_at_k(index, live, matrix[10:], matrix[10:60], k=10) == 1.0
+
+
+def test_tight_filter_on_ivf_may_return_fewer_than_k():
+    rng = np.random.default_rng(1)
+    matrix = rng.standard_normal((800, 16)).astype(np.float32)
+    traces = [{"id": f"t{i}", "type": "rare" if i % 100 == 0 else "common"} for i in range(len(matrix))]
+    index = TraceANNIndex(16, nlist=16, nprobe=1, train_size=400)
+    index.add_traces(traces, matrix)
+    assert index.is_ivf
+
+    # Only the nearest cell is probed, so most of the 8 "rare" traces are out of reach
+    hits = index.search(matrix[1], k=8, types="rare")[0]
+    assert len(hits) < 8
+    assert all(int(trace_id[1:]) % 100 == 0 for trace_id, _ in hits)
+    index.nprobe = index.nlist
+    assert len(index.search(matrix[1], k=8, types="rare")[0]) == 8
+    assert index.search(matrix[1], k=8, types="missing")[0] == []
@@ -0,0 +1,52 @@
+# tests/test_batch_insert.py
+
+# PYTHONPATH=. pytest tests/test_batch_insert.py
+
+from modules.google_sync.batch_insert import batch_insert_events
+from modules.google_sync.fake_calendar import FakeCalendarAPI, build_fake_service
+
+
+def event(i):
+    return {"summary": f"Event {i}", "start": {"dateTime": "2025-05-12T09:00:00Z"},
+            "end": {"dateTime": "2025-05-12T09:15:00Z"}}
+
+
+def summary_in(*names):
+    return lambda method, path, body: body.get("summary") in names
+
+
+def test_inserts_in_batches_of_fifty():
+    with FakeCalendarAPI() as api:
+        service = build_fake_service(api)
+        report = batch_insert_events(service, [event(i) for i in range(2000)], batch_uri=api.batch_uri)
+        assert len(report.inserted) == 2000 and report.failed == {}
+        assert report.round_trips == 40
+        assert api.http_requests == 40
+        assert sorted(e["summary"] for e in api.events()) == sorted(f"Event {i}" for i in range(2000))
+        assert report.inserted[7]["summary"] == "Event 7"
+
+
+def test_retries_only_failed_items():
+    with FakeCalendarAPI() as api:
+        api.fail(503, times=2, when=summary_in("Event 3", "Event 60"))
+        api.fail(429, times=1, when=summary_in("Event 61"))
+        api.fail(400, times=5, when=summary_in("Event 5"))
+        service = build_fake_service(api)
+        report = batch_insert_events(service, [event(i) for i in range(70)], batch_uri=api.batch_uri, backoff=0)
+
+        assert sorted(report.inserted) == [i for i in range(70) if i != 5]
+        assert list(report.failed) == [5] and report.failed[5].startswith("HTTP 400")
+        assert report.round_trips == 3       # two initial batches, one retry batch of three
+        assert api.calls == 70 + 3
+        assert len(api.events()) == 69
+
+
+def test_gives_up_after_max_retries():
+    with FakeCalendarAPI() as api:
+        api.fail(503, times=10, when=summary_in("Event 0"))
+        service = build_fake_service(api)
+        report = batch_insert_events(service, [event(0), event(1)], batch_uri=api.batch_uri,
+                                     max_retries=2, backoff=0)
+        assert list(report.inserted) == [1]
+        assert report.failed[0].startswith("HTTP 503")
+        assert report.round_trips == 3
@@ -1,7 +1,16 @@
 # tests/test_embeddings.py
 import os
-from modules import embeddings
+from modules.core import embeddings
 from unittest.mock import patch, MagicMock
+import pytest
+from modules.core.embedding_cache import EmbeddingCache
+
+
+@pytest.fixture(autouse=True)
+def memory_cache(monkeypatch):
+    cache = EmbeddingCache(":memory:")
+    monkeypatch.setattr(embeddings, "_embedding_cache", cache)
+    return cache
 
 def test_get_openai_embedding_success():
     sample_text = "This is a test sentence for embedding."
@@ -23,7 +32,7 @@ def test_get_openai_embedding_error():
 
 
 def test_embed_trace_with_content():
-    with patch("modules.embeddings.get_openai_embedding", return_value=[0.1] * 1536):
+    with patch("modules.core.embeddings.get_openai_embedding", return_value=[0.1] * 1536):
         trace = {"content": "Test content"}
         embedding = embeddings.embed_trace(trace)
         assert isinstance(embedding, list)
@@ -31,7 +40,7 @@ def test_embed_trace_with_content():
 
 
 def test_embed_memory_traces_overwrite_false_skips_existing():
-    with patch("modules.embeddings.get_openai_embedding", return_value=[0.1] * 1536):
+    with patch("modules.core.embeddings.get_openai_embeddings", side_effect=lambda texts, **kw: [[0.1] * 1536 for _ in texts]):
         trace1 = {"content": "Pre-embedded", "embedding": [0.9] * 1536}
         trace2 = {"content": "Needs embedding"}
         traces = embeddings.embed_memory_traces([trace1, trace2], overwrite=False)
@@ -40,9 +49,96 @@ def test_embed_memory_traces_overwrite_false_skips_existing():
 
 
 def test_embed_memory_traces_overwrite_true_embeds_all():
-    with patch("modules.embeddings.get_openai_embedding", return_value=[0.5] * 1536):
+    with patch("modules.core.embeddings.get_openai_embeddings", side_effect=lambda texts, **kw: [[0.5] * 1536 for _ in texts]):
         trace1 = {"content": "Embed me", "embedding": [0.9] * 1536}
         trace2 = {"content": "Embed me too"}
         traces = embeddings.embed_memory_traces([trace1, trace2], overwrite=True)
         for trace in traces:
             assert trace["embedding"] == [0.5] * 1536
+
+
+# --- Batched embedding against a local fake endpoint ---
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from openai import OpenAI
+
+
+class FakeEmbeddingsHandler(BaseHTTPRequestHandler):
+    requests = []
+    fail_next = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        FakeEmbeddingsHandler.requests.append(body["input"])
+        if FakeEmbeddingsHandler.fail_next:
+            FakeEmbeddingsHandler.fail_next -= 1
+            self.send_response(500)
+            self.end_headers()
+            return
+        # Reply out of order; the client must reorder by index
+        data = [
+            {"object": "embedding", "index": i, "embedding": [float(len(text)), 1.0]}
+            for i, text in reversed(list(enumerate(body["input"])))
+        ]
+        payload = json.dumps({"object": "list", "data": data, "model": body["model"],
+                              "usage": {"prompt_tokens": 0, "total_tokens": 0}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def fake_client():
+    FakeEmbeddingsHandler.requests = []
+    server = HTTPServer(("127.0.0.1", 0), FakeEmbeddingsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_client = OpenAI(api_key="test", base_url=f"http://127.0.0.1:{server.server_port}/v1", max_retries=0)
+    return server, api_client
+
+
+def test_get_openai_embeddings_batches_and_keeps_order():
+    server, api_client = fake_client()
+    try:
+        texts = ["a" * n for n in range(1, 41)]
+        vectors = embeddings.get_openai_embeddings(texts, max_inputs=8, max_concurrency=3, api_client=api_client)
+        assert [v[0] for v in vectors] == [float(n) for n in range(1, 41)]
+        assert len(FakeEmbeddingsHandler.requests) == 5
+    finally:
+        server.shutdown()
+
+
+def test_get_openai_embeddings_retries_failed_batch():
+    server, api_client = fake_client()
+    FakeEmbeddingsHandler.fail_next = 1
+    try:
+        vectors = embeddings.get_openai_embeddings(["x", "", "yy"], backoff=0.01, api_client=api_client)
+        assert vectors == [[1.0, 1.0], [], [2.0, 1.0]]
+        assert FakeEmbeddingsHandler.requests == [["x", "yy"], ["x", "yy"]]
+    finally:
+        server.shutdown()
+
+
+def test_get_openai_embedding_uses_cache(memory_cache):
+    with patch.object(embeddings.client.embeddings, 'create') as mock_create:
+        mock_create.return_value = MagicMock(data=[MagicMock(embedding=[0.25] * 4)])
+        assert embeddings.get_openai_embedding("Lab safety  inspection") == [0.25] * 4
+        assert embeddings.get_openai_embedding("Lab safety inspection ") == [0.25] * 4
+        assert mock_create.call_count == 1
+    assert memory_cache.stats()["hits"] == 1
+
+
+def test_get_openai_embeddings_sends_only_uncached_unique_texts(memory_cache):
+    memory_cache.put("cached", [9.0, 9.0], embeddings.EMBEDDING_MODEL, 0)
+    server, api_client = fake_client()
+    try:
+        vectors = embeddings.get_openai_embeddings(["cached", "new", "new"], api_client=api_client)
+        assert vectors == [[9.0, 9.0], [3.0, 1.0], [3.0, 1.0]]
+        assert FakeEmbeddingsHandler.requests == [["new"]]
+    finally:
+        server.shutdown()
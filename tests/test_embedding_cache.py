@@ -0,0 +1,36 @@
+# tests/test_embedding_cache.py
+
+# PYTHONPATH=. pytest tests/test_embedding_cache.py
+
+from modules.core.embedding_cache import EmbeddingCache, cache_key
+
+
+def test_key_depends_on_model_dimensions_and_normalized_text():
+    assert cache_key("m", 0, "a  b\n") == cache_key("m", 0, "a b")
+    assert cache_key("m", 0, "a b") != cache_key("m", 256, "a b")
+    assert cache_key("m", 0, "a b") != cache_key("other", 0, "a b")
+
+
+def test_persists_and_counts(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite")
+    cache.put("hello", [0.5, 0.25], "m", 0)
+    cache.put("failed", [], "m", 0)
+    assert cache.get_many(["hello", "failed"], "m", 0) == [[0.5, 0.25], None]
+
+    reopened = EmbeddingCache(tmp_path / "cache.sqlite")
+    assert reopened.get("hello", "m", 0) == [0.5, 0.25]
+    stats = reopened.stats()
+    assert (stats["entries"], stats["bytes"], stats["hits"], stats["misses"]) == (1, 8, 1, 0)
+
+
+def test_evicts_least_recently_used():
+    cache = EmbeddingCache(":memory:", max_bytes=16)
+    cache.put("a", [1.0, 1.0], "m", 0)
+    cache.put("b", [2.0, 2.0], "m", 0)
+    cache.get("a", "m", 0)
+    cache.put("c", [3.0, 3.0], "m", 0)
+
+    assert cache.get("b", "m", 0) is None
+    assert cache.get("a", "m", 0) == [1.0, 1.0]
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 16
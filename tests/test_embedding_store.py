@@ -0,0 +1,38 @@
+# tests/test_embedding_store.py
+
+# PYTHONPATH=. pytest tests/test_embedding_store.py
+
+import json
+import numpy as np
+from modules.core.embedding_store import EmbeddingStore, embedding_matrix, migrate_embedded_json
+
+TRACES = [
+    {"id": "m001", "content": "Restock tips", "embedding": [1.0, 0.0, 0.0]},
+    {"id": "m002", "content": "Embedding failed", "embedding": []},
+    {"id": "m003", "content": "Incubator drift", "embedding": [0.0, 0.5, 0.5]},
+]
+
+
+def test_migrate_embedded_json(tmp_path):
+    source = tmp_path / "session_embedded.json"
+    source.write_text(json.dumps(TRACES))
+
+    store = migrate_embedded_json(source)
+    assert store.base == tmp_path / "session_embedded"
+    assert len(store) == 2
+    assert store.dim == 3
+    assert isinstance(store.matrix, np.memmap)
+    assert store.matrix.dtype == np.float32
+    assert np.allclose(store.vector("m003"), [0.0, 2 ** -0.5, 2 ** -0.5])
+    assert store.normalized
+    assert store.vector("m002") is None
+
+
+def test_traces_share_the_mapped_matrix(tmp_path):
+    store = EmbeddingStore.write(tmp_path / "session_embedded", TRACES)
+    traces = EmbeddingStore(tmp_path / "session_embedded").traces()
+
+    assert [t["id"] for t in traces] == ["m001", "m003"]
+    assert np.shares_memory(traces[1]["embedding"], traces.matrix)
+    assert embedding_matrix(traces) is traces.matrix
+    assert embedding_matrix(list(traces)).tolist() == store.matrix.tolist()
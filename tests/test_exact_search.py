@@ -0,0 +1,62 @@
+# tests/test_exact_search.py
+
+# PYTHONPATH=. pytest tests/test_exact_search.py
+
+import numpy as np
+from modules.core.embedding_store import EmbeddingStore
+from modules.core.exact_search import ExactIndex, exact_index, normalize_rows, top_k
+
+TRACES = [
+    {"id": "m001", "embedding": [1.0, 0.0, 0.0]},
+    {"id": "m002", "embedding": [0.0, 0.0, 0.0]},
+    {"id": "m003", "embedding": [2.0, 2.0, 0.0]},
+    {"id": "m004", "embedding": [0.0, 3.0, 0.0]},
+]
+
+
+def reference_cosine(a, b):
+    a, b = np.array(a), np.array(b)
+    if np.linalg.norm(a) == 0 or np.linalg.norm(b) == 0:
+        return 0.0
+    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+
+
+def test_scores_match_per_pair_cosine():
+    index = ExactIndex(TRACES)
+    query = [1.0, 0.5, 0.0]
+    expected = [reference_cosine(t["embedding"], query) for t in TRACES]
+    assert np.allclose(index.scores(np.array(query)), expected, atol=1e-6)
+
+
+def test_normalize_rows_keeps_zero_rows():
+    matrix = normalize_rows(np.array([[3.0, 4.0], [0.0, 0.0]]))
+    assert matrix.dtype == np.float32
+    assert matrix.tolist() == [[0.6000000238418579, 0.800000011920929], [0.0, 0.0]]
+
+
+def test_top_k_is_sorted_and_stable_on_ties():
+    rows, scores = top_k(np.array([0.1, 0.9, 0.5, 0.9, 0.2]), 3)
+    assert rows.tolist() == [[1, 3, 2]]
+    assert scores.tolist() == [[0.9, 0.9, 0.5]]
+    assert top_k(np.array([0.3, 0.1]), 5)[0].tolist() == [[0, 1]]
+
+
+def test_batch_queries_match_single_queries():
+    index = ExactIndex(TRACES)
+    queries = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], dtype=np.float32)
+    rows, scores = index.search(queries, k=2)
+    assert rows.tolist() == [[0, 2], [3, 2]]
+    for query, row in zip(queries, rows):
+        assert index.search(query, k=2)[0][0].tolist() == row.tolist()
+
+
+def test_normalized_store_is_searched_without_a_copy(tmp_path):
+    EmbeddingStore.write(tmp_path / "session_embedded", TRACES)
+    traces = EmbeddingStore(tmp_path / "session_embedded").traces()
+
+    index = exact_index(traces)
+    assert index.matrix is traces.matrix
+    assert exact_index(traces) is index
+    rows, scores = index.search(np.array([1.0, 1.0, 0.0]), k=1)
+    assert [traces[i]["id"] for i in rows[0]] == ["m003"]
+    assert np.allclose(scores, [[1.0]], atol=1e-6)
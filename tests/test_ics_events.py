@@ -0,0 +1,64 @@
+# tests/test_ics_events.py
+
+# PYTHONPATH=. pytest tests/test_ics_events.py
+
+from datetime import datetime, timedelta, timezone
+from ics import Calendar
+from modules.calendar_io.ics_events import load_calendar_events, parse_duration
+
+ICS = """BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//Chronologue//Test//EN
+BEGIN:VEVENT
+UID:a
+SUMMARY:Team meeting\\, weekly
+DESCRIPTION:Agenda\\nUrgent items first
+DTSTART;TZID=America/New_York:20250512T090000
+DTEND;TZID=America/New_York:20250512T100000
+END:VEVENT
+BEGIN:VEVENT
+UID:b
+DTSTART:20250512T090000
+DURATION:PT45M
+END:VEVENT
+BEGIN:VEVENT
+UID:c
+SUMMARY:Offsite
+DTSTART;VALUE=DATE:20250512
+END:VEVENT
+BEGIN:VEVENT
+UID:d
+DTSTART:20250512T090000Z
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def test_matches_ics_library(tmp_path):
+    path = tmp_path / "cal.ics"
+    path.write_text(ICS)
+    native = {e.uid: e for e in load_calendar_events(path)}
+    library = Calendar(ICS).events
+
+    assert set(native) == {e.uid for e in library}
+    for event in library:
+        record = native[event.uid]
+        assert record.name == event.name
+        assert record.description == event.description
+        assert record.begin == event.begin.datetime
+        assert record.end == event.end.datetime
+        assert record.all_day == event.all_day
+
+
+def test_records_keep_file_order_and_zones(tmp_path):
+    path = tmp_path / "cal.ics"
+    path.write_text(ICS)
+    events = load_calendar_events(path)
+    assert [e.uid for e in events] == ["a", "b", "c", "d"]
+    assert events[0].begin.utcoffset() == timedelta(hours=-4)
+    assert events[3].begin == datetime(2025, 5, 12, 9, tzinfo=timezone.utc)
+
+
+def test_parse_duration():
+    assert parse_duration("P1W2DT3H4M5S") == timedelta(weeks=1, days=2, hours=3, minutes=4, seconds=5)
+    assert parse_duration("-PT15M") == -timedelta(minutes=15)
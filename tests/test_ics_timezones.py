@@ -0,0 +1,80 @@
+# tests/test_ics_timezones.py
+
+# PYTHONPATH=. pytest tests/test_ics_timezones.py
+
+import io
+from datetime import datetime, timedelta
+from modules.calendar_io.ics_timezones import TimezoneResolver, iana_table
+from modules.calendar_io.ics_tokenizer import iter_component_trees, iter_ics_events
+
+VTIMEZONE = """BEGIN:VTIMEZONE
+TZID:Eastern Standard Time
+BEGIN:STANDARD
+DTSTART:16010101T020000
+TZOFFSETFROM:-0400
+TZOFFSETTO:-0500
+RRULE:FREQ=YEARLY;BYDAY=1SU;BYMONTH=11
+END:STANDARD
+BEGIN:DAYLIGHT
+DTSTART:16010101T020000
+TZOFFSETFROM:-0500
+TZOFFSETTO:-0400
+RRULE:FREQ=YEARLY;BYDAY=2SU;BYMONTH=3
+END:DAYLIGHT
+END:VTIMEZONE
+"""
+
+CALENDAR = f"""BEGIN:VCALENDAR
+VERSION:2.0
+{VTIMEZONE}BEGIN:VEVENT
+UID:windows-zone
+DTSTART;TZID=Eastern Standard Time:20250704T090000
+DTEND;TZID=Eastern Standard Time:20250704T100000
+END:VEVENT
+BEGIN:VEVENT
+UID:iana-zone
+DTSTART;TZID=America/Los_Angeles:20250115T090000
+DURATION:PT45M
+END:VEVENT
+BEGIN:VEVENT
+UID:all-day
+DTSTART;VALUE=DATE:20250512
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def test_tokenizer_converts_to_utc():
+    events = {e["id"]: e for e in iter_ics_events(io.StringIO(CALENDAR))}
+    assert events["windows-zone"]["timestamp"] == "2025-07-04T13:00:00Z"
+    assert events["windows-zone"]["duration_minutes"] == 60
+    assert events["iana-zone"]["timestamp"] == "2025-01-15T17:00:00Z"
+    assert events["iana-zone"]["end"] == "2025-01-15T17:45:00Z"
+    assert events["all-day"]["timestamp"] == "2025-05-12T00:00:00Z"
+    assert events["all-day"]["duration_minutes"] == 1440
+
+
+def test_vtimezone_matches_iana_rules():
+    resolver = TimezoneResolver()
+    resolver.add_vtimezone(next(iter_component_trees(io.StringIO(VTIMEZONE), ["VTIMEZONE"])))
+    custom = resolver.table("Eastern Standard Time")
+    new_york = iana_table("America/New_York")
+
+    local = datetime(2024, 1, 1)
+    while local < datetime(2027, 1, 1):
+        assert custom.to_utc(local) == new_york.to_utc(local), local
+        local += timedelta(hours=5, minutes=17)
+
+
+def test_gap_and_repeated_local_times():
+    table = iana_table("America/New_York")
+    # 02:30 does not exist on 2025-03-09: uses the offset from before the gap
+    assert table.to_utc(datetime(2025, 3, 9, 2, 30)).isoformat() == "2025-03-09T07:30:00+00:00"
+    # 01:30 happens twice on 2025-11-02: the first (daylight) occurrence wins
+    assert table.to_utc(datetime(2025, 11, 2, 1, 30)).isoformat() == "2025-11-02T05:30:00+00:00"
+
+
+def test_unknown_tzid_falls_back_to_utc():
+    resolved, all_day = TimezoneResolver().to_utc("20250512T090000", {"TZID": "Mars/Olympus_Mons"})
+    assert resolved.isoformat() == "2025-05-12T09:00:00+00:00"
+    assert not all_day
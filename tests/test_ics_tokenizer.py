@@ -0,0 +1,71 @@
+# tests/test_ics_tokenizer.py
+
+# PYTHONPATH=. pytest tests/test_ics_tokenizer.py
+
+import io
+from modules.calendar_io.ics_tokenizer import iter_ics_events, parse_property, unescape_text, unfold_lines
+
+ICS = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:lab-001@chronologue\r\n"
+    "SUMMARY:Reagent restock\\, freezer B\r\n"
+    "DESCRIPTION:Check inventory\\nthen order from the\r\n"
+    "  usual supplier\\; confirm delivery\r\n"
+    "DTSTART:20250412T090000Z\r\n"
+    "DTEND:20250412T093000Z\r\n"
+    "ORGANIZER;CN=\"Lab Manager; Wet Lab\":mailto:lab@example.org\r\n"
+    "BEGIN:VALARM\r\n"
+    "DESCRIPTION:Reminder\r\n"
+    "END:VALARM\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:lab-002@chronologue\r\n"
+    "SUMMARY:Incubator check\r\n"
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+
+def test_unfold_rejoins_split_utf8_bytes():
+    folded = "SUMMARY:Café meeting".encode("utf-8")
+    split = folded.index(b"\xa9")  # second byte of "é"
+    lines = [folded[:split] + b"\r\n", b" " + folded[split:] + b"\r\n"]
+    assert list(unfold_lines(lines)) == ["SUMMARY:Café meeting"]
+
+
+def test_parse_property_with_quoted_params():
+    prop = parse_property('ATTENDEE;ROLE=REQ-PARTICIPANT;CN="Doe, Jane: PI":mailto:jane@example.org')
+    assert prop.name == "ATTENDEE"
+    assert prop.params == {"ROLE": "REQ-PARTICIPANT", "CN": "Doe, Jane: PI"}
+    assert prop.value == "mailto:jane@example.org"
+
+    prop = parse_property("DTSTART;TZID=America/New_York:20250412T090000")
+    assert prop.params == {"TZID": "America/New_York"}
+    assert prop.value == "20250412T090000"
+
+
+def test_unescape_text():
+    assert unescape_text(r"a\, b\; c\\d\Ne") == "a, b; c\\d\ne"
+
+
+def test_iter_ics_events_streams_from_handle():
+    events = iter_ics_events(io.BytesIO(ICS.encode("utf-8")))
+    first = next(events)
+    assert first["id"] == "lab-001@chronologue"
+    assert first["title"] == "Reagent restock, freezer B"
+    assert first["content"] == "Check inventory\nthen order from the usual supplier; confirm delivery"
+    assert first["timestamp"] == "2025-04-12T09:00:00Z"
+    assert first["duration_minutes"] == 30
+    assert first["type"] == "calendar_event"
+
+    second = next(events)
+    assert second == {"id": "lab-002@chronologue", "title": "Incubator check", "type": "calendar_event"}
+    assert list(events) == []
+
+
+def test_iter_ics_events_from_path(tmp_path):
+    path = tmp_path / "lab.ics"
+    path.write_text(ICS.replace("\r\n", "\n"))
+    assert [e["id"] for e in iter_ics_events(path)] == ["lab-001@chronologue", "lab-002@chronologue"]
@@ -0,0 +1,75 @@
+# tests/test_ics_writer.py
+
+# PYTHONPATH=. pytest tests/test_ics_writer.py
+
+import io
+import socket
+from modules.calendar_io.ics_tokenizer import iter_ics_events
+from modules.calendar_io.ics_writer import ICSWriter, escape_text, fold_line, write_calendar
+
+
+def event(i, summary="Lab sync", description="Notes"):
+    return [("UID", f"evt-{i}"), ("DTSTART", "20250512T090000Z"), ("DTEND", "20250512T100000Z"),
+            ("SUMMARY", summary), ("DESCRIPTION", description)]
+
+
+def test_fold_line_limits_octets_and_keeps_characters_whole():
+    line = "DESCRIPTION:" + "°é漢字🙂" * 40
+    folded = fold_line(line)
+    physical = folded.split(b"\r\n")[:-1]
+    assert all(len(p) <= 75 for p in physical)
+    assert all(p.startswith(b" ") for p in physical[1:])
+    for p in physical:
+        p.decode("utf-8")
+    assert b"".join([physical[0]] + [p[1:] for p in physical[1:]]).decode("utf-8") == line
+
+
+def test_escape_text():
+    assert escape_text("a,b;c\\d\r\ne\nf") == "a\\,b\\;c\\\\d\\ne\\nf"
+
+
+def test_round_trip_through_tokenizer(tmp_path):
+    path = tmp_path / "out.ics"
+    summary = "Review, plan; ship \\ repeat " + "ü" * 60
+    description = "Line one\nLine two, with commas; and semicolons"
+    count = write_calendar(path, (event(i, summary, description) for i in range(3)))
+    data = path.read_bytes()
+
+    assert count == 3
+    assert data.startswith(b"BEGIN:VCALENDAR\r\nVERSION:2.0\r\n")
+    assert data.endswith(b"END:VCALENDAR\r\n")
+    assert b"\n" not in data.replace(b"\r\n", b"")
+    assert not (tmp_path / "out.ics.tmp").exists()
+
+    traces = list(iter_ics_events(path))
+    assert [t["id"] for t in traces] == ["evt-0", "evt-1", "evt-2"]
+    assert traces[0]["title"] == summary
+    assert traces[0]["content"] == description
+
+
+def test_streams_to_text_stream_and_socket():
+    text = io.StringIO()
+    with ICSWriter(text) as writer:
+        writer.write_raw("\n    BEGIN:VEVENT\n    UID:raw\n    SUMMARY:Indented\n    END:VEVENT")
+    assert text.getvalue().splitlines()[3:6] == ["BEGIN:VEVENT", "UID:raw", "SUMMARY:Indented"]
+
+    left, right = socket.socketpair()
+    with left, right:
+        write_calendar(left, [event(1)])
+        left.shutdown(socket.SHUT_WR)
+        received = b"".join(iter(lambda: right.recv(4096), b""))
+    assert [t["id"] for t in iter_ics_events(io.BytesIO(received))] == ["evt-1"]
+
+
+def test_failed_export_leaves_no_file(tmp_path):
+    path = tmp_path / "out.ics"
+
+    def events():
+        yield event(1)
+        raise RuntimeError("source failed")
+
+    try:
+        write_calendar(path, events())
+    except RuntimeError:
+        pass
+    assert list(tmp_path.iterdir()) == []
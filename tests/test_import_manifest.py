@@ -0,0 +1,130 @@
+# tests/test_import_manifest.py
+
+# PYTHONPATH=. pytest tests/test_import_manifest.py
+
+import json
+import os
+from modules.calendar_io.import_calendar import apply_delta
+from modules.calendar_io.import_manifest import ImportManifest
+from modules.core.time_index import TimeIndex
+from modules.core.trace_log import TraceLog
+
+
+def calendar(*events):
+    body = "".join(
+        f"BEGIN:VEVENT\nUID:{uid}\nSEQUENCE:{seq}\nDTSTAMP:{stamp}\nSUMMARY:{summary}\n"
+        "DTSTART:20250512T090000Z\nDTEND:20250512T100000Z\nEND:VEVENT\n"
+        for uid, seq, summary, stamp in events
+    )
+    return f"BEGIN:VCALENDAR\nVERSION:2.0\n{body}END:VCALENDAR\n"
+
+
+def write(path, text):
+    path.write_text(text)
+    # Make sure the size/mtime fast path cannot mask a content change
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_first_import_adds_everything(tmp_path):
+    path = tmp_path / "cal.ics"
+    write(path, calendar(("a", 0, "One", "20250101T000000Z"), ("b", 0, "Two", "20250101T000000Z")))
+    delta = ImportManifest(tmp_path / "manifest.json").scan(path)
+    assert delta.added == ["a", "b"]
+    assert [t["id"] for t in delta.traces] == ["a", "b"]
+
+
+def test_unchanged_file_and_events_are_skipped(tmp_path):
+    path = tmp_path / "cal.ics"
+    manifest_path = tmp_path / "manifest.json"
+    write(path, calendar(("a", 0, "One", "20250101T000000Z"), ("b", 0, "Two", "20250101T000000Z")))
+    manifest = ImportManifest(manifest_path)
+    manifest.commit(manifest.scan(path))
+    manifest.save()
+
+    reloaded = ImportManifest(manifest_path)
+    assert reloaded.scan(path).unchanged_file
+
+    # Same bytes, new mtime: checksum matches
+    write(path, path.read_text())
+    assert reloaded.scan(path).unchanged_file
+
+    # Only DTSTAMP differs: file re-read, no event converted
+    write(path, calendar(("a", 0, "One", "20250601T000000Z"), ("b", 0, "Two", "20250601T000000Z")))
+    delta = reloaded.scan(path)
+    assert not delta.unchanged_file
+    assert (delta.added, delta.changed, delta.removed, delta.traces) == ([], [], [], [])
+
+
+def test_changes_removals_and_stale_sequences(tmp_path):
+    path = tmp_path / "cal.ics"
+    write(path, calendar(("a", 1, "One", "X"), ("b", 0, "Two", "X"), ("c", 0, "Three", "X")))
+    manifest = ImportManifest(tmp_path / "manifest.json")
+    manifest.commit(manifest.scan(path))
+
+    write(path, calendar(("a", 0, "Older", "X"), ("b", 1, "Two (moved)", "X"), ("d", 0, "Four", "X")))
+    delta = manifest.scan(path)
+    assert delta.added == ["d"]
+    assert delta.changed == ["b"]
+    assert delta.removed == ["c"]
+    assert delta.stale == ["a"]
+    assert [t["id"] for t in delta.traces] == ["b", "d"]
+    assert manifest.removed_ids(delta) == ["c"]
+
+    manifest.commit(delta)
+    assert manifest.files["cal.ics"]["events"]["a"]["sequence"] == 1
+
+
+def test_missing_file_removes_its_events(tmp_path):
+    path = tmp_path / "cal.ics"
+    write(path, calendar(("a", 0, "One", "X")))
+    manifest = ImportManifest(tmp_path / "manifest.json")
+    manifest.commit(manifest.scan(path))
+
+    delta = manifest.missing("cal.ics")
+    assert manifest.removed_ids(delta) == ["a"]
+    manifest.commit(delta)
+    assert "cal.ics" not in manifest.files
+
+
+SERIES = ("BEGIN:VEVENT\nUID:series-1\nSUMMARY:Weekly sync\nDESCRIPTION:Team sync\nDTSTART:20250702T130000Z\n"
+          "DTEND:20250702T133000Z\nRRULE:FREQ=WEEKLY\nEND:VEVENT\n")
+OVERRIDE = ("BEGIN:VEVENT\nUID:series-1\nRECURRENCE-ID:20250709T130000Z\nSUMMARY:Weekly sync (moved)\nDESCRIPTION:Team sync\n"
+            "DTSTART:20250709T150000Z\nDTEND:20250709T153000Z\nEND:VEVENT\n")
+
+
+def import_once(manifest, path, output_dir):
+    for output_format in ("jsonl", "json"):
+        delta = manifest.scan(path)
+        for trace in delta.traces:
+            trace["task_id"] = "sync"         # the validator requires one; ICS events do not carry it
+        apply_delta(delta, manifest.removed_ids(delta), output_dir, output_format)
+    manifest.commit(delta)
+
+
+def test_override_and_series_are_separate_traces(tmp_path):
+    path = tmp_path / "cal.ics"
+    manifest = ImportManifest(tmp_path / "manifest.json")
+    write(path, f"BEGIN:VCALENDAR\nVERSION:2.0\n{SERIES}{OVERRIDE}END:VCALENDAR\n")
+    import_once(manifest, path, tmp_path)
+    assert sorted(manifest.files["cal.ics"]["events"]) == ["series-1", "series-1#20250709T130000Z"]
+
+    log = TraceLog(tmp_path / "cal.jsonl")
+    assert sorted(t["id"] for t in log) == ["series-1", "series-1#20250709T130000Z"]
+    assert log.get("series-1#20250709T130000Z")["recurrence_id"] == "2025-07-09T13:00:00Z"
+    with open(tmp_path / "cal.json") as f:
+        assert sorted(t["id"] for t in json.load(f)["memory"]) == ["series-1", "series-1#20250709T130000Z"]
+
+    # Re-importing keeps the override in place of the series instance it moves
+    import_once(manifest, path, tmp_path)
+    week = TimeIndex(TraceLog(tmp_path / "cal.jsonl")).range("2025-07-09T00:00:00Z", "2025-07-09T23:59:59Z")
+    assert [(t["id"], t["timestamp"]) for t in week] == [("series-1#20250709T130000Z", "2025-07-09T15:00:00Z")]
+
+    # Dropping the override leaves the series alone
+    write(path, f"BEGIN:VCALENDAR\nVERSION:2.0\n{SERIES}END:VCALENDAR\n")
+    import_once(manifest, path, tmp_path)
+    assert [t["id"] for t in TraceLog(tmp_path / "cal.jsonl")] == ["series-1"]
+    week = TimeIndex(TraceLog(tmp_path / "cal.jsonl")).range("2025-07-09T00:00:00Z", "2025-07-09T23:59:59Z")
+    assert [t["timestamp"] for t in week] == ["2025-07-09T13:00:00Z"]
+    with open(tmp_path / "cal.json") as f:
+        assert [t["id"] for t in json.load(f)["memory"]] == ["series-1"]
@@ -0,0 +1,64 @@
+# tests/test_multi_fetch.py
+
+# PYTHONPATH=. pytest tests/test_multi_fetch.py
+
+from modules.core.trace_log import TraceLog
+from modules.core.trace_store import TraceStore
+from modules.google_sync.fake_calendar import FakeCalendarAPI, build_fake_service
+from modules.google_sync.multi_fetch import JSONLSink, StoreSink, fetch_calendars, list_calendars
+from modules.google_sync.pull_sync import store_source
+
+
+def event(calendar, i):
+    return {"id": f"{calendar}{i:04d}", "summary": f"{calendar} {i}", "status": "confirmed",
+            "etag": f'"{i + 1}"', "start": {"dateTime": f"2025-05-12T09:{i % 60:02d}:00Z"},
+            "end": {"dateTime": f"2025-05-12T10:{i % 60:02d}:00Z"}}
+
+
+def seeded_api(sizes):
+    api = FakeCalendarAPI()
+    for calendar, size in sizes.items():
+        api.calendars[calendar] = {e["id"]: e for e in (event(calendar, i) for i in range(size))}
+    api._revision = max(sizes.values())
+    return api
+
+
+def test_fetches_all_calendars_into_store_then_incrementally():
+    sizes = {"primary": 30, "team": 12, "lab": 0, "oncall": 7}
+    with seeded_api(sizes) as api:
+        factory = lambda: build_fake_service(api)
+        store = TraceStore()
+        assert [c["id"] for c in list_calendars(factory())] == sorted(sizes)
+
+        results = fetch_calendars(factory, StoreSink(store), max_concurrency=2, page_size=5)
+        assert {cid: r.written for cid, r in results.items()} == sizes
+        assert results["primary"].pages == 6 and results["lab"].pages == 1
+        assert all(r.full_sync and r.error is None for r in results.values())
+        assert store.count() == sum(sizes.values())
+        assert api.peak_concurrency <= 2
+
+        service = build_fake_service(api)
+        service.events().delete(calendarId="team", eventId="team0003").execute()
+        again = fetch_calendars(factory, StoreSink(store), max_concurrency=2, page_size=5)
+        assert not any(r.full_sync for r in again.values())
+        assert again["team"].deleted == 1 and sum(r.requests for r in again.values()) == 4
+        assert store.get("team0003") is None
+        assert store.get_sync_token(store_source("oncall"))
+
+
+def test_streams_to_jsonl_and_reports_failed_calendars(tmp_path):
+    sizes = {"primary": 9, "team": 4}
+    with seeded_api(sizes) as api:
+        api.fail(500, times=10, when=lambda method, path, body: "/calendars/team/" in path)
+        results = fetch_calendars(lambda: build_fake_service(api), JSONLSink(tmp_path), page_size=4)
+
+        assert results["primary"].written == 9 and results["primary"].error is None
+        assert results["team"].error.startswith("HttpError")
+        assert sorted(t["id"] for t in TraceLog(tmp_path / "primary.jsonl")) == [f"primary{i:04d}" for i in range(9)]
+        assert JSONLSink(tmp_path).sync_token("primary") and JSONLSink(tmp_path).sync_token("team") is None
+
+        api.calendars["primary"].pop("primary0000")
+        api.expire_sync_tokens()
+        resync = fetch_calendars(lambda: build_fake_service(api), JSONLSink(tmp_path), ["primary"])
+        assert resync["primary"].full_sync and resync["primary"].written == 8
+        assert len(TraceLog(tmp_path / "primary.jsonl")) == 8
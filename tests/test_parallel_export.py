@@ -0,0 +1,71 @@
+# tests/test_parallel_export.py
+
+# PYTHONPATH=. pytest tests/test_parallel_export.py
+
+import json
+from modules.calendar_io.ics_tokenizer import iter_ics_events
+from modules.calendar_io.parallel_export import ExportCheckpoint, STAGES, convert_json_folder
+
+
+def trace(i, **overrides):
+    trace = {"id": f"t-{i}", "type": "observation", "timestamp": f"2025-05-12T09:{i:02d}:00Z",
+             "content": f"Note {i}", "title": f"Note {i}", "task_id": "lab"}
+    trace.update(overrides)
+    return trace
+
+
+def write_json(path, traces):
+    path.write_text(json.dumps({"memory": traces}))
+
+
+def test_converts_resumes_and_reconverts_changed(tmp_path):
+    raw, out = tmp_path / "raw", tmp_path / "out"
+    raw.mkdir()
+    write_json(raw / "a.json", [trace(i) for i in range(3)])
+    write_json(raw / "b.json", [trace(9), {"id": "bad"}])
+    write_json(raw / "empty.json", [{"id": "bad"}])
+    (raw / "broken.json").write_text("{not json")
+
+    report = convert_json_folder(raw, out, workers=2)
+    assert report["converted"] == ["a.json", "b.json", "empty.json"]
+    assert list(report["failed"]) == ["broken.json"]
+    assert [t["title"] for t in iter_ics_events(out / "a.ics")] == ["Note 0", "Note 1", "Note 2"]
+    assert [t["title"] for t in iter_ics_events(out / "b.ics")] == ["Note 9"]
+    assert not (out / "empty.ics").exists()
+    assert set(report["throughput"]) == set(STAGES)
+    assert report["throughput"]["load"]["traces"] == 6
+    assert report["throughput"]["write"]["traces"] == 4
+
+    again = convert_json_folder(raw, out, workers=1)
+    assert again["converted"] == []
+    assert again["skipped"] == ["a.json", "b.json", "empty.json"]
+
+    write_json(raw / "b.json", [trace(8)])
+    (out / "a.ics").unlink()
+    third = convert_json_folder(raw, out, workers=1)
+    assert third["converted"] == ["a.json", "b.json"]
+    assert [t["title"] for t in iter_ics_events(out / "b.ics")] == ["Note 8"]
+    assert ExportCheckpoint(out / "export_checkpoint.json").files["b.json"]["written"] == 1
+
+
+def test_missing_titles_are_generated_once_in_the_parent(tmp_path, monkeypatch):
+    import modules.calendar_io.parallel_export as parallel_export
+
+    calls = tmp_path / "calls.txt"
+
+    def fake_titles(contents):
+        with open(calls, "a") as f:            # visible from worker processes too
+            f.write(json.dumps(list(contents)) + "\n")
+        return [f"Title for {content.split()[-1]}" for content in contents]
+
+    monkeypatch.setattr(parallel_export, "generate_summary_titles", fake_titles)
+    raw, out = tmp_path / "raw", tmp_path / "out"
+    raw.mkdir()
+    long = "A long observation about restocking the pipette tips, number"
+    write_json(raw / "a.json", [trace(1, title=None, content=f"{long} 1"), trace(2, title=None, content=f"{long} 2")])
+    write_json(raw / "b.json", [trace(3, title=None, content=f"{long} 1"), trace(4)])
+
+    convert_json_folder(raw, out, workers=2)
+    assert [json.loads(line) for line in calls.read_text().splitlines()] == [[f"{long} 1", f"{long} 2"]]
+    assert [t["title"] for t in iter_ics_events(out / "a.ics")] == ["Title for 1", "Title for 2"]
+    assert [t["title"] for t in iter_ics_events(out / "b.ics")] == ["Title for 1", "Note 4"]
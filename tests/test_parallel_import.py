@@ -0,0 +1,68 @@
+# tests/test_parallel_import.py
+
+# PYTHONPATH=. pytest tests/test_parallel_import.py
+
+from modules.calendar_io.ics_tokenizer import iter_ics_events
+from modules.calendar_io.parallel_import import import_ics_files, parse_range, split_at_events
+
+
+def write_calendar(path, n_events, prefix="ev"):
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0"]
+    for i in range(n_events):
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{prefix}-{i}",
+            f"SUMMARY:Event {i} with a folded",
+            "  summary line",
+            f"DTSTART:202505{1 + i % 28:02d}T090000Z",
+            f"DTEND:202505{1 + i % 28:02d}T093000Z",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    path.write_text("\r\n".join(lines) + "\r\n")
+
+
+def has_even_uid(trace):
+    return int(trace["id"].rsplit("-", 1)[1]) % 2 == 0
+
+
+def test_chunks_split_on_event_boundaries(tmp_path):
+    path = tmp_path / "big.ics"
+    write_calendar(path, 200)
+    ranges = split_at_events(path, chunk_bytes=1000)
+    assert len(ranges) > 5
+    data = path.read_bytes()
+    assert all(data[start:start + 12] == b"BEGIN:VEVENT" for start, _ in ranges[1:])
+
+    chunked = [t for start, end in ranges for t in parse_range(path, start, end)[0]]
+    assert chunked == list(iter_ics_events(path))
+
+
+def test_import_is_ordered_and_reports_errors(tmp_path):
+    write_calendar(tmp_path / "b.ics", 50, "b")
+    write_calendar(tmp_path / "a.ics", 120, "a")
+    missing = tmp_path / "missing.ics"
+
+    results = list(import_ics_files([tmp_path / "b.ics", missing, tmp_path / "a.ics"],
+                                    workers=2, chunk_bytes=2000, validate=has_even_uid))
+    assert [r.path.name for r in results] == ["a.ics", "b.ics", "missing.ics"]
+    assert [t["id"] for t in results[0].traces] == [f"a-{i}" for i in range(0, 120, 2)]
+    assert results[0].invalid == 60
+    assert results[1].error is None and len(results[1].traces) == 25
+    assert results[2].error and results[2].traces == []
+
+
+def test_later_chunks_see_vtimezone_definitions(tmp_path):
+    path = tmp_path / "zoned.ics"
+    write_calendar(path, 100)
+    text = path.read_text().replace(
+        "VERSION:2.0\n",
+        "VERSION:2.0\nBEGIN:VTIMEZONE\nTZID:Lab Time\nBEGIN:STANDARD\nDTSTART:19700101T000000\n"
+        "TZOFFSETFROM:+0200\nTZOFFSETTO:+0200\nEND:STANDARD\nEND:VTIMEZONE\n",
+    ).replace("DTSTART:", "DTSTART;TZID=Lab Time:").replace("Z\n", "\n")
+    path.write_text(text)
+
+    ranges = split_at_events(path, chunk_bytes=1000)
+    last = parse_range(path, *ranges[-1])[0][-1]
+    assert last["id"] == "ev-99"
+    assert last["timestamp"] == "2025-05-16T07:00:00Z"
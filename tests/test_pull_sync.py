@@ -0,0 +1,62 @@
+# tests/test_pull_sync.py
+
+# PYTHONPATH=. pytest tests/test_pull_sync.py
+
+from modules.core.trace_store import TraceStore
+from modules.google_sync.batch_insert import batch_insert_events
+from modules.google_sync.fake_calendar import FakeCalendarAPI, build_fake_service
+from modules.google_sync.pull_sync import pull_calendar, store_source
+
+
+def event(i, summary=None):
+    return {"id": f"evt{i:04d}", "summary": summary or f"Event {i}", "description": f"Notes {i}",
+            "start": {"dateTime": f"2025-05-12T09:{i % 60:02d}:00Z"},
+            "end": {"dateTime": f"2025-05-12T10:{i % 60:02d}:00Z"}}
+
+
+def seed(api, service, events):
+    report = batch_insert_events(service, events, batch_uri=api.batch_uri)
+    assert not report.failed
+
+
+def test_full_then_incremental_pull():
+    with FakeCalendarAPI() as api:
+        service = build_fake_service(api)
+        seed(api, service, [event(i) for i in range(25)] +
+             [{"id": "allday01", "summary": "Offsite", "start": {"date": "2025-05-13"}, "end": {"date": "2025-05-14"}}])
+        store = TraceStore()
+
+        first = pull_calendar(service, store, page_size=10)
+        assert first.full_sync and first.inserted == 26 and first.requests == 3
+        assert store.get("allday01")["title"] == "Offsite"
+        assert store.get_sync_token(store_source("primary"))
+
+        before = api.http_requests
+        quiet = pull_calendar(service, store, page_size=10)
+        assert (quiet.full_sync, quiet.inserted, quiet.updated, quiet.deleted, quiet.requests) == (False, 0, 0, 0, 1)
+        assert api.http_requests == before + 1
+
+        events = service.events()
+        events.patch(calendarId="primary", eventId="evt0003", body={"description": "Changed"}).execute()
+        events.delete(calendarId="primary", eventId="evt0004").execute()
+        events.insert(calendarId="primary", body=event(99)).execute()
+        changed = pull_calendar(service, store, page_size=10)
+        assert (changed.inserted, changed.updated, changed.deleted, changed.requests) == (1, 1, 1, 1)
+        assert store.get("evt0003")["content"] == "Changed"
+        assert store.get("evt0004") is None
+        assert store.count() == 26
+
+
+def test_expired_token_triggers_full_resync():
+    with FakeCalendarAPI() as api:
+        service = build_fake_service(api)
+        seed(api, service, [event(i) for i in range(5)])
+        store = TraceStore()
+        pull_calendar(service, store)
+
+        api.calendars["primary"].pop("evt0001")          # vanished without a tombstone
+        api.expire_sync_tokens()
+        report = pull_calendar(service, store)
+        assert report.full_sync and report.requests == 2
+        assert store.count() == 4 and store.get("evt0001") is None
+        assert pull_calendar(service, store).requests == 1
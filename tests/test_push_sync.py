@@ -0,0 +1,95 @@
+# tests/test_push_sync.py
+
+# PYTHONPATH=. pytest tests/test_push_sync.py
+
+import re
+from modules.google_sync.fake_calendar import FakeCalendarAPI, build_fake_service
+from modules.google_sync.push_sync import SyncLedger, google_event_id, push_traces
+
+
+def trace(i, content=None):
+    return {"id": f"t-{i}", "type": "observation", "timestamp": f"2025-05-12T09:{i % 60:02d}:00Z",
+            "content": content or f"Note {i}", "task_id": "lab"}
+
+
+def test_event_ids_are_stable_and_valid():
+    a, b = google_event_id(trace(1)), google_event_id(trace(2))
+    assert a == google_event_id(trace(1, content="edited"))
+    assert a != b                                   # same task and day, different traces
+    assert re.fullmatch(r"[0-9a-v]{32}", a)
+    assert google_event_id(dict(trace(1), linked_event_uid="x@y")) != a
+
+
+def test_resync_makes_no_writes_and_patches_changes():
+    with FakeCalendarAPI() as api:
+        service = build_fake_service(api)
+        ledger = SyncLedger(":memory:")
+        traces = [trace(i) for i in range(120)]
+
+        first = push_traces(service, traces, ledger=ledger, batch_uri=api.batch_uri)
+        assert len(first.inserted) == 120 and first.failed == {}
+        assert first.round_trips == 3
+        calls = api.calls
+
+        again = push_traces(service, traces, ledger=ledger, batch_uri=api.batch_uri)
+        assert (again.inserted, again.patched, len(again.unchanged), again.round_trips) == ([], [], 120, 0)
+        assert api.calls == calls
+
+        traces[5] = trace(5, content="Edited note")
+        third = push_traces(service, traces + [trace(200)], ledger=ledger, batch_uri=api.batch_uri)
+        assert third.patched == [google_event_id(traces[5])]
+        assert third.inserted == [google_event_id(trace(200))]
+        assert len(api.events()) == 121
+        assert {e["summary"] for e in api.events()} >= {"Edited note"}
+
+
+def test_lost_ledger_patches_instead_of_duplicating():
+    with FakeCalendarAPI() as api:
+        service = build_fake_service(api)
+        traces = [trace(i) for i in range(3)]
+        push_traces(service, traces, ledger=SyncLedger(":memory:"), batch_uri=api.batch_uri)
+
+        fresh = SyncLedger(":memory:")
+        report = push_traces(service, traces, ledger=fresh, batch_uri=api.batch_uri)
+        assert report.inserted == [] and len(report.patched) == 3 and report.failed == {}
+        assert len(api.events()) == 3
+        assert push_traces(service, traces, ledger=fresh, batch_uri=api.batch_uri).round_trips == 0
+
+        deleted = google_event_id(traces[0])
+        del api.calendars["primary"][deleted]
+        traces[0] = trace(0, content="Recreated")
+        report = push_traces(service, traces, ledger=fresh, batch_uri=api.batch_uri)
+        assert report.inserted == [deleted] and report.failed == {}
+        assert len(api.events()) == 3
+
+
+def test_remote_edit_is_reported_as_a_conflict_not_overwritten():
+    with FakeCalendarAPI() as api:
+        service = build_fake_service(api)
+        ledger = SyncLedger(":memory:")
+        traces = [trace(i) for i in range(2)]
+        push_traces(service, traces, ledger=ledger, batch_uri=api.batch_uri)
+
+        event_id = google_event_id(traces[0])
+        service.events().patch(calendarId="primary", eventId=event_id,
+                               body={"summary": "Edited in Calendar"}).execute()
+        traces = [trace(0, content="Edited locally"), trace(1, content="Also edited")]
+        report = push_traces(service, traces, ledger=ledger, batch_uri=api.batch_uri)
+
+        assert report.patched == [google_event_id(traces[1])]
+        assert list(report.failed) == [event_id] and "conflict" in report.failed[event_id]
+        assert api.calendars["primary"][event_id]["summary"] == "Edited in Calendar"
+
+
+def test_insert_over_a_deleted_event_restores_it():
+    with FakeCalendarAPI() as api:
+        service = build_fake_service(api)
+        traces = [trace(0)]
+        push_traces(service, traces, ledger=SyncLedger(":memory:"), batch_uri=api.batch_uri)
+        event_id = google_event_id(traces[0])
+        service.events().delete(calendarId="primary", eventId=event_id).execute()
+        assert api.events() == []
+
+        report = push_traces(service, traces, ledger=SyncLedger(":memory:"), batch_uri=api.batch_uri)
+        assert report.patched == [event_id] and report.failed == {}
+        assert [e["id"] for e in api.events()] == [event_id]
@@ -0,0 +1,151 @@
+# tests/test_recurrence.py
+
+# PYTHONPATH=. pytest tests/test_recurrence.py
+
+import io
+import json
+from datetime import datetime, timezone
+from modules.calendar_io.ics_events import load_calendar_events, overridden_instants
+from modules.calendar_io.ics_tokenizer import iter_ics_events
+from modules.core.time_index import TimeIndex
+
+UTC = timezone.utc
+
+CALENDAR = """BEGIN:VCALENDAR
+VERSION:2.0
+BEGIN:VEVENT
+UID:standup
+SUMMARY:Lab standup
+DTSTART;TZID=America/New_York:20250303T090000
+DTEND;TZID=America/New_York:20250303T091500
+RRULE:FREQ=WEEKLY;BYDAY=MO,WE
+EXDATE;TZID=America/New_York:20250310T090000
+RDATE;TZID=America/New_York:20250314T160000
+END:VEVENT
+BEGIN:VEVENT
+UID:grocery
+SUMMARY:Grocery List Approval Needed
+DTSTART:20250601T170000Z
+DTEND:20250601T173000Z
+RRULE:FREQ=WEEKLY;INTERVAL=1;COUNT=3
+END:VEVENT
+BEGIN:VEVENT
+UID:one-off
+SUMMARY:Incubator check
+DTSTART:20250305T120000Z
+DTEND:20250305T123000Z
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def test_windowed_expansion_keeps_local_time_across_dst():
+    standup = load_calendar_events(io.StringIO(CALENDAR))[0]
+    assert standup.recurrence.is_infinite()
+
+    occurrences = list(standup.recurrence.between(datetime(2025, 3, 3, tzinfo=UTC), datetime(2025, 3, 15, tzinfo=UTC)))
+    assert [o.isoformat() for o in occurrences] == [
+        "2025-03-03T09:00:00-05:00",
+        "2025-03-05T09:00:00-05:00",
+        # 03-10 is excluded; DST starts 03-09 but the standup stays at 09:00 local
+        "2025-03-12T09:00:00-04:00",
+        "2025-03-14T16:00:00-04:00",
+    ]
+
+    # Far-future windows do not depend on materialising everything before them
+    far = list(standup.recurrence.between(datetime(2040, 1, 1, tzinfo=UTC), datetime(2040, 1, 8, tzinfo=UTC)))
+    assert [o.strftime("%a %H:%M") for o in far] == ["Mon 09:00", "Wed 09:00"]
+
+
+def test_import_window_expands_recurring_traces():
+    window = (datetime(2025, 6, 1, tzinfo=UTC), datetime(2025, 12, 31, tzinfo=UTC))
+    traces = [t for t in iter_ics_events(io.StringIO(CALENDAR), window) if t["title"].startswith("Grocery")]
+    assert [t["id"] for t in traces] == ["grocery#20250601T170000Z", "grocery#20250608T170000Z", "grocery#20250615T170000Z"]
+    assert traces[1]["end"] == "2025-06-08T17:30:00Z"
+    assert "recurrence" not in traces[1]
+
+
+def test_time_index_expands_recurring_traces_per_query():
+    traces = list(iter_ics_events(io.StringIO(CALENDAR)))
+    assert traces[0]["recurrence"]["rrule"] == ["FREQ=WEEKLY;BYDAY=MO,WE"]
+    index = TimeIndex(traces)
+
+    found = index.range("2025-03-04T00:00:00Z", "2025-03-06T00:00:00Z")
+    assert [t["id"] for t in found] == ["one-off", "standup#20250305T140000Z"]
+    assert [t["id"] for t in index.at("2025-03-12T13:05:00Z")] == ["standup#20250312T130000Z"]
+    assert len(index.iso_week(2030, 10)) == 2
+
+
+VTIMEZONE_CALENDAR = """BEGIN:VCALENDAR
+VERSION:2.0
+BEGIN:VTIMEZONE
+TZID:Eastern Standard Time
+BEGIN:STANDARD
+DTSTART:16010101T020000
+TZOFFSETFROM:-0400
+TZOFFSETTO:-0500
+RRULE:FREQ=YEARLY;BYDAY=1SU;BYMONTH=11
+END:STANDARD
+BEGIN:DAYLIGHT
+DTSTART:16010101T020000
+TZOFFSETFROM:-0500
+TZOFFSETTO:-0400
+RRULE:FREQ=YEARLY;BYDAY=2SU;BYMONTH=3
+END:DAYLIGHT
+END:VTIMEZONE
+BEGIN:VEVENT
+UID:sync
+SUMMARY:Weekly sync
+DTSTART;TZID=Eastern Standard Time:20250707T090000
+DTEND;TZID=Eastern Standard Time:20250707T093000
+RRULE:FREQ=WEEKLY
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def test_stored_recurrence_keeps_calendar_defined_timezone():
+    trace = next(iter_ics_events(io.StringIO(VTIMEZONE_CALENDAR)))
+    # Round trip through JSON, as the trace log and JSON files do
+    stored = json.loads(json.dumps(trace))
+    assert stored["recurrence"]["tzid"] == "Eastern Standard Time"
+
+    index = TimeIndex([stored])
+    found = index.range("2025-07-07T00:00:00Z", "2025-07-15T00:00:00Z")
+    assert [t["timestamp"] for t in found] == ["2025-07-07T13:00:00Z", "2025-07-14T13:00:00Z"]
+    found = index.range("2025-11-10T00:00:00Z", "2025-11-11T00:00:00Z")
+    assert [t["timestamp"] for t in found] == ["2025-11-10T14:00:00Z"]
+
+
+MOVED_CALENDAR = """BEGIN:VCALENDAR
+VERSION:2.0
+BEGIN:VEVENT
+UID:series-1
+SUMMARY:Standup
+DTSTART:20250505T090000Z
+DTEND:20250505T091500Z
+RRULE:FREQ=DAILY;COUNT=3
+END:VEVENT
+BEGIN:VEVENT
+UID:series-1
+RECURRENCE-ID:20250506T090000Z
+SUMMARY:Standup moved
+DTSTART:20250506T140000Z
+DTEND:20250506T141500Z
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def test_override_replaces_the_instance_it_moves():
+    window = (datetime(2025, 5, 1, tzinfo=UTC), datetime(2025, 5, 31, tzinfo=UTC))
+    traces = list(iter_ics_events(io.StringIO(MOVED_CALENDAR), window))
+    assert sorted((t["timestamp"], t["id"], t["title"]) for t in traces) == [
+        ("2025-05-05T09:00:00Z", "series-1#20250505T090000Z", "Standup"),
+        ("2025-05-06T14:00:00Z", "series-1#20250506T090000Z", "Standup moved"),
+        ("2025-05-07T09:00:00Z", "series-1#20250507T090000Z", "Standup"),
+    ]
+
+    series, moved = load_calendar_events(io.StringIO(MOVED_CALENDAR))
+    overridden = overridden_instants([series, moved])
+    assert [o.begin.hour for o in series.occurrences(*window, exclude=overridden["series-1"])] == [9, 9]
@@ -0,0 +1,76 @@
+# tests/test_service_provider.py
+
+# PYTHONPATH=. pytest tests/test_service_provider.py
+
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from modules.google_sync.fake_calendar import API_PREFIX, FakeCalendarAPI
+from modules.google_sync.service_provider import GoogleServiceProvider
+
+
+def write_token(path, expires_in):
+    expiry = (datetime.utcnow() + timedelta(seconds=expires_in)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    path.write_text(json.dumps({"token": "initial", "refresh_token": "refresh", "client_id": "id",
+                                "client_secret": "secret", "expiry": expiry}))
+
+
+def provider_for(api, token_path, **kwargs):
+    return GoogleServiceProvider(token_path, interactive=False, token_uri=api.token_uri,
+                                 client_options={"api_endpoint": api.url.rstrip("/") + API_PREFIX}, **kwargs)
+
+
+def test_service_is_built_once_and_reused(tmp_path):
+    token = tmp_path / "token.json"
+    write_token(token, 3600)
+    with FakeCalendarAPI() as api:
+        provider = provider_for(api, token)
+        service = provider.service()
+        assert provider.service() is service
+        service.events().list(calendarId="primary").execute()
+        assert api.last_authorization == "Bearer initial"
+        assert api.tokens_issued == 0
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(provider.service()))
+        thread.start()
+        thread.join()
+        assert other[0] is not service and other[0]._http.credentials is provider.credentials()
+        provider.close()
+
+
+def test_refreshes_in_background_before_expiry(tmp_path):
+    token = tmp_path / "token.json"
+    write_token(token, 2)
+    with FakeCalendarAPI() as api:
+        provider = provider_for(api, token, refresh_margin=1.5)
+        service = provider.service()
+        deadline = time.time() + 5
+        while api.tokens_issued == 0 and time.time() < deadline:
+            time.sleep(0.05)
+        provider.close()
+
+        assert api.tokens_issued == 1 and provider.refreshes == 1
+        assert json.loads(token.read_text())["token"] == "fake-token-1"
+        service.events().list(calendarId="primary").execute()
+        assert api.last_authorization == "Bearer fake-token-1"
+
+
+def test_expired_token_is_refreshed_on_load(tmp_path):
+    token = tmp_path / "token.json"
+    write_token(token, -60)
+    with FakeCalendarAPI() as api:
+        provider = provider_for(api, token)
+        assert provider.credentials().token == "fake-token-1"
+        provider.close()
+
+
+def test_missing_token_raises_when_not_interactive(tmp_path):
+    provider = GoogleServiceProvider(tmp_path / "token.json", interactive=False)
+    try:
+        provider.service()
+    except RuntimeError as e:
+        assert "token" in str(e)
+    else:
+        raise AssertionError("expected RuntimeError")
@@ -0,0 +1,68 @@
+# tests/test_summary_titles.py
+
+# PYTHONPATH=. pytest tests/test_summary_titles.py
+
+import json
+import threading
+from types import SimpleNamespace
+from modules.calendar_io.summary_titles import TitleCache, generate_summary_titles, parse_batch_response
+
+
+class FakeResponses:
+    def __init__(self, fail_first=0):
+        self.prompts = []
+        self.fail_first = fail_first
+        self._lock = threading.Lock()
+
+    def create(self, model, input):
+        with self._lock:
+            self.prompts.append(input)
+            if len(self.prompts) <= self.fail_first:
+                raise RuntimeError("rate limited")
+        items = [json.loads(line.split(". ", 1)[1]) for line in input.split("\n\n", 1)[1].splitlines()]
+        return SimpleNamespace(output_text=json.dumps([f"T:{item[:5]}" for item in items]))
+
+
+def long(i):
+    return f"{i:03d} " + "a long description of the event " * 3
+
+
+def test_batches_dedupes_and_caches():
+    cache = TitleCache(":memory:")
+    client = SimpleNamespace(responses=FakeResponses())
+    contents = [long(i) for i in range(7)] + [long(0), "Short one"]
+
+    titles = generate_summary_titles(contents, cache=cache, api_client=client, max_items=3, max_concurrency=2)
+    assert titles[:7] == [f"T:{i:03d} a" for i in range(7)]
+    assert titles[7] == titles[0]
+    assert titles[8] == "Short one"
+    assert len(client.responses.prompts) == 3
+
+    again = generate_summary_titles(contents, cache=cache, api_client=client, max_items=3)
+    assert again == titles
+    assert len(client.responses.prompts) == 3
+
+
+def test_failed_batches_fall_back_without_caching():
+    cache = TitleCache(":memory:")
+    client = SimpleNamespace(responses=FakeResponses(fail_first=10))
+    titles = generate_summary_titles([long(1)], cache=cache, api_client=client, max_retries=1, backoff=0)
+    assert titles == [long(1)[:40] + "..."]
+    assert cache.get_many([long(1)], "gpt-4.1", 40) == [None]
+
+
+def test_local_mode_makes_no_requests():
+    client = SimpleNamespace(responses=FakeResponses())
+    titles = generate_summary_titles([long(1), "Standup"], use_llm=False, api_client=client)
+    assert titles == [long(1)[:40] + "...", "Standup"]
+    assert client.responses.prompts == []
+
+
+def test_parse_batch_response():
+    assert parse_batch_response('Here you go:\n["A", "B"]', 2) == ["A", "B"]
+    try:
+        parse_batch_response('["A"]', 2)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("wrong length accepted")
@@ -0,0 +1,64 @@
+# tests/test_time_index.py
+
+# PYTHONPATH=. pytest tests/test_time_index.py
+
+import random
+from datetime import datetime, timedelta, timezone
+from modules.core.time_index import TimeIndex, trace_interval
+
+TRACES = [
+    {"id": "c", "timestamp": "2025-04-09T15:00:00Z", "duration_minutes": 60},
+    {"id": "a", "timestamp": "2025-04-07T09:00:00Z"},
+    {"id": "b", "timestamp": "2025-04-08T10:00:00Z", "end": "2025-04-08T12:00:00Z"},
+    {"id": "d", "timestamp": "2025-04-14T08:00:00Z"},
+    {"id": "bad", "timestamp": "not-a-date"},
+]
+
+
+def ids(traces):
+    return [t["id"] for t in traces]
+
+
+def test_range_is_inclusive_and_sorted():
+    index = TimeIndex(TRACES)
+    assert len(index) == 4
+    assert index.skipped == 1
+    assert ids(index.range("2025-04-07", "2025-04-09T15:00:00Z")) == ["a", "b", "c"]
+    assert ids(index.range("2025-04-10", "2025-04-13")) == []
+
+
+def test_point_and_interval_overlap():
+    index = TimeIndex(TRACES)
+    assert ids(index.at("2025-04-08T11:30:00Z")) == ["b"]
+    assert ids(index.at("2025-04-08T12:00:00Z")) == []
+    assert ids(index.at("2025-04-07T09:00:00Z")) == ["a"]
+    assert ids(index.overlapping("2025-04-08T11:00:00Z", "2025-04-09T15:30:00Z")) == ["b", "c"]
+
+
+def test_iso_week_and_append():
+    index = TimeIndex(TRACES)
+    assert ids(index.iso_week(2025, 15)) == ["a", "b", "c"]
+    assert ids(index.iso_week(2025, 16)) == ["d"]
+
+    assert index.add({"id": "e", "timestamp": "2025-04-08T09:00:00Z"})
+    assert not index.add({"id": "f"})
+    assert ids(index.iso_week(2025, 15)) == ["a", "e", "b", "c"]
+
+
+
+def test_overlap_queries_match_a_linear_scan_with_long_blocks():
+    rng = random.Random(7)
+    base = datetime(2025, 4, 1, tzinfo=timezone.utc)
+    traces = [{"id": "retreat", "timestamp": "2025-04-01T00:00:00Z", "end": "2025-04-20T00:00:00Z"}]
+    for i in range(500):
+        start = base + timedelta(minutes=rng.randrange(0, 30 * 24 * 60))
+        traces.append({"id": f"t{i}", "timestamp": start.isoformat(), "duration_minutes": rng.choice([0, 15, 30, 90])})
+    index = TimeIndex(traces)
+    intervals = [trace_interval(t) for t in traces]
+
+    for _ in range(200):
+        s = int(base.timestamp()) + rng.randrange(0, 30 * 86400)
+        e = s + rng.choice([0, 600, 7200])
+        expected = sorted((start, row) for row, (start, end) in enumerate(intervals)
+                          if start <= e and (end > s or start >= s))
+        assert ids(index.overlapping(s, e)) == [traces[row]["id"] for _, row in expected]
@@ -0,0 +1,67 @@
+# tests/test_trace_catalog.py
+
+# PYTHONPATH=. pytest tests/test_trace_catalog.py
+
+import json
+import os
+from modules.core.trace_catalog import TraceCatalog
+
+
+def write_json(path, data):
+    path.write_text(json.dumps(data))
+    return path
+
+
+def bump_mtime(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_load_hits_until_file_changes(tmp_path):
+    path = write_json(tmp_path / "session.json", {"memory": [{"id": "m001"}]})
+    catalog = TraceCatalog()
+
+    first = catalog.load_memory(path)
+    assert catalog.load_memory(path) == first
+    assert catalog.stats()["hits"] == 1
+    assert catalog.stats()["misses"] == 1
+
+    write_json(path, {"memory": [{"id": "m002"}]})
+    bump_mtime(path)
+    assert catalog.load_memory(path) == [{"id": "m002"}]
+    assert catalog.stats()["misses"] == 2
+    assert catalog.stats()["entries"] == 1
+
+
+def test_load_memory_accepts_bare_list(tmp_path):
+    path = write_json(tmp_path / "embedded.json", [{"id": "m001", "embedding": [0.1]}])
+    assert TraceCatalog().load_memory(path)[0]["id"] == "m001"
+
+
+def test_lru_eviction_respects_max_bytes(tmp_path):
+    a = write_json(tmp_path / "a.json", {"memory": [{"id": "a" * 50}]})
+    b = write_json(tmp_path / "b.json", {"memory": [{"id": "b" * 50}]})
+    catalog = TraceCatalog(max_bytes=a.stat().st_size + b.stat().st_size - 1)
+
+    catalog.load(a)
+    catalog.load(b)
+    stats = catalog.stats()
+    assert stats["entries"] == 1
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= stats["max_bytes"]
+
+    catalog.load(b)
+    assert catalog.stats()["hits"] == 1
+
+
+def test_callers_get_copies_they_can_mutate(tmp_path):
+    path = write_json(tmp_path / "session.json", {"memory": [{"id": "m001", "tags": ["lab"]}]})
+    catalog = TraceCatalog()
+
+    traces = catalog.load_memory(path)
+    traces[0]["cluster"] = 3
+    traces[0]["tags"].append("x")
+    traces.append({"id": "m002"})
+    assert catalog.load_memory(path) == [{"id": "m001", "tags": ["lab"]}]
+    assert catalog.load(path)["memory"] == [{"id": "m001", "tags": ["lab"]}]
+    assert catalog.load_memory(path, copy=False) is catalog.load_memory(path, copy=False)
@@ -0,0 +1,108 @@
+# tests/test_trace_log.py
+
+# PYTHONPATH=. pytest tests/test_trace_log.py
+
+import json
+from modules.core.trace_log import TraceLog, json_to_log, log_to_json
+
+
+def test_append_get_and_supersede(tmp_path):
+    log = TraceLog(tmp_path / "traces.jsonl")
+    log.append({"id": "m001", "content": "v1"})
+    log.append({"id": "m002", "content": "other"})
+    log.append({"id": "m001", "content": "v2"})
+
+    assert len(log) == 2
+    assert log.superseded() == 1
+    assert log.get("m001")["content"] == "v2"
+    assert [t["id"] for t in log] == ["m002", "m001"]
+
+    reopened = TraceLog(tmp_path / "traces.jsonl")
+    assert reopened.get("m001")["content"] == "v2"
+    assert reopened.records == 3
+
+
+def test_compact_drops_superseded_versions(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    log = TraceLog(path)
+    log.extend([{"id": "m001", "n": i} for i in range(5)])
+
+    assert not log.compact(min_superseded_ratio=0.9)
+    assert log.compact(min_superseded_ratio=0.5)
+    assert len(path.read_text().splitlines()) == 1
+    assert TraceLog(path).get("m001") == {"id": "m001", "n": 4}
+
+
+def test_recovers_from_missing_index_and_torn_write(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    TraceLog(path).extend([{"id": "m001"}, {"id": "m002"}])
+    (tmp_path / "traces.jsonl.idx").unlink()
+    with open(path, "a") as f:
+        f.write('{"id": "m00')
+
+    log = TraceLog(path)
+    assert sorted(log.offsets) == ["m001", "m002"]
+    log.append({"id": "m003"})
+    assert TraceLog(path).get("m003") == {"id": "m003"}
+
+
+def test_session_file_round_trip(tmp_path):
+    session = {"memory": [{"id": "m001", "content": "a"}, {"id": "m002", "content": "b"}]}
+    (tmp_path / "session.json").write_text(json.dumps(session))
+
+    json_to_log(tmp_path / "session.json", tmp_path / "session.jsonl")
+    assert log_to_json(tmp_path / "session.jsonl", tmp_path / "out.json") == 2
+    assert json.loads((tmp_path / "out.json").read_text()) == session
+
+
+def test_remove_writes_tombstones(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    log = TraceLog(path)
+    log.extend([{"id": "m001"}, {"id": "m002"}])
+    assert log.remove(["m001", "missing"]) == 1
+    assert log.get("m001") is None
+    assert [t["id"] for t in log] == ["m002"]
+
+    # Replayed from the index, and from the log when the index is gone
+    assert "m001" not in TraceLog(path)
+    (tmp_path / "traces.jsonl.idx").unlink()
+    reopened = TraceLog(path)
+    assert sorted(reopened.offsets) == ["m002"]
+
+    reopened.append({"id": "m001", "v": 2})
+    assert reopened.compact()
+    assert [t["id"] for t in TraceLog(path)] == ["m002", "m001"]
+
+
+def test_index_rebuild_skips_corrupt_records(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    TraceLog(path).append({"id": "m001"})
+    (tmp_path / "traces.jsonl.idx").unlink()
+    with open(path, "a") as f:
+        f.write('{"id": "m002", "con\n{"id": "m003"}\n')
+
+    log = TraceLog(path)
+    assert sorted(log.offsets) == ["m001", "m003"]
+    assert log.records == 2
+
+
+def test_tombstones_are_flagged_in_the_index(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    log = TraceLog(path)
+    log.append({"id": "m001"})
+    log.remove(["m001"])
+    log.append({"id": "m002"})
+
+    reopened = TraceLog(path)
+    assert sorted(reopened.offsets) == ["m002"]
+    assert (tmp_path / "traces.jsonl.idx").read_text().splitlines()[1] == "m001\t15\t1"
+
+
+def test_repeated_imports_stay_compact(tmp_path):
+    from modules.calendar_io.import_calendar import save_events_to_log
+
+    path = tmp_path / "cal.jsonl"
+    for _ in range(10):
+        save_events_to_log([{"id": "m001"}, {"id": "m002"}], path)
+    assert len(TraceLog(path)) == 2
+    assert len(path.read_text().splitlines()) <= 4
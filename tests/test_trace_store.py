@@ -0,0 +1,112 @@
+# tests/test_trace_store.py
+
+# PYTHONPATH=. pytest tests/test_trace_store.py
+
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from modules.core.trace_store import TraceStore
+
+SESSION = {
+    "memory": [
+        {"id": "m001", "type": "goal", "timestamp": "2025-04-07T09:00:00Z", "content": "Restock tips",
+         "task_id": "lab_ops", "completion_status": "pending"},
+        {"id": "m002", "type": "observation", "timestamp": "2025-04-14T13:45:00Z", "content": "Incubator drift",
+         "task_id": "wetlab_sync"},
+        {"id": "m003", "type": "goal", "timestamp": "2025-04-08T10:30:00Z", "content": "Update packet",
+         "task_id": "lab_ops", "completion_status": "done"},
+    ]
+}
+
+
+def write_session(path, data=SESSION):
+    path.write_text(json.dumps(data))
+    return path
+
+
+def test_indexed_queries(tmp_path):
+    write_session(tmp_path / "session.json")
+    store = TraceStore()
+    store.sync_directory(tmp_path)
+
+    assert store.count() == 3
+    assert store.get("m002")["content"] == "Incubator drift"
+    assert store.get("missing") is None
+    assert [t["id"] for t in store.by_type_status("goal", "pending")] == ["m001"]
+    assert [t["id"] for t in store.by_task("lab_ops")] == ["m001", "m003"]
+    assert [t["id"] for t in store.in_iso_week(2025, 15)] == ["m001", "m003"]
+
+    start = datetime(2025, 4, 8, tzinfo=timezone.utc)
+    end = datetime(2025, 4, 30, tzinfo=timezone.utc)
+    assert [t["id"] for t in store.in_range(start, end)] == ["m003", "m002"]
+
+
+def test_sync_directory_reloads_only_changed_files(tmp_path):
+    session = write_session(tmp_path / "session.json")
+    store = TraceStore(tmp_path / "store.db")
+
+    assert store.sync_directory(tmp_path)["loaded"] == 1
+    assert store.sync_directory(tmp_path) == {"loaded": 0, "unchanged": 1, "removed": 0}
+
+    write_session(session, {"memory": SESSION["memory"][:1]})
+    stat = session.stat()
+    os.utime(session, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert store.sync_directory(tmp_path)["loaded"] == 1
+    assert store.count() == 1
+
+    session.unlink()
+    assert store.sync_directory(tmp_path)["removed"] == 1
+    assert store.count() == 0
+
+
+def test_apply_changes_upserts_deletes_and_records_token():
+    store = TraceStore()
+    traces = SESSION["memory"]
+    assert store.apply_changes("google:primary", traces, sync_token="t1", replace=True)["inserted"] == 3
+
+    edited = dict(traces[1], content="Drift fixed")
+    stats = store.apply_changes("google:primary", [edited, dict(traces[0], id="m004")], ["m001"], sync_token="t2")
+    assert stats == {"inserted": 1, "updated": 1, "deleted": 1}
+    assert store.get("m002")["content"] == "Drift fixed"
+    assert store.get_sync_token("google:primary") == "t2"
+    assert [t["id"] for t in store.by_task("lab_ops")] == ["m003", "m004"]
+
+    store.remove_source("google:primary")
+    assert store.get_sync_token("google:primary") is None
+
+
+def test_weeks_follow_local_dates_and_ranges_use_utc():
+    store = TraceStore()
+    store.apply_changes("s", [
+        {"id": "pacific", "timestamp": "2025-04-13T20:00:00-07:00"},  # Sunday locally, Monday 03:00 UTC
+        {"id": "naive", "timestamp": "2025-04-13T23:30:00"},  # read as UTC
+        {"id": "berlin", "timestamp": "2025-04-14T01:00:00+02:00"},  # Monday locally, Sunday 23:00 UTC
+    ])
+
+    assert [t["id"] for t in store.in_iso_week(2025, 15)] == ["pacific", "naive"]
+    assert [t["id"] for t in store.in_iso_week(2025, 16)] == ["berlin"]
+    start, end = datetime(2025, 4, 13, 23, 0), datetime(2025, 4, 13, 23, 59)
+    assert [t["id"] for t in store.in_range(start, end)] == ["berlin", "naive"]
+
+
+def test_threads_share_one_store(tmp_path):
+    store = TraceStore(tmp_path / "store.db")
+    errors = []
+
+    def write(n):
+        try:
+            for i in range(50):
+                store.apply_changes(f"s{n}", [{"id": f"{n}-{i}", "timestamp": "2025-04-07T09:00:00Z"}])
+                store.by_task("lab_ops")
+                store.count()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert store.count() == 200
@@ -0,0 +1,91 @@
+# tests/test_trace_table.py
+
+# PYTHONPATH=. pytest tests/test_trace_table.py
+
+import numpy as np
+from modules.core.trace_table import TraceTable, calendar_frame
+
+TRACES = [
+    {"id": "m001", "type": "goal", "timestamp": "2025-04-07T09:00:00Z", "content": "Restock tips",
+     "task_id": "lab_ops", "importance": 0.8, "completion_status": "pending"},
+    {"id": "m002", "type": "calendar_event", "timestamp": "2025-04-09T15:00:00Z", "content": "Weekly sync",
+     "task_id": "wetlab_sync", "duration_minutes": 45, "collaborators": ["tech_1@lab.org"]},
+]
+
+
+def test_rows_round_trip_as_dicts():
+    table = TraceTable.from_traces(TRACES)
+    assert len(table) == 2
+    assert table.to_dicts()[0] == TRACES[0]
+    assert dict(table[1]) == TRACES[1]
+    assert table[0].get("visibility") is None
+    assert "collaborators" in table[1]
+
+
+def test_row_views_write_through():
+    table = TraceTable.from_traces(TRACES)
+    row = table[0]
+    row["completion_status"] = "done"
+    row["embedding"] = [0.1, 0.2]
+    del row["importance"]
+
+    assert table.categories["completion_status"] == ["pending", "done"]
+    assert table[0]["completion_status"] == "done"
+    assert table[0]["embedding"] == [0.1, 0.2]
+    assert "importance" not in table[0]
+    assert np.isnan(table.importance[0])
+
+
+def test_columns_and_pandas_view():
+    table = TraceTable.from_traces(TRACES)
+    assert table.timestamp.dtype == np.int64
+    assert table.importance.dtype == np.float32
+    assert table.mask("type", "goal").tolist() == [True, False]
+    assert table.strings["task_id"][0] is table.take([0]).strings["task_id"][0]
+
+    df = table.to_pandas()
+    assert list(df["type"]) == ["goal", "calendar_event"]
+    assert str(df["timestamp"].iloc[0]) == "2025-04-07 09:00:00"
+    assert df["duration_minutes"].isna().tolist() == [True, False]
+    assert df["duration_minutes"].iloc[1] == 45
+
+
+def test_values_that_do_not_fit_a_column_are_kept_verbatim():
+    table = TraceTable.from_traces([{"id": "m003", "timestamp": "soon", "duration_minutes": "30"}])
+    assert dict(table[0]) == {"id": "m003", "timestamp": "soon", "duration_minutes": "30"}
+
+
+def test_categorical_codes_widen_past_int8():
+    table = TraceTable.from_traces([{"id": f"m{i}", "visibility": f"group_{i}"} for i in range(300)])
+    assert table.codes["visibility"].dtype == np.int16
+    assert table[299]["visibility"] == "group_299"
+    assert table.to_pandas()["visibility"].iloc[200] == "group_200"
+
+
+def test_calendar_frame_matches_the_streamlit_schedule_columns():
+    df = calendar_frame(TraceTable.from_traces(TRACES))
+    first, second = df.iloc[0], df.iloc[1]
+    assert (first["Date"], first["Day"], first["Start Time"], first["End Time"]) == \
+        ("2025-04-07", "Monday", "9:00 AM", "9:15 AM")
+    assert first["Duration (min)"] == 15
+    assert first["Notes"] == "Type: goal, Task: lab_ops, Status: pending, Importance: 0.8"
+    assert first["Start ISO"] == "2025-04-07T09:00:00+00:00"
+    assert (second["End Time"], second["Location"]) == ("3:45 PM", "tech_1@lab.org")
+    assert second["Notes"] == "Type: calendar_event, Task: wetlab_sync"
+
+
+def test_calendar_frame_keeps_each_traces_offset_and_real_durations():
+    table = TraceTable.from_traces([
+        {"id": "pt", "type": "goal", "timestamp": "2025-04-06T23:30:00-07:00", "duration_minutes": 30.0},
+        {"id": "half", "type": "goal", "timestamp": "2025-04-07T09:00:00+05:30", "duration_minutes": 12.5},
+    ])
+    assert table[0]["timestamp"] == "2025-04-07T06:30:00Z"
+    assert table[0]["duration_minutes"] == 30
+
+    df = calendar_frame(table)
+    assert df[["Date", "Day", "Start Time", "End Time"]].values.tolist() == [
+        ["2025-04-06", "Sunday", "11:30 PM", "12:00 AM"],
+        ["2025-04-07", "Monday", "9:00 AM", "9:12 AM"],
+    ]
+    assert df["Start ISO"].tolist() == ["2025-04-06T23:30:00-07:00", "2025-04-07T09:00:00+05:30"]
+    assert df["Duration (min)"].tolist() == [30.0, 12.5]
@@ -0,0 +1,54 @@
+# tests/test_trace_validator.py
+
+# PYTHONPATH=. pytest tests/test_trace_validator.py
+
+from modules.core.benchmark_validator import per_trace_validate, synthetic_traces
+from modules.core.trace_validator import count_invalid, valid_mask, validate_traces
+
+
+def trace(**fields):
+    base = {"id": "t", "type": "goal", "timestamp": "2025-05-12T09:00:00Z", "content": "c", "task_id": "x"}
+    base.update(fields)
+    return {k: v for k, v in base.items() if v is not None}
+
+
+def test_structured_errors():
+    traces = [
+        trace(),
+        trace(id="a", type="unknown", importance=1.5),
+        trace(id="b", task_id=None),
+        trace(id="c", timestamp="2025-02-30T00:00:00Z", duration_minutes=0),
+    ]
+    report = validate_traces(traces)
+    assert report.valid.tolist() == [True, False, False, False]
+    assert [(e.index, e.trace_id, e.field, e.code) for e in report.errors] == [
+        (1, "a", "type", "invalid_value"),
+        (1, "a", "importance", "out_of_range"),
+        (2, "b", "task_id", "missing"),
+        (3, "c", "timestamp", "invalid_timestamp"),
+        (3, "c", "duration_minutes", "out_of_range"),
+    ]
+    assert report.errors[0].message == "Invalid type: unknown"
+    assert count_invalid(traces) == 3
+
+
+def test_timestamp_formats_follow_fromisoformat():
+    stamps = ["2025-05-12T09:00:00+05:30", "2025-05-12", "20250512T090000", "2025-05-12T09:00:00.1234567Z",
+              "2024-02-29T00:00:00Z", "2025-05-12T24:00:00Z", "not a date", 20250512]
+    assert valid_mask([trace(timestamp=s) for s in stamps]).tolist() == [
+        True, True, True, True, True, False, False, False]
+
+
+def test_numeric_fields_match_int_and_float_conversion():
+    durations = [30, "45", 1.5, 0.5, "1.5", True, 1441, float("nan")]
+    assert valid_mask([trace(duration_minutes=d) for d in durations]).tolist() == [
+        True, True, True, False, False, True, False, False]
+    assert valid_mask([trace(importance=v) for v in ["0.3", 1, "high", [0.5]]]).tolist() == [True, True, False, False]
+
+
+def test_matches_per_trace_validator(capsys):
+    traces = synthetic_traces(2000, invalid_ratio=0.2)
+    expected = [per_trace_validate(t) for t in traces]
+    capsys.readouterr()
+    assert valid_mask(traces).tolist() == expected
+    assert capsys.readouterr().out == ""